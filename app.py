@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, session
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, send_file, session, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.routing import BuildError
@@ -6,24 +6,46 @@ from datetime import datetime, timedelta
 from functools import wraps
 import os
 import io
+import hmac
 import json
-from sqlalchemy import func, or_, and_
-from services.telegram_service import send_push
+import time
+import click
+from sqlalchemy import func, or_, and_, select
+from sqlalchemy.orm import joinedload, selectinload
+from services.telegram_outbox import enqueue_push, drain_outbox, purge_outbox
+from services.telegram_client import get_client as get_telegram_client
+from services.dashboard import get_dashboard_stats, invalidate_dashboard_cache
+from services.analytics import (task_timeseries, task_breakdown, series_start,
+                                GRANULARITIES, BREAKDOWNS)
+from services.explain import hot_queries, explain
+from services.pagination import keyset_paginate
+from services.nplusone import init_nplusone
+from services.metrics import init_metrics
+from services.reports import REPORTS
+from services.export_jobs import (init_export_jobs, submit_export, job_to_dict, job_mimetype,
+                                  run_pending_jobs, purge_export_jobs, refresh_job, expire_stale_jobs,
+                                  FORMATS as EXPORT_FORMATS)
+from services.xlsx_export import XLSX_MIMETYPE
+from services.bulk_export import (BULK_FORMATS, BulkExportError, build_statement as build_bulk_statement,
+                                  stream_rows as stream_bulk_rows)
+from services.bulk_import import IMPORTS, BulkImportError, read_rows, run_import
+from services.export_cache import report_file, cache_key, get_or_build, data_fingerprint
+from services.principal import load_principal, invalidate_principal
+from services.replica import init_replica, replica_reads, read_engine, check_replica, REPLICA_BIND
+from services.db_pool import init_pool_stats, pool_stats, check_database, saturated_for
+from services.notifications import (unread_state, unread_etag, unread_notifications, notification_to_dict,
+                                    page_limit as notification_page_limit, mark_read as mark_notifications_read)
+from services.search import search as search_index, ensure_search_index, rebuild_search_index, SOURCES as SEARCH_SOURCES
+from services.event_stream import init_event_stream, open_stream, purge_stream_events, publish as publish_event
+from services.sqlite_tuning import init_sqlite, run_maintenance, sqlite_pragmas
+from services.sql_stats import (init_sql_stats, get_endpoint_stats, get_recent_slow_queries,
+                                reset_sql_stats, slow_query_threshold_ms)
+from services.task_counters import (get_task_status_counts, count_overdue_tasks,
+                                    ensure_task_counters, rebuild_task_counters, verify_task_counters)
 # Import models and config
 from models import *
 from config import Config
 
-# Import for Excel/PDF generation
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -41,42 +63,49 @@ def utility_processor():
 app.config.from_object(Config)
 
 # Initialize extensions
+init_pool_stats(app)
 db.init_app(app)
+# Migratsiya buyruqlari (`flask db ...`) faqat CLI da kerak; flask_migrate alembic'ni
+# import qiladi (~300ms), shuning uchun gunicorn worker'lari uni yuklamaydi
+if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
+init_sqlite(app)
+init_nplusone(app)
+init_sql_stats(app)
+init_metrics(app)
+init_export_jobs(app)
+init_replica(app)
+init_event_stream(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Iltimos, tizimga kiring'
 
-# ===== TELEGRAM WEBHOOKNI AVTOMATIK O'RNATISH =====
-import requests
-
-def set_webhook():
-    webhook_url = Config.SERVER_URL.rstrip("/") + "/telegram-webhook"
+# ===== TELEGRAM WEBHOOK =====
+# Import paytida tarmoqqa murojaat qilinmaydi: webhook deploy vaqtida bir marta
+# `flask --app app set-webhook` bilan o'rnatiladi (Procfile release / preDeployCommand)
+def set_webhook(webhook_url=None):
+    if webhook_url is None and Config.SERVER_URL:
+        webhook_url = Config.SERVER_URL + "/telegram-webhook"
     bot_token = Config.TELEGRAM_BOT_TOKEN
 
     if bot_token and webhook_url:
-        url = f"https://api.telegram.org/bot{bot_token}/setWebhook"
-        resp = requests.post(url, json={"url": webhook_url})
-        print("Webhook response:", resp.text)
-
-with app.app_context():
-    try:
-        set_webhook()
-    except Exception as e:
-        print("Webhook set error:", e)
+        return get_telegram_client().set_webhook(webhook_url)
+    return None
 # ===============================================
 
-# Create upload folders
 UPLOAD_FOLDERS = ['uploads', 'uploads/vehicles', 'uploads/buildings', 'uploads/users',
                   'uploads/tasks', 'uploads/contracts', 'uploads/outsourcing', 
                   'uploads/guests', 'uploads/greenspaces', 'uploads/solarpanels']
 
-for folder in UPLOAD_FOLDERS:
-    os.makedirs(folder, exist_ok=True)
-
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Keshdan; faolsizlantirilgan foydalanuvchi sessiyasi ham shu yerda tugaydi
+    principal = load_principal(int(user_id))
+    if principal is None or not principal.is_active:
+        return None
+    return principal
 
 @app.context_processor
 def inject_ui_env():
@@ -127,10 +156,22 @@ def save_file(file, folder):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
         filename = timestamp + filename
         filepath = os.path.join(folder, filename)
+        # Papka birinchi yuklashda yaratiladi (import paytida emas)
+        os.makedirs(folder, exist_ok=True)
         file.save(filepath)
         return filepath
     return None
 
+def send_report_xlsx(report):
+    # Ma'lumot o'zgarmagan bo'lsa tayyor fayl keshdan beriladi
+    path = report_file(report, 'xlsx', current_user)
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=report.download_name('xlsx'),
+        mimetype=XLSX_MIMETYPE
+    )
+
 def get_task_status_color(status, due_date=None):
     if status == 'completed':
         return 'success'
@@ -147,20 +188,9 @@ def get_task_status_color(status, due_date=None):
     return 'primary'
 
 def send_telegram_notification(user_id, message):
-    """Send notification via Telegram bot"""
-    try:
-        user = User.query.get(user_id)
-        if user and user.telegram_chat_id and app.config['TELEGRAM_BOT_TOKEN']:
-            import requests
-            url = f"https://api.telegram.org/bot{app.config['TELEGRAM_BOT_TOKEN']}/sendMessage"
-            data = {
-                'chat_id': user.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            requests.post(url, data=data)
-    except Exception as e:
-        print(f"Telegram notification error: {e}")
+    """Queue Telegram notification in the outbox (sent by `flask telegram-worker`)"""
+    if app.config['TELEGRAM_BOT_TOKEN']:
+        enqueue_push(message, user_id=user_id, parse_mode='HTML')
 
 # ==================== AUTHENTICATION ROUTES ====================
 
@@ -273,63 +303,25 @@ def logout():
 
 @app.route('/dashboard')
 @login_required
+@replica_reads
 def dashboard():
-    # Get statistics for dashboard
-    stats = {}
-    
-    # Tasks statistics
-    if current_user.role in ['admin', 'rahbar']:
-        stats['total_tasks'] = Task.query.count()
-        stats['pending_tasks'] = Task.query.filter_by(status='pending').count()
-        stats['in_progress_tasks'] = Task.query.filter_by(status='in_progress').count()
-        stats['completed_tasks'] = Task.query.filter_by(status='completed').count()
-        stats['overdue_tasks'] = Task.query.filter(
-            Task.due_date < datetime.utcnow(),
-            Task.status != 'completed'
-        ).count()
-    else:
-        user_task_ids = [ta.task_id for ta in current_user.tasks_assigned]
-        stats['total_tasks'] = len(user_task_ids)
-        stats['pending_tasks'] = Task.query.filter(
-            Task.id.in_(user_task_ids),
-            Task.status == 'pending'
-        ).count()
-        stats['in_progress_tasks'] = Task.query.filter(
-            Task.id.in_(user_task_ids),
-            Task.status == 'in_progress'
-        ).count()
-        stats['completed_tasks'] = Task.query.filter(
-            Task.id.in_(user_task_ids),
-            Task.status == 'completed'
-        ).count()
-        stats['overdue_tasks'] = Task.query.filter(
-            Task.id.in_(user_task_ids),
-            Task.due_date < datetime.utcnow(),
-            Task.status != 'completed'
-        ).count()
-    
-    # Other statistics
-    stats['total_vehicles'] = Vehicle.query.count()
-    stats['active_vehicles'] = Vehicle.query.filter_by(status='active').count()
-    stats['total_buildings'] = Building.query.count()
-    stats['total_employees'] = User.query.filter_by(role='xodim').count()
-    stats['total_contracts'] = Contract.query.count()
-    stats['active_contracts'] = Contract.query.filter_by(status='active').count()
-    stats['total_guests'] = Guest.query.count()
-    stats['total_organizations'] = Organization.query.count()
+    # Statistika: bir necha agregat so'rov, qisqa TTL bilan keshlanadi
+    stats = get_dashboard_stats(current_user)
     
     # Recent activities
     recent_tasks = []
     if current_user.role in ['admin', 'rahbar']:
         recent_tasks = Task.query.order_by(Task.created_at.desc()).limit(5).all()
     else:
-        user_task_ids = [ta.task_id for ta in current_user.tasks_assigned]
+        user_task_ids = select(TaskAssignment.task_id).where(
+            TaskAssignment.user_id == current_user.id
+        )
         recent_tasks = Task.query.filter(Task.id.in_(user_task_ids)).order_by(
             Task.created_at.desc()
         ).limit(5).all()
     
     # Get user's assigned modules
-    user_modules = [um.module_name for um in current_user.assigned_modules]
+    user_modules = sorted(current_user.modules)
     
     # Notifications
     notifications = Notification.query.filter_by(
@@ -350,14 +342,15 @@ def dashboard():
 @app.route('/tasks')
 @login_required
 @module_access_required('tasks')
+@replica_reads
 def tasks():
-    if current_user.role in ['admin', 'rahbar']:
-        tasks = Task.query.order_by(Task.created_at.desc()).all()
-    else:
-        user_task_ids = [ta.task_id for ta in current_user.tasks_assigned]
-        tasks = Task.query.filter(Task.id.in_(user_task_ids)).order_by(Task.created_at.desc()).all()
+    query = Task.query.options(joinedload(Task.creator))
+    if current_user.role not in ['admin', 'rahbar']:
+        user_task_ids = select(TaskAssignment.task_id).where(TaskAssignment.user_id == current_user.id)
+        query = query.filter(Task.id.in_(user_task_ids))
+    page = keyset_paginate(query, Task.created_at, Task.id)
     
-    return render_template('tasks/index.html', tasks=tasks, get_task_status_color=get_task_status_color)
+    return render_template('tasks/index.html', tasks=page.items, page=page, get_task_status_color=get_task_status_color)
 
 @app.route('/tasks/create', methods=['GET', 'POST'])
 @login_required
@@ -415,8 +408,12 @@ def tasks_create():
 
 @app.route('/tasks/<int:id>')
 @login_required
+@replica_reads
 def tasks_view(id):
-    task = Task.query.get_or_404(id)
+    task = Task.query.options(
+        joinedload(Task.creator),
+        selectinload(Task.assignments).joinedload(TaskAssignment.assigned_user)
+    ).filter_by(id=id).first_or_404()
 
     # Xodim faqat o‘ziga biriktirilgan topshiriqlarni ko‘radi
     if current_user.role == 'xodim':
@@ -432,7 +429,8 @@ def tasks_view(id):
             flash("Bu topshiriq sizga biriktirilmagan", "danger")
             return redirect(url_for('tasks'))
 
-    comments = TaskComment.query.filter_by(task_id=id).order_by(TaskComment.created_at.desc()).all()
+    comments = TaskComment.query.options(joinedload(TaskComment.user)).filter_by(task_id=id) \
+        .order_by(TaskComment.created_at.desc()).all()
     assigned_user_ids = [a.user_id for a in task.assignments]
 
     return render_template(
@@ -489,13 +487,11 @@ def tasks_update_status(id):
         )
         db.session.add(notification)
 
-        # 🔥 RAHBARGA PUSH YUBORILADI
-        boss = User.query.get(task.created_by)
-        if boss and boss.telegram_chat_id:
-            send_push(
-                boss.telegram_chat_id,
-                f"📌 Xodim topshiriqni bajardi:\n{task.title}\nTasdiqlashingiz kerak."
-            )
+        # 🔥 RAHBARGA PUSH (outbox orqali)
+        enqueue_push(
+            f"📌 Xodim topshiriqni bajardi:\n{task.title}\nTasdiqlashingiz kerak.",
+            user_id=task.created_by
+        )
 
     # ========== 2) RAHBAR TASDIQLAGANDA ==========
     elif new_status == 'approved' and current_user.role == 'rahbar':
@@ -505,14 +501,11 @@ def tasks_update_status(id):
 
         # Har bir biriktirilgan xodimga habar
         for assignment in task.assignments:
-            worker = User.query.get(assignment.user_id)
-
-            # 🔥 XODIMGA PUSH
-            if worker and worker.telegram_chat_id:
-                send_push(
-                    worker.telegram_chat_id,
-                    f"✅ Rahbar topshirig'ingizni TASDIQLADI:\n{task.title}"
-                )
+            # 🔥 XODIMGA PUSH (outbox orqali)
+            enqueue_push(
+                f"✅ Rahbar topshirig'ingizni TASDIQLADI:\n{task.title}",
+                user_id=assignment.user_id
+            )
 
             notification = Notification(
                 user_id=assignment.user_id,
@@ -531,14 +524,11 @@ def tasks_update_status(id):
         task.status = 'rejected'
 
         for assignment in task.assignments:
-            worker = User.query.get(assignment.user_id)
-
-            # 🔥 XODIMGA PUSH
-            if worker and worker.telegram_chat_id:
-                send_push(
-                    worker.telegram_chat_id,
-                    f"❌ Rahbar topshirig'ingizni RAD ETDI:\n{task.title}"
-                )
+            # 🔥 XODIMGA PUSH (outbox orqali)
+            enqueue_push(
+                f"❌ Rahbar topshirig'ingizni RAD ETDI:\n{task.title}",
+                user_id=assignment.user_id
+            )
 
             notification = Notification(
                 user_id=assignment.user_id,
@@ -557,11 +547,21 @@ def tasks_update_status(id):
 
     # Umumiy update va saqlash
     task.updated_at = datetime.utcnow()
+    # Ochiq topshiriq sahifalari va bildirishnoma hisoblagichi uchun (SSE)
+    publish_event(_task_watchers(task), 'task_status', {
+        'task_id': task.id, 'title': task.title, 'status': task.status,
+        'by': current_user.full_name, 'link': url_for('tasks_view', id=task.id),
+    })
     db.session.commit()
 
     return redirect(url_for('tasks_view', id=id))
 
 
+def _task_watchers(task):
+    # Topshiriq muallifi va ijrochilari, o'zgarishni qilgan foydalanuvchidan tashqari
+    return {task.created_by, *(a.user_id for a in task.assignments)} - {current_user.id}
+
+
 @app.route('/tasks/<int:id>/add-comment', methods=['POST'])
 @login_required
 def tasks_add_comment(id):
@@ -575,6 +575,10 @@ def tasks_add_comment(id):
             comment=comment_text
         )
         db.session.add(comment)
+        publish_event(_task_watchers(task), 'task_comment', {
+            'task_id': task.id, 'title': task.title, 'comment': comment_text[:200],
+            'by': current_user.full_name, 'link': url_for('tasks_view', id=task.id),
+        })
         db.session.commit()
         
         flash('Izoh qo\'shildi', 'success')
@@ -597,9 +601,10 @@ def tasks_delete(id):
 @app.route('/vehicles')
 @login_required
 @module_access_required('vehicles')
+@replica_reads
 def vehicles():
-    vehicles = Vehicle.query.order_by(Vehicle.created_at.desc()).all()
-    return render_template('vehicles/index.html', vehicles=vehicles)
+    page = keyset_paginate(Vehicle.query.options(joinedload(Vehicle.driver)), Vehicle.created_at, Vehicle.id)
+    return render_template('vehicles/index.html', vehicles=page.items, page=page)
 
 @app.route('/vehicles/create', methods=['GET', 'POST'])
 @login_required
@@ -640,6 +645,7 @@ def vehicles_create():
 @app.route('/vehicles/<int:id>')
 @login_required
 @module_access_required('vehicles')
+@replica_reads
 def vehicles_view(id):
     vehicle = Vehicle.query.get_or_404(id)
     return render_template('vehicles/view.html', vehicle=vehicle)
@@ -692,133 +698,43 @@ def vehicles_delete(id):
 @app.route('/vehicles/export-pdf')
 @login_required
 @module_access_required('vehicles')
+@replica_reads
 def vehicles_export_pdf():
-    vehicles = Vehicle.query.all()
-    
-    # Create PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
-    
-    # Title
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=1
-    )
-    title = Paragraph("Transport Vositalari Hisoboti", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Table data
-    data = [['№', 'Markasi', 'Modeli', 'Raqami', 'Yili', 'Holati', 'Haydovchi']]
-    
-    for idx, vehicle in enumerate(vehicles, 1):
-        driver_name = vehicle.driver.full_name if vehicle.driver else '-'
-        data.append([
-            str(idx),
-            vehicle.brand or '-',
-            vehicle.model or '-',
-            vehicle.license_plate or '-',
-            str(vehicle.year) if vehicle.year else '-',
-            vehicle.status or '-',
-            driver_name
-        ])
-    
-    # Create table
-    table = Table(data, colWidths=[0.5*inch, 1.2*inch, 1.2*inch, 1*inch, 0.8*inch, 1*inch, 1.5*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')])
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
+    # Transport yoki haydovchilar o'zgarmagan bo'lsa tayyor PDF keshdan
+    key = cache_key('vehicles', 'pdf-summary', 2, data_fingerprint((Vehicle, User)))
+    path = get_or_build(key, 'pdf', _write_vehicles_pdf)
     return send_file(
-        buffer,
+        path,
         as_attachment=True,
         download_name=f'transport_hisoboti_{datetime.now().strftime("%Y%m%d")}.pdf',
         mimetype='application/pdf'
     )
 
+VEHICLES_PDF_COLUMNS = [
+    ('№', 0.5), ('Markasi', 1.2), ('Modeli', 1.2), ('Raqami', 1), ('Yili', 0.8), ('Holati', 1), ('Haydovchi', 1.5),
+]
+
+
+def _write_vehicles_pdf(buffer):
+    from reportlab.lib.units import inch
+    from services.pdf_export import write_table_pdf
+
+    vehicles = Vehicle.query.options(joinedload(Vehicle.driver)).order_by(Vehicle.id).yield_per(1000)
+    rows = (
+        [idx, vehicle.brand or '-', vehicle.model or '-', vehicle.license_plate or '-',
+         vehicle.year or '-', vehicle.status or '-', vehicle.driver.full_name if vehicle.driver else '-']
+        for idx, vehicle in enumerate(vehicles, 1)
+    )
+    write_table_pdf(buffer, "Transport Vositalari Hisoboti", [header for header, _ in VEHICLES_PDF_COLUMNS], rows,
+                    col_widths=[width * inch for _, width in VEHICLES_PDF_COLUMNS])
+
 @app.route('/vehicles/export-excel')
 @login_required
 @module_access_required('vehicles')
+@replica_reads
 def vehicles_export_excel():
-    vehicles = Vehicle.query.all()
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Transport Vositalari"
-    
-    # Headers
-    headers = ['№', 'Markasi', 'Modeli', 'Raqami', 'Yili', 'Rangi', 'Holati', 'Haydovchi', 
-               'So\'nggi remont', 'Keyingi remont', 'Defektlar']
-    ws.append(headers)
-    
-    # Style headers
-    for cell in ws[1]:
-        cell.font = Font(bold=True, color='FFFFFF')
-        cell.fill = PatternFill(start_color='2c3e50', end_color='2c3e50', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Add data
-    for idx, vehicle in enumerate(vehicles, 1):
-        driver_name = vehicle.driver.full_name if vehicle.driver else '-'
-        last_maintenance = vehicle.last_maintenance.strftime('%d.%m.%Y') if vehicle.last_maintenance else '-'
-        next_maintenance = vehicle.next_maintenance.strftime('%d.%m.%Y') if vehicle.next_maintenance else '-'
-        
-        ws.append([
-            idx,
-            vehicle.brand or '-',
-            vehicle.model or '-',
-            vehicle.license_plate or '-',
-            vehicle.year or '-',
-            vehicle.color or '-',
-            vehicle.status or '-',
-            driver_name,
-            last_maintenance,
-            next_maintenance,
-            vehicle.defects or '-'
-        ])
-    
-    # Adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f'transport_hisoboti_{datetime.now().strftime("%Y%m%d")}.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    return send_report_xlsx(REPORTS['vehicles'])
+
 
 
 # ==================== BUILDINGS MODULE ====================
@@ -826,10 +742,11 @@ def vehicles_export_excel():
 @app.route('/buildings')
 @login_required
 @module_access_required('buildings')
+@replica_reads
 def buildings():
-    buildings = Building.query.order_by(Building.created_at.desc()).all()
+    page = keyset_paginate(Building.query, Building.created_at, Building.id)
     categories = BuildingCategory.query.all()
-    return render_template('buildings/index.html', buildings=buildings, categories=categories)
+    return render_template('buildings/index.html', buildings=page.items, page=page, categories=categories)
 
 @app.route('/buildings/categories', methods=['GET', 'POST'])
 @login_required
@@ -889,10 +806,11 @@ def buildings_create():
 @app.route('/greenspaces')
 @login_required
 @module_access_required('greenspaces')
+@replica_reads
 def greenspaces():
-    greenspaces = GreenSpace.query.order_by(GreenSpace.created_at.desc()).all()
+    page = keyset_paginate(GreenSpace.query, GreenSpace.created_at, GreenSpace.id)
     categories = GreenSpaceCategory.query.all()
-    return render_template('greenspaces/index.html', greenspaces=greenspaces, categories=categories)
+    return render_template('greenspaces/index.html', greenspaces=page.items, page=page, categories=categories)
 
 @app.route('/greenspaces/categories', methods=['GET', 'POST'])
 @login_required
@@ -951,9 +869,10 @@ def greenspaces_create():
 @app.route('/solarpanels')
 @login_required
 @module_access_required('solarpanels')
+@replica_reads
 def solarpanels():
-    solarpanels = SolarPanel.query.order_by(SolarPanel.created_at.desc()).all()
-    return render_template('solarpanels/index.html', solarpanels=solarpanels)
+    page = keyset_paginate(SolarPanel.query, SolarPanel.created_at, SolarPanel.id)
+    return render_template('solarpanels/index.html', solarpanels=page.items, page=page)
 
 @app.route('/solarpanels/create', methods=['GET', 'POST'])
 @login_required
@@ -993,26 +912,28 @@ def solarpanels_create():
 @app.route('/employees')
 @login_required
 @rahbar_required
+@replica_reads
 def employees():
-    employees = User.query.filter_by(role='xodim').order_by(User.created_at.desc()).all()
-    return render_template('employees/index.html', employees=employees)
+    page = keyset_paginate(User.query.filter_by(role='xodim'), User.created_at, User.id)
+    return render_template('employees/index.html', employees=page.items, page=page)
 
 @app.route('/employees/<int:id>')
 @login_required
+@replica_reads
 def employees_view(id):
     employee = User.query.get_or_404(id)
     
     # Get employee statistics
     if employee.role == 'xodim':
-        assigned_tasks = [ta.task for ta in employee.tasks_assigned]
-        completed_tasks = [t for t in assigned_tasks if t.status == 'completed']
-        pending_tasks = [t for t in assigned_tasks if t.status in ['pending', 'in_progress']]
+        counts = get_task_status_counts(employee.id)
+        total_tasks = sum(counts.values())
+        completed_tasks = counts.get('completed', 0)
         
         stats = {
-            'total_tasks': len(assigned_tasks),
-            'completed_tasks': len(completed_tasks),
-            'pending_tasks': len(pending_tasks),
-            'completion_rate': round((len(completed_tasks) / len(assigned_tasks) * 100) if assigned_tasks else 0, 1)
+            'total_tasks': total_tasks,
+            'completed_tasks': completed_tasks,
+            'pending_tasks': counts.get('pending', 0) + counts.get('in_progress', 0),
+            'completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks else 0, 1)
         }
     else:
         stats = None
@@ -1038,6 +959,7 @@ def employees_assign_module(id):
         )
         db.session.add(assignment)
         db.session.commit()
+        invalidate_principal(id)
         
         flash('Modul muvaffaqiyatli biriktirildi', 'success')
     
@@ -1051,6 +973,7 @@ def employees_remove_module(id, module_name):
     if assignment:
         db.session.delete(assignment)
         db.session.commit()
+        invalidate_principal(id)
         flash('Modul olib tashlandi', 'success')
     
     return redirect(url_for('employees_view', id=id))
@@ -1060,9 +983,10 @@ def employees_remove_module(id, module_name):
 @app.route('/outsourcing')
 @login_required
 @module_access_required('outsourcing')
+@replica_reads
 def outsourcing():
-    services = OutsourcingService.query.order_by(OutsourcingService.created_at.desc()).all()
-    return render_template('outsourcing/index.html', services=services)
+    page = keyset_paginate(OutsourcingService.query, OutsourcingService.created_at, OutsourcingService.id)
+    return render_template('outsourcing/index.html', services=page.items, page=page)
 
 @app.route('/outsourcing/create', methods=['GET', 'POST'])
 @login_required
@@ -1098,9 +1022,10 @@ def outsourcing_create():
 @app.route('/organizations')
 @login_required
 @module_access_required('organizations')
+@replica_reads
 def organizations():
-    organizations = Organization.query.order_by(Organization.created_at.desc()).all()
-    return render_template('organizations/index.html', organizations=organizations)
+    page = keyset_paginate(Organization.query, Organization.created_at, Organization.id)
+    return render_template('organizations/index.html', organizations=page.items, page=page)
 
 @app.route('/organizations/create', methods=['GET', 'POST'])
 @login_required
@@ -1140,9 +1065,10 @@ def organizations_create():
 @app.route('/guests')
 @login_required
 @module_access_required('guests')
+@replica_reads
 def guests():
-    guests = Guest.query.order_by(Guest.created_at.desc()).all()
-    return render_template('guests/index.html', guests=guests)
+    page = keyset_paginate(Guest.query, Guest.created_at, Guest.id)
+    return render_template('guests/index.html', guests=page.items, page=page)
 
 @app.route('/guests/create', methods=['GET', 'POST'])
 @login_required
@@ -1182,60 +1108,38 @@ def guests_create():
     
     return render_template('guests/create.html')
 
+def _money(value):
+    return f"{value:,.0f} so'm" if value else "0 so'm"
+
+
+def _guest_pdf_fields(guest):
+    return [
+        ('To\'liq ismi:', guest.full_name or '-'),
+        ('Tashkilot:', guest.organization or '-'),
+        ('Lavozim:', guest.position or '-'),
+        ('Kelgan sana:', guest.arrival_date.strftime('%d.%m.%Y') if guest.arrival_date else '-'),
+        ('Ketgan sana:', guest.departure_date.strftime('%d.%m.%Y') if guest.departure_date else '-'),
+        ('Tashrif maqsadi:', guest.visit_purpose or '-'),
+        ('Asos raqami:', guest.reference_number or '-'),
+        ('Ko\'rsatilgan xizmatlar:', guest.services_provided or '-'),
+        ('Restoran xarajatlari:', _money(guest.restaurant_expense)),
+        ('Sovg\'a xarajatlari:', _money(guest.gift_expense)),
+        ('Boshqa xarajatlar:', _money(guest.other_expenses)),
+        ('Jami xarajat:', _money(guest.total_expense)),
+    ]
+
+
 @app.route('/guests/<int:id>/export-pdf')
 @login_required
 @module_access_required('guests')
+@replica_reads
 def guests_export_pdf(id):
+    from services.pdf_export import write_records_pdf
+
     guest = Guest.query.get_or_404(id)
     
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=1
-    )
-    
-    title = Paragraph("Mehmon Ma'lumotlari", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Guest info table
-    data = [
-        ['To\'liq ismi:', guest.full_name or '-'],
-        ['Tashkilot:', guest.organization or '-'],
-        ['Lavozim:', guest.position or '-'],
-        ['Kelgan sana:', guest.arrival_date.strftime('%d.%m.%Y') if guest.arrival_date else '-'],
-        ['Ketgan sana:', guest.departure_date.strftime('%d.%m.%Y') if guest.departure_date else '-'],
-        ['Tashrif maqsadi:', guest.visit_purpose or '-'],
-        ['Asos raqami:', guest.reference_number or '-'],
-        ['Ko\'rsatilgan xizmatlar:', guest.services_provided or '-'],
-        ['Restoran xarajatlari:', f"{guest.restaurant_expense:,.0f} so'm" if guest.restaurant_expense else '0 so\'m'],
-        ['Sovg\'a xarajatlari:', f"{guest.gift_expense:,.0f} so'm" if guest.gift_expense else '0 so\'m'],
-        ['Boshqa xarajatlar:', f"{guest.other_expenses:,.0f} so'm" if guest.other_expenses else '0 so\'m'],
-        ['Jami xarajat:', f"{guest.total_expense:,.0f} so'm" if guest.total_expense else '0 so\'m'],
-    ]
-    
-    table = Table(data, colWidths=[2*inch, 4*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8e8e8')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
+    write_records_pdf(buffer, "Mehmon Ma'lumotlari", [(None, _guest_pdf_fields(guest))])
     
     buffer.seek(0)
     return send_file(
@@ -1245,18 +1149,58 @@ def guests_export_pdf(id):
         mimetype='application/pdf'
     )
 
+@app.route('/guests/export-pdf')
+@login_required
+@module_access_required('guests')
+@replica_reads
+def guests_export_pdf_range():
+    """All guests who arrived in [date_from, date_to] in one document."""
+    try:
+        date_from = datetime.strptime(request.args['date_from'], '%Y-%m-%d') if request.args.get('date_from') else None
+        date_to = datetime.strptime(request.args['date_to'], '%Y-%m-%d') if request.args.get('date_to') else None
+    except ValueError:
+        flash('Sana formati noto\'g\'ri', 'danger')
+        return redirect(url_for('guests'))
+
+    query = Guest.query.order_by(Guest.arrival_date, Guest.id)
+    if date_from:
+        query = query.filter(Guest.arrival_date >= date_from)
+    if date_to:
+        query = query.filter(Guest.arrival_date < date_to + timedelta(days=1))
+    period = ' — '.join(d.strftime('%d.%m.%Y') for d in (date_from, date_to) if d) or 'Barcha mehmonlar'
+
+    def write(fileobj):
+        from services.pdf_export import write_records_pdf
+        records = ((guest.full_name, _guest_pdf_fields(guest)) for guest in query.yield_per(500))
+        write_records_pdf(fileobj, "Mehmonlar Hisoboti", records, subtitle=period)
+
+    key = cache_key('guests', 'pdf-records', request.args.get('date_from'), request.args.get('date_to'),
+                    data_fingerprint((Guest,)))
+    path = get_or_build(key, 'pdf', write)
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f'mehmonlar_{datetime.now().strftime("%Y%m%d")}.pdf',
+        mimetype='application/pdf'
+    )
+
 # ==================== CELEBRATIONS MODULE ====================
 
 @app.route('/celebrations')
 @login_required
 @module_access_required('celebrations')
+@replica_reads
 def celebrations():
-    celebrations = Celebration.query.order_by(Celebration.date.desc()).all()
-    return render_template('celebrations/index.html', celebrations=celebrations)
+    # Sana bo'lmasa yaratilgan vaqt bo'yicha (NULL kursorni buzmasligi uchun)
+    sort_date = func.coalesce(Celebration.date, Celebration.created_at)
+    page = keyset_paginate(Celebration.query.options(joinedload(Celebration.recipient)), sort_date, Celebration.id,
+                           sort_value=lambda c: c.date or c.created_at)
+    return render_template('celebrations/index.html', celebrations=page.items, page=page)
 
 @app.route('/celebrations/birthdays')
 @login_required
 @module_access_required('celebrations')
+@replica_reads
 def celebrations_birthdays():
     # Get all users with birthdays
     users = User.query.filter(User.is_active == True).all()
@@ -1305,9 +1249,10 @@ def celebrations_create():
 @app.route('/contracts')
 @login_required
 @module_access_required('contracts')
+@replica_reads
 def contracts():
-    contracts = Contract.query.order_by(Contract.created_at.desc()).all()
-    return render_template('contracts/index.html', contracts=contracts)
+    page = keyset_paginate(Contract.query.options(selectinload(Contract.documents)), Contract.created_at, Contract.id)
+    return render_template('contracts/index.html', contracts=page.items, page=page)
 
 @app.route('/contracts/create', methods=['GET', 'POST'])
 @login_required
@@ -1353,59 +1298,133 @@ def contracts_create():
 @app.route('/contracts/export-excel')
 @login_required
 @module_access_required('contracts')
+@replica_reads
 def contracts_export_excel():
-    contracts = Contract.query.all()
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Shartnomalar"
-    
-    headers = ['№', 'Shartnoma raqami', 'Sana', 'Firma nomi', 'Summa', 
-               'To\'lov sanasi', 'Holati', 'Izoh']
-    ws.append(headers)
-    
-    for cell in ws[1]:
-        cell.font = Font(bold=True, color='FFFFFF')
-        cell.fill = PatternFill(start_color='2c3e50', end_color='2c3e50', fill_type='solid')
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-    
-    for idx, contract in enumerate(contracts, 1):
-        contract_date = contract.contract_date.strftime('%d.%m.%Y') if contract.contract_date else '-'
-        payment_date = contract.payment_date.strftime('%d.%m.%Y') if contract.payment_date else '-'
-        
-        ws.append([
-            idx,
-            contract.contract_number or '-',
-            contract_date,
-            contract.company_name or '-',
-            contract.contract_amount or 0,
-            payment_date,
-            contract.status or '-',
-            contract.notes or '-'
-        ])
-    
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        as_attachment=True,
-        download_name=f'shartnomalar_{datetime.now().strftime("%Y%m%d")}.xlsx',
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    return send_report_xlsx(REPORTS['contracts'])
+
+
+# ==================== EXPORTS ====================
+
+@app.route('/export/<name>.xlsx')
+@login_required
+@replica_reads
+def reports_export_excel(name):
+    report = REPORTS.get(name)
+    if report is None:
+        abort(404)
+    if not current_user.has_module_access(report.module):
+        flash(f'{report.module} moduliga kirish huquqingiz yo\'q', 'danger')
+        return redirect(url_for('dashboard'))
+    return send_report_xlsx(report)
+
+@app.route('/export/jobs', methods=['POST'])
+@login_required
+def export_jobs_create():
+    data = request.get_json(silent=True) or request.form
+    report = REPORTS.get(data.get('report'))
+    fmt = data.get('format', 'xlsx')
+    if report is None or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Noma\'lum hisobot yoki format'}), 400
+    if not current_user.has_module_access(report.module):
+        return jsonify({'error': f'{report.module} moduliga kirish huquqingiz yo\'q'}), 403
+
+    job = submit_export(current_user.id, report.name, fmt)
+    payload = job_to_dict(job)
+    payload['status_url'] = url_for('export_jobs_status', id=job.id)
+    return jsonify(payload), 202
+
+def _get_own_export_job(id):
+    job = ExportJob.query.get_or_404(id)
+    if job.user_id != current_user.id and current_user.role != 'admin':
+        abort(404)
+    return job
+
+@app.route('/export/jobs/<int:id>')
+@login_required
+def export_jobs_status(id):
+    job = refresh_job(_get_own_export_job(id))
+    payload = job_to_dict(job)
+    if job.status == 'done':
+        payload['download_url'] = url_for('export_jobs_download', id=job.id)
+    return jsonify(payload)
+
+@app.route('/export/jobs/<int:id>/download')
+@login_required
+def export_jobs_download(id):
+    job = _get_own_export_job(id)
+    if job.status != 'done':
+        abort(404)
+    if not job.filepath or not os.path.exists(job.filepath):
+        # Fayl keshdan o'chirilgan: status endpoint'i vazifani qayta navbatga qo'yadi
+        abort(410)
+    return send_file(job.filepath, as_attachment=True, download_name=job.filename,
+                     mimetype=job_mimetype(job))
+
+
+@app.route('/export/bulk/<name>.<fmt>')
+@replica_reads
+def bulk_export(name, fmt):
+    """Stream raw rows as CSV or NDJSON (admin session or BULK_EXPORT_TOKEN)."""
+    token = os.environ.get('BULK_EXPORT_TOKEN')
+    authorized = token and hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                               f'Bearer {token}'.encode())
+    if not authorized and not (current_user.is_authenticated and current_user.role == 'admin'):
+        abort(401)
+    if fmt not in BULK_FORMATS:
+        abort(404)
+
+    columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()]
+    try:
+        names, stmt = build_bulk_statement(name, columns, request.args.get('since'), request.args.get('until'))
+    except BulkExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Generator so'rov kontekstidan keyin ishlaydi: engine oldindan olinadi
+    response = Response(stream_bulk_rows(read_engine(db), names, stmt, fmt), mimetype=BULK_FORMATS[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename={name}_{datetime.now().strftime("%Y%m%d")}.{fmt}'
+    return response
+
+
+# ==================== IMPORT ====================
+
+IMPORT_TITLES = {'vehicles': 'Transport', 'contracts': 'Shartnomalar', 'guests': 'Mehmonlar',
+                 'users': 'Xodimlar'}
+
+@app.route('/import/<name>', methods=['GET', 'POST'])
+@login_required
+def bulk_import(name):
+    spec = IMPORTS.get(name)
+    if spec is None:
+        abort(404)
+    # Xodimlar importi faqat admin uchun, qolganlari modul huquqi bilan
+    allowed = current_user.role == 'admin' if spec.module is None else current_user.has_module_access(spec.module)
+    if not allowed:
+        flash('Bu importga ruxsatingiz yo\'q', 'danger')
+        return redirect(url_for('dashboard'))
+
+    result = None
+    dry_run = bool(request.form.get('dry_run'))
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Fayl tanlanmagan', 'danger')
+            return redirect(request.url)
+        try:
+            result = run_import(spec, read_rows(file.stream, file.filename), current_user.id,
+                                dry_run=dry_run, all_or_nothing=bool(request.form.get('all_or_nothing')))
+        except BulkImportError as e:
+            flash(str(e), 'danger')
+            return redirect(request.url)
+        if result.inserted and not dry_run:
+            # Bulk INSERT sessiya hodisalarini chetlab o'tadi
+            invalidate_dashboard_cache()
+        action = 'tekshirildi' if dry_run else 'qo\'shildi'
+        flash(f'{result.inserted} ta yozuv {action}, {result.skipped} ta o\'tkazib yuborildi',
+              'success' if not result.errors else 'warning')
+
+    return render_template('import.html', spec=spec, title=IMPORT_TITLES.get(name, name),
+                           result=result, dry_run=dry_run)
 
 
 # ==================== ADMIN PANEL ====================
@@ -1417,7 +1436,8 @@ def admin_panel():
     total_users = User.query.count()
     active_users = User.query.filter_by(is_active=True).count()
     total_tasks = Task.query.count()
-    recent_activities = ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(20).all()
+    recent_activities = ActivityLog.query.options(joinedload(ActivityLog.user)) \
+        .order_by(ActivityLog.created_at.desc()).limit(20).all()
     
     return render_template('admin/panel.html',
                          total_users=total_users,
@@ -1425,12 +1445,34 @@ def admin_panel():
                          total_tasks=total_tasks,
                          recent_activities=recent_activities)
 
+@app.route('/admin/sql-stats')
+@login_required
+@admin_required
+def admin_sql_stats():
+    order_by = request.args.get('sort', 'db_time')
+    if order_by not in ('db_time', 'avg_db_ms', 'queries', 'avg_queries', 'max_db_time', 'requests'):
+        order_by = 'db_time'
+    return render_template('admin/sql_stats.html',
+                         endpoints=get_endpoint_stats(order_by),
+                         slow_queries=get_recent_slow_queries(),
+                         slow_query_ms=slow_query_threshold_ms(),
+                         sort=order_by)
+
+@app.route('/admin/sql-stats/reset', methods=['POST'])
+@login_required
+@admin_required
+def admin_sql_stats_reset():
+    reset_sql_stats()
+    flash('SQL statistikasi tozalandi', 'success')
+    return redirect(url_for('admin_sql_stats'))
+
 @app.route('/admin/users')
 @login_required
 @admin_required
+@replica_reads
 def admin_users():
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('admin/users.html', users=users)
+    page = keyset_paginate(User.query, User.created_at, User.id)
+    return render_template('admin/users.html', users=page.items, page=page)
 
 @app.route('/admin/users/<int:id>/toggle-status', methods=['POST'])
 @login_required
@@ -1439,6 +1481,7 @@ def admin_toggle_user_status(id):
     user = User.query.get_or_404(id)
     user.is_active = not user.is_active
     db.session.commit()
+    invalidate_principal(user.id)
     
     status = 'faollashtirildi' if user.is_active else 'faolsizlantirildi'
     flash(f'Foydalanuvchi {status}', 'success')
@@ -1452,31 +1495,112 @@ def admin_change_user_role(id):
     new_role = request.form.get('role')
     user.role = new_role
     db.session.commit()
+    invalidate_principal(user.id)
     
     flash('Foydalanuvchi roli o\'zgartirildi', 'success')
     return redirect(url_for('admin_users'))
 
+# ==================== SEARCH ====================
+
+def _run_search():
+    query = request.args.get('q', '').strip()
+    kinds = set(request.args.getlist('kind'))
+    limit = min(request.args.get('limit', 20, type=int) or 20, 100)
+    if not query:
+        return query, kinds, []
+    with read_engine(db).connect() as connection:
+        return query, kinds, search_index(connection, query, current_user, limit=limit, kinds=kinds)
+
+def _search_result_url(result):
+    if result.task_id is not None:
+        return url_for('tasks_view', id=result.task_id)
+    # Qolgan modullarda alohida sahifa yo'q, ro'yxatga olib boradi
+    return url_for({'contract': 'contracts', 'guest': 'guests', 'organization': 'organizations',
+                    'building': 'buildings', 'outsourcing': 'outsourcing'}[result.kind])
+
+@app.route('/search')
+@login_required
+@replica_reads
+def search():
+    try:
+        query, kinds, results = _run_search()
+    except NotImplementedError:
+        # Qidiruv indeksi faqat SQLite va Postgres uchun (services/search.py)
+        flash('Qidiruv bu ma\'lumotlar bazasida qo\'llab-quvvatlanmaydi', 'warning')
+        query, kinds, results = request.args.get('q', '').strip(), set(request.args.getlist('kind')), []
+    sources = [source for source in SEARCH_SOURCES if current_user.has_module_access(source.module)]
+    return render_template('search.html', query=query, kinds=kinds, results=results,
+                           sources=sources, result_url=_search_result_url)
+
 # ==================== API ENDPOINTS ====================
 
+@app.route('/api/search')
+@login_required
+@replica_reads
+def api_search():
+    try:
+        query, kinds, results = _run_search()
+    except NotImplementedError as e:
+        return jsonify({'error': str(e)}), 501
+    return jsonify([{**result._asdict(), 'url': _search_result_url(result)} for result in results])
+
 @app.route('/api/notifications')
 @login_required
+@replica_reads
 def api_notifications():
-    notifications = Notification.query.filter_by(
-        user_id=current_user.id,
-        is_read=False
-    ).order_by(Notification.created_at.desc()).all()
-    
-    return jsonify({
-        'count': len(notifications),
-        'notifications': [{
-            'id': n.id,
-            'title': n.title,
-            'message': n.message,
-            'type': n.type,
-            'link': n.link,
-            'created_at': n.created_at.strftime('%d.%m.%Y %H:%M')
-        } for n in notifications]
-    })
+    since_id = request.args.get('since_id', type=int)
+    limit = notification_page_limit(request.args.get('limit', type=int))
+
+    count, last_id = unread_state(current_user.id)
+    etag = unread_etag(current_user.id, count, last_id, since_id, limit)
+    if request.if_none_match.contains_weak(etag):
+        # O'zgarish yo'q: ro'yxat so'rovi ham, JSON ham yo'q
+        response = app.response_class(status=304)
+    else:
+        notifications = unread_notifications(current_user.id, since_id, limit) if count else []
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+        response = jsonify({
+            'count': count,
+            'last_id': last_id,
+            'has_more': has_more,
+            # since_id bilan sahifalar id ASC: keyingi sahifa ?since_id=next_since_id
+            'next_since_id': notifications[-1].id if since_id and has_more else None,
+            'notifications': [notification_to_dict(n) for n in notifications]
+        })
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/api/notifications/stream')
+@login_required
+def api_notifications_stream():
+    # EventSource qayta ulanganda Last-Event-ID sarlavhasini o'zi yuboradi
+    last_event_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('last_event_id', type=int)
+    stream = open_stream(current_user.id, last_event_id)
+    if stream is None:
+        # Oqim o'chiq yoki worker to'la: 204 da EventSource qayta ulanmaydi, sahifa so'rashga o'tadi
+        return '', 204
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/notifications/mark-read', methods=['POST'])
+@login_required
+def api_mark_notifications_read():
+    # JSON: {"ids": [1, 2]} yoki {"up_to_id": 42}; forma maydonlari ham qabul qilinadi
+    data = request.get_json(silent=True) or request.form
+    try:
+        if 'ids' in data:
+            ids = data.getlist('ids') if hasattr(data, 'getlist') else data['ids']
+            updated = mark_notifications_read(current_user.id, ids=[int(i) for i in ids])
+        elif 'up_to_id' in data:
+            updated = mark_notifications_read(current_user.id, up_to_id=int(data['up_to_id']))
+        else:
+            return jsonify({'success': False, 'error': 'ids yoki up_to_id kerak'}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    count, last_id = unread_state(current_user.id)
+    return jsonify({'success': True, 'updated': updated, 'count': count, 'last_id': last_id})
 
 @app.route('/api/notifications/<int:id>/mark-read', methods=['POST'])
 @login_required
@@ -1490,50 +1614,59 @@ def api_mark_notification_read(id):
 
 @app.route('/api/tasks/stats')
 @login_required
+@replica_reads
 def api_tasks_stats():
-    if current_user.role in ['admin', 'rahbar']:
-        tasks = Task.query.all()
-    else:
-        user_task_ids = [ta.task_id for ta in current_user.tasks_assigned]
-        tasks = Task.query.filter(Task.id.in_(user_task_ids)).all()
+    # task_counters jadvalidan o'qiladi (statuslar soniga teng qator)
+    user_id = None if current_user.role in ['admin', 'rahbar'] else current_user.id
+    counts = get_task_status_counts(user_id)
     
     stats = {
-        'total': len(tasks),
-        'pending': len([t for t in tasks if t.status == 'pending']),
-        'in_progress': len([t for t in tasks if t.status == 'in_progress']),
-        'review': len([t for t in tasks if t.status == 'review']),
-        'completed': len([t for t in tasks if t.status == 'completed']),
-        'overdue': len([t for t in tasks if t.due_date and t.due_date < datetime.utcnow() and t.status != 'completed'])
+        'total': sum(counts.values()),
+        'pending': counts.get('pending', 0),
+        'in_progress': counts.get('in_progress', 0),
+        'review': counts.get('review', 0),
+        'completed': counts.get('completed', 0),
+        'overdue': count_overdue_tasks(user_id)
     }
     
     return jsonify(stats)
 
 @app.route('/api/dashboard/chart-data')
 @login_required
+@replica_reads
 def api_dashboard_chart_data():
     # Tasks by status
-    if current_user.role in ['admin', 'rahbar']:
-        tasks_by_status = db.session.query(
-            Task.status, 
-            func.count(Task.id)
-        ).group_by(Task.status).all()
-    else:
-        user_task_ids = [ta.task_id for ta in current_user.tasks_assigned]
-        tasks_by_status = db.session.query(
-            Task.status, 
-            func.count(Task.id)
-        ).filter(Task.id.in_(user_task_ids)).group_by(Task.status).all()
+    user_id = None if current_user.role in ['admin', 'rahbar'] else current_user.id
+    tasks_by_status = task_breakdown('status', user_id=user_id)
     
-    # Monthly tasks creation
-    monthly_tasks = db.session.query(
-        func.strftime('%Y-%m', Task.created_at).label('month'),
-        func.count(Task.id)
-    ).group_by('month').order_by('month').limit(6).all()
+    # Monthly tasks creation (oxirgi 6 oy, eskisidan yangisiga)
+    monthly_tasks = task_timeseries('month', periods=6)
     
     return jsonify({
-        'tasks_by_status': [{'status': status, 'count': count} for status, count in tasks_by_status],
-        'monthly_tasks': [{'month': month, 'count': count} for month, count in monthly_tasks]
+        'tasks_by_status': [{'status': row['key'], 'count': row['count']} for row in tasks_by_status],
+        'monthly_tasks': [{'month': row['bucket'], 'count': row['count']} for row in monthly_tasks]
     })
+
+@app.route('/api/analytics/tasks')
+@login_required
+@replica_reads
+def api_analytics_tasks():
+    """Task analytics: ?granularity=day|week|month&periods=N&breakdown=status|priority|department|assignee"""
+    granularity = request.args.get('granularity', 'month')
+    breakdown = request.args.get('breakdown') or None
+    periods = min(max(request.args.get('periods', 6, type=int), 1), 366)
+    
+    if granularity not in GRANULARITIES or (breakdown and breakdown not in BREAKDOWNS):
+        return jsonify({'error': "Noto'g'ri parametr"}), 400
+    
+    user_id = None if current_user.role in ['admin', 'rahbar'] else current_user.id
+    series = task_timeseries(granularity, periods=periods, breakdown=breakdown, user_id=user_id)
+    
+    result = {'granularity': granularity, 'periods': periods, 'series': series}
+    if breakdown:
+        result['totals'] = task_breakdown(breakdown, user_id=user_id, since=series_start(granularity, periods))
+    return jsonify(result)
+
 @app.route('/api/save_chat_id', methods=['POST'])
 def save_chat_id():
     data = request.get_json()
@@ -1554,6 +1687,35 @@ def save_chat_id():
 
     return {"success": True}, 200
 
+@app.route('/ready')
+def ready():
+    """Readiness probe: database reachability plus live pool statistics per bind."""
+    pools = {name or 'primary': pool_stats(engine) for name, engine in db.engines.items()}
+    body = {'status': 'ok', 'pools': pools}
+    primary = pools['primary']
+
+    if primary.get('saturated'):
+        # Pool to'la bo'lsa SELECT 1 ham pool_timeout gacha kutadi; band ulanishlar bazaning
+        # o'zi javob berayotganini ko'rsatadi, shuning uchun tekshiruv o'tkazib yuboriladi
+        body['status'] = 'saturated'
+        primary['saturated_for_s'] = saturated_for('primary', True)
+        fail_after = app.config.get('READY_SATURATED_FAIL_SECONDS', 0)
+        if fail_after and primary['saturated_for_s'] >= fail_after:
+            return jsonify(body), 503
+    else:
+        saturated_for('primary', False)
+        ok, latency_ms, error = check_database(db.engine)
+        body['database'] = {'ok': ok, 'latency_ms': latency_ms}
+        if not ok:
+            app.logger.warning('Readiness check failed: %s', error)
+            body['status'] = 'unavailable'
+            return jsonify(body), 503
+
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is not None:
+        health = check_replica(replica)
+        body['replica'] = {'healthy': health['healthy'], 'lag_s': health['lag']}
+    return jsonify(body)
 
 
 # ==================== ERROR HANDLERS ====================
@@ -1575,9 +1737,15 @@ def forbidden_error(error):
 
 @app.cli.command()
 def init_db():
-    """Initialize the database."""
+    """Initialize the database and upload folders."""
     with app.app_context():
         db.create_all()
+        with db.engine.begin() as connection:
+            ensure_search_index(connection)
+        # Mavjud bazada jadval endi yaratilgan bo'lsa hisoblagichlar 0 dan boshlanmasin
+        ensure_task_counters()
+        for folder in UPLOAD_FOLDERS:
+            os.makedirs(folder, exist_ok=True)
         print('Database initialized!')
 
 @app.cli.command()
@@ -1634,6 +1802,225 @@ def seed_data():
         db.session.commit()
         print('Sample data seeded!')
 
+@app.cli.command()
+@click.option('--tasks', default=10000, show_default=True, help='Yaratiladigan topshiriqlar soni.')
+@click.option('--users', default=200, show_default=True, help='Yaratiladigan xodimlar soni.')
+def seed_load(tasks, users):
+    """Seed bulk tasks, assignments and notifications for query-plan checks."""
+    import random
+    with app.app_context():
+        start = db.session.query(func.coalesce(func.max(User.id), 0)).scalar()
+        db.session.bulk_insert_mappings(User, [{
+            'full_name': f'Load Xodim {start + i}',
+            'email': f'load{start + i}@afimperiya.uz',
+            'role': 'xodim',
+            'department': random.choice(['IT', 'Moliya', 'Kadrlar', 'Xo\'jalik']),
+            'telegram_username': f'load{start + i}',
+            'is_active': True,
+        } for i in range(1, users + 1)])
+        user_ids = [uid for (uid,) in db.session.query(User.id).filter(User.role == 'xodim')]
+        creator_id = db.session.query(func.min(User.id)).scalar()
+
+        statuses = ['pending', 'in_progress', 'review', 'completed']
+        now = datetime.utcnow()
+        batch = 5000
+        for offset in range(0, tasks, batch):
+            size = min(batch, tasks - offset)
+            first_id = (db.session.query(func.max(Task.id)).scalar() or 0) + 1
+            db.session.bulk_insert_mappings(Task, [{
+                'title': f'Load topshiriq {first_id + i}',
+                'status': random.choice(statuses),
+                'priority': random.choice(['low', 'medium', 'high', 'urgent']),
+                'due_date': now + timedelta(days=random.randint(-30, 60)),
+                'created_by': creator_id,
+                'created_at': now - timedelta(days=random.randint(0, 365)),
+            } for i in range(size)])
+            db.session.bulk_insert_mappings(TaskAssignment, [{
+                'task_id': first_id + i,
+                'user_id': random.choice(user_ids),
+            } for i in range(size)])
+            db.session.bulk_insert_mappings(Notification, [{
+                'user_id': random.choice(user_ids),
+                'title': 'Yangi topshiriq',
+                'type': 'task',
+                'is_read': random.random() < 0.8,
+                'created_at': now - timedelta(days=random.randint(0, 365)),
+            } for i in range(size)])
+            db.session.commit()
+
+        # bulk insert hisoblagichlarni yangilamaydi
+        rebuild_task_counters()
+        print(f'Load data seeded: {users} users, {tasks} tasks')
+
+@app.cli.command()
+@click.option('--analyze', is_flag=True, help='Postgres: EXPLAIN ANALYZE (so\'rovni bajaradi).')
+@click.option('--user-id', type=int, help='Foydalanuvchi so\'rovlari uchun ID.')
+def explain_hot_queries(analyze, user_id):
+    """Print the query plan of each hot query."""
+    with app.app_context():
+        if user_id is None:
+            user_id = db.session.query(func.min(TaskAssignment.user_id)).scalar() or 1
+        task_id = db.session.query(func.max(Task.id)).scalar() or 1
+        print(f'Database: {db.engine.dialect.name}')
+        for name, statement in hot_queries(user_id, task_id):
+            print(f'\n=== {name} ===')
+            for line in explain(statement, analyze=analyze):
+                print('  ' + line)
+
+@app.cli.command()
+@click.option('--verify', is_flag=True, help='Faqat tekshirish, qayta qurmaslik.')
+def task_counters(verify):
+    """Rebuild or verify the task_counters table."""
+    with app.app_context():
+        if verify:
+            mismatches = verify_task_counters()
+            for key, stored, expected in mismatches:
+                print(f'{key}: stored={stored} expected={expected}')
+            print('Task counters OK!' if not mismatches else f'{len(mismatches)} mismatch(es) found')
+            if mismatches:
+                raise SystemExit(1)
+        else:
+            rows = rebuild_task_counters()
+            print(f'Task counters rebuilt ({rows} rows)')
+
+@app.cli.command()
+@click.option('--batch-size', default=100, show_default=True, help='Bir partiyadagi xabarlar soni.')
+@click.option('--interval', default=2.0, show_default=True, help='Navbat bo\'sh bo\'lganda kutish (soniya).')
+@click.option('--max-attempts', default=5, show_default=True, help='Xabar uchun maksimal urinishlar.')
+@click.option('--once', is_flag=True, help='Bitta partiyani yuborib chiqish.')
+def telegram_worker(batch_size, interval, max_attempts, once):
+    """Drain the Telegram outbox in batches with retries."""
+    if not app.config['TELEGRAM_BOT_TOKEN']:
+        print('TELEGRAM_BOT_TOKEN o\'rnatilmagan, worker ishga tushmadi.')
+        return
+
+    print('Telegram outbox worker ishga tushdi...')
+    last_purge = 0
+    while True:
+        try:
+            result = drain_outbox(batch_size=batch_size, max_attempts=max_attempts)
+        except Exception as e:
+            db.session.rollback()
+            print("Telegram outbox error:", e)
+            result = {}
+        if any(result.values()):
+            print('Outbox:', result, 'Telegram:', get_telegram_client().stats())
+        if once:
+            break
+
+        if time.monotonic() - last_purge > 3600:
+            purge_outbox()
+            last_purge = time.monotonic()
+
+        # Partiya to'la bo'lsa darhol davom etamiz
+        if sum(result.values()) < batch_size:
+            time.sleep(interval)
+        db.session.remove()
+
+@app.cli.command('replica-status')
+def replica_status():
+    """Show whether the read replica is configured, reachable and within the lag limit."""
+    engine = db.engines.get(REPLICA_BIND)
+    if engine is None:
+        print('DATABASE_REPLICA_URL o\'rnatilmagan, barcha so\'rovlar asosiy bazada.')
+        return
+    health = check_replica(engine, force=True)
+    lag = f"{health['lag']:.1f}s" if health['lag'] is not None else '-'
+    print(f"Replica: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Healthy: {health['healthy']}  lag: {lag}  max: {app.config['REPLICA_MAX_LAG_SECONDS']}s"
+          + (f"  ({health['error']})" if health['error'] else ''))
+
+@app.cli.command('search-index')
+@click.option('--rebuild', is_flag=True, help='SQLite: indeksni manba jadvallardan qayta to\'ldirish.')
+def search_index_command(rebuild):
+    """Create the full-text search index (and optionally rebuild it)."""
+    with db.engine.begin() as connection:
+        created = ensure_search_index(connection)
+        if rebuild and not created:
+            print(f'Rebuilt: {rebuild_search_index(connection)} rows')
+    print(f'Search index ready ({db.engine.dialect.name})' + (', backfilled' if created else ''))
+
+@app.cli.command('sqlite-maintenance')
+@click.option('--checkpoint', default='TRUNCATE', show_default=True,
+              type=click.Choice(['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE']), help='WAL checkpoint rejimi.')
+def sqlite_maintenance(checkpoint):
+    """Run PRAGMA optimize and a WAL checkpoint on the SQLite database(s)."""
+    engines = {key or 'primary': engine for key, engine in db.engines.items() if engine.dialect.name == 'sqlite'}
+    if not engines:
+        print('SQLite ishlatilmayapti, hech narsa qilinmadi.')
+        return
+    for name, engine in engines.items():
+        busy, wal_pages, checkpointed = run_maintenance(engine, checkpoint)
+        print(f'{name}: {sqlite_pragmas(engine)}')
+        print(f'  checkpoint {checkpoint}: busy={busy} wal_pages={wal_pages} checkpointed={checkpointed}')
+
+@app.cli.command('set-webhook')
+@click.option('--url', default=None, help='Webhook URL (standart: SERVER_URL/telegram-webhook).')
+@click.option('--strict', is_flag=True, help='Xato bo\'lsa nol bo\'lmagan kod bilan chiqish.')
+def set_webhook_command(url, strict):
+    """Register the Telegram webhook (run once per deploy)."""
+    if not app.config['TELEGRAM_BOT_TOKEN'] or not (url or app.config['SERVER_URL']):
+        print('TELEGRAM_BOT_TOKEN yoki SERVER_URL o\'rnatilmagan, webhook o\'rnatilmadi.')
+        return
+    resp = set_webhook(url)
+    print('Webhook response:', resp)
+    if resp is None and strict:
+        raise SystemExit(1)
+
+@app.cli.command('startup-benchmark')
+@click.option('--runs', default=5, show_default=True, help='Necha marta yangi jarayonda o\'lchash.')
+@click.option('--top', default=10, show_default=True, help='Eng og\'ir importlar soni.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Natijani JSON faylga yozish.')
+def startup_benchmark(runs, top, output):
+    """Measure import and boot time of the app in fresh interpreters."""
+    from services.startup_bench import measure_startup
+    result = measure_startup(runs=runs, top=top)
+    for name in ('import_ms', 'boot_ms'):
+        stats = result[name]
+        print(f"{name}: median={stats['median']:.0f} min={stats['min']:.0f} max={stats['max']:.0f}")
+    print('Heaviest imports (cumulative ms):')
+    for module, ms in result['heaviest_imports']:
+        print(f'  {ms:8.1f}  {module}')
+    if output:
+        with open(output, 'w') as fileobj:
+            json.dump(result, fileobj, indent=2)
+
+@app.cli.command()
+@click.option('--run-pending', is_flag=True, help='Kutilayotgan vazifalarni shu jarayonda bajarish.')
+@click.option('--purge-hours', default=24, show_default=True, help='Shundan eski vazifa va fayllarni o\'chirish.')
+def export_jobs(run_pending, purge_hours):
+    """Render leftover export jobs, fail stuck ones and purge old ones."""
+    if run_pending:
+        print(f'Export jobs rendered: {run_pending_jobs()}')
+    print(f'Export jobs expired: {expire_stale_jobs()}')
+    print(f'Export jobs purged: {purge_export_jobs(purge_hours)}')
+
+@app.cli.command('stream-events')
+@click.option('--purge-hours', type=float, default=None, help='Shundan eski hodisalarni o\'chirish (standart: SSE_RETENTION_HOURS).')
+def stream_events(purge_hours):
+    """Purge old SSE stream events."""
+    hours = app.config['SSE_RETENTION_HOURS'] if purge_hours is None else purge_hours
+    print(f'Stream events purged: {purge_stream_events(hours)}')
+
+@app.cli.command('import-data')
+@click.argument('name', type=click.Choice(sorted(IMPORTS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', default=1, show_default=True, help='created_by sifatida yoziladigan foydalanuvchi.')
+@click.option('--dry-run', is_flag=True, help='Faqat tekshirish, bazaga yozmaslik.')
+@click.option('--all-or-nothing', is_flag=True, help='Bitta xato bo\'lsa ham hech narsa yozilmaydi.')
+def import_data(name, path, user_id, dry_run, all_or_nothing):
+    """Bulk-import an xlsx/csv file into vehicles, contracts, guests or users."""
+    started = time.perf_counter()
+    with open(path, 'rb') as fileobj:
+        result = run_import(IMPORTS[name], read_rows(fileobj, path), user_id,
+                            dry_run=dry_run, all_or_nothing=all_or_nothing)
+    for item in result.errors[:50]:
+        print(f"  qator {item['row']}: {'; '.join(item['errors'])}")
+    if len(result.errors) > 50:
+        print(f'  ... va yana {len(result.errors) - 50} ta xato qator')
+    print(f'Jami: {result.total}, qo\'shildi: {result.inserted}, o\'tkazildi: {result.skipped} '
+          f'({time.perf_counter() - started:.1f}s)')
+
 # ==================== TELEGRAM BOT ====================
 
 @app.route('/telegram-webhook', methods=['POST'])
@@ -1684,13 +2071,15 @@ def telegram_webhook():
                     "<code>/start user@gmail.com</code>"
                 )
 
-            # xabarni yuboramiz
-            send_push(chat_id, msg)
+            # xabarni outbox'ga qo'yamiz
+            enqueue_push(msg, chat_id=chat_id)
+            db.session.commit()
             return jsonify({'ok': True})
 
         # boshqa komandalar
         else:
-            send_push(chat_id, "ℹ Buyruq tanilmadi.")
+            enqueue_push("ℹ Buyruq tanilmadi.", chat_id=chat_id)
+            db.session.commit()
             return jsonify({'ok': True})
 
     except Exception as e:
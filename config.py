@@ -1,6 +1,25 @@
 import os
 
 
+def _engine_options(url):
+    """Pool settings from the environment. Pool size follows the worker thread count
+    (gunicorn.conf.py sets it); pre_ping and recycle replace connections that died while idle."""
+    if url.startswith("sqlite"):
+        return {}
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+    # Bitta so'rov uchun vaqt chegarasi (ms, 0 = cheklanmagan). Faqat Postgres.
+    statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout_ms and url.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
 class Config:
     """Railway-ready configuration for AF Imperiya app."""
 
@@ -25,6 +44,55 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Ixtiyoriy o'qish replikasi: @replica_reads endpointlari SELECT'larni shu yerga yuboradi
+    _replica_url = os.getenv("DATABASE_REPLICA_URL", "").strip().replace("postgres://", "postgresql://", 1)
+    if _replica_url:
+        SQLALCHEMY_BINDS = {"replica": {"url": _replica_url, **_engine_options(_replica_url)}}
+        # Lag tekshiruvi foydalanuvchi so'rovi ichida ishlaydi: javob bermayotgan replika uni uzoq ushlamasin
+        if _replica_url.startswith("postgresql"):
+            SQLALCHEMY_BINDS["replica"]["connect_args"] = {
+                **SQLALCHEMY_BINDS["replica"].get("connect_args", {}),
+                "connect_timeout": int(os.getenv("REPLICA_CONNECT_TIMEOUT", "3")),
+            }
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+    # Yozgan foydalanuvchi shuncha vaqt asosiy bazadan o'qiydi (o'z yozganini ko'rish)
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+    # Ulanishlar pooli (asosiy baza va replika uchun bir xil)
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # /ready pool shuncha soniya uzluksiz to'la bo'lsa 503 qaytaradi (0 = faqat hisobot, 200)
+    READY_SATURATED_FAIL_SECONDS = float(os.getenv("READY_SATURATED_FAIL_SECONDS", "0"))
+
+    # SQLite rejimi (lokal/filial bazasi): WAL va PRAGMA sozlamalari, services/sqlite_tuning.py
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "20000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "true").lower() == "true"
+    # PRAGMA optimize + WAL checkpoint oralig'i (soniya, 0 = o'chiq)
+    SQLITE_OPTIMIZE_INTERVAL = float(os.getenv("SQLITE_OPTIMIZE_INTERVAL", "3600"))
+
+    # Real vaqtdagi bildirishnomalar (SSE), services/event_stream.py
+    SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "1"))
+    SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+    # Bitta ulanishning maksimal davomiyligi (soniya), keyin brauzer qayta ulanadi
+    SSE_MAX_DURATION = float(os.getenv("SSE_MAX_DURATION", "600"))
+    # Har bir worker jarayonida ochiq oqimlar chegarasi (0 = o'chiq, faqat so'rash).
+    # gunicorn.conf.py gevent profilida worker_connections/2 qo'yadi
+    SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "0"))
+    SSE_BACKLOG = int(os.getenv("SSE_BACKLOG", "100"))
+    SSE_RETENTION_HOURS = float(os.getenv("SSE_RETENTION_HOURS", "24"))
+
+    # N+1 detektor (debug rejimida har doim yoqiladi)
+    NPLUSONE_DETECT = os.getenv("NPLUSONE_DETECT", "false").lower() == "true"
+    NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+    NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", "false").lower() == "true"
+
+    # Har bir so'rov uchun SQL statistikasi va sekin so'rovlar logi
+    SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "true").lower() == "true"
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SQL_STATS_TOP = int(os.getenv("SQL_STATS_TOP", "5"))
+
     # =========================
     # Telegram
     # =========================
@@ -0,0 +1,120 @@
+"""
+Gunicorn sozlamalari (Procfile / render.yaml shu faylni ishlatadi).
+
+Ikki profil, GUNICORN_PROFILE bilan tanlanadi:
+
+* gevent (Postgres bilan standart): har bir worker'da ko'plab greenlet.
+  Uzoq ochiq ulanishlar (SSE bildirishnomalar oqimi) va tashqi I/O
+  worker'ni band qilmaydi. gevent va psycogreen requirements.txt da.
+* gthread (SQLite bilan standart): har bir worker'da GUNICORN_THREADS oqim.
+  CPU og'ir sinxron eksportlar boshqa so'rovlarni to'xtatmaydi, lekin har
+  bir ochiq SSE oqimi bitta thread'ni band qiladi, shuning uchun u yerda SSE o'chiq.
+
+sqlite3 drayveri gevent bilan hamkorlik qilmaydi: qulf kutish (busy_timeout)
+butun worker'ni to'xtatadi, shuning uchun gevent + SQLite rad etiladi.
+
+Worker soni CPU dan hisoblanadi (WEB_CONCURRENCY bilan o'zgartiriladi).
+SQLAlchemy pool hajmi bitta worker bir vaqtda ishlatishi mumkin bo'lgan
+ulanishlar soniga mos qilib DB_POOL_SIZE / DB_MAX_OVERFLOW orqali beriladi.
+Umumiy ulanishlar: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) < Postgres max_connections.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# config.py bilan bir xil: DATABASE_URL bo'lmasa lokal SQLite fayli ishlatiladi
+_database_url = os.getenv('DATABASE_URL', '').strip()
+_sqlite = not _database_url or _database_url.startswith('sqlite')
+
+profile = os.getenv('GUNICORN_PROFILE', 'gthread' if _sqlite else 'gevent')
+if profile not in ('gthread', 'gevent'):
+    raise RuntimeError(f'Unknown GUNICORN_PROFILE: {profile} (gthread or gevent)')
+if profile == 'gevent' and _sqlite:
+    raise RuntimeError('GUNICORN_PROFILE=gevent needs Postgres (sqlite3 blocks the event loop); '
+                       'set DATABASE_URL or use GUNICORN_PROFILE=gthread')
+
+cpu_count = multiprocessing.cpu_count()
+
+if profile == 'gevent':
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise RuntimeError('GUNICORN_PROFILE=gevent requires gevent (pip install -r requirements.txt) or use GUNICORN_PROFILE=gthread')
+    # preload_app bilan ilova master'da import qilinadi, shuning uchun patch undan oldin
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+    worker_class = 'gevent'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count + 1))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+    # Greenlet'lar ko'p, ulanishlar esa cheklangan: qolganlari pool_timeout gacha navbatda kutadi
+    pool_size = int(os.getenv('DB_POOL_SIZE', '10'))
+    # SSE oqimi bitta greenlet, bazaga ulanish ushlamaydi; yarmi oddiy so'rovlarga qoladi
+    os.environ.setdefault('SSE_MAX_CONNECTIONS', str(worker_connections // 2))
+else:
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+    # Har bir oqim bir vaqtda bitta sessiya ulanishini ushlaydi
+    pool_size = int(os.getenv('DB_POOL_SIZE', threads))
+    # Ochiq SSE oqimi butun bir thread'ni band qiladi: sukut bo'yicha o'chiq,
+    # sahifa /api/notifications ni ETag bilan so'raydi
+    os.environ.setdefault('SSE_MAX_CONNECTIONS', '0')
+
+# config.py shu qiymatlarni o'qiydi (ilova pastda preload qilinadi)
+os.environ['DB_POOL_SIZE'] = str(pool_size)
+# Oqimli eksport (engine.connect) sessiyadan tashqari yana bitta ulanish oladi
+os.environ.setdefault('DB_MAX_OVERFLOW', str(pool_size))
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Ilova bir marta master'da yuklanadi, worker'lar fork bilan tez ko'tariladi
+preload_app = True
+
+# Xotira sizib chiqmasligi uchun worker'lar navbatma-navbat (bir vaqtda emas) qayta ishga tushadi
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# Sinxron eksportlar (xlsx/pdf, katta jadvallarda o'nlab soniya) shu vaqtga sig'ishi kerak;
+# og'irlari fon vazifalariga (/export/jobs) o'tadi. gevent'da CPU band qiluvchi PDF
+# heartbeat'ni ham to'xtatadi, shu sabab qiymat eksportning eng uzun vaqtidan katta.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Heartbeat fayli diskda emas, xotirada (konteynerlarda sekin disk worker'ni "o'ldirmasin")
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Bir nechta worker: /metrics barcha worker'lar qiymatini jamlashi uchun
+if workers > 1:
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'af-imperiya-prometheus'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+
+
+def on_starting(server):
+    # Oldingi ishga tushishdan qolgan metrika fayllari tozalanadi (reload'da emas)
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # Master'dan meros qolgan ulanishlar worker'da ishlatilmasin (socket ikki jarayonda bo'lmasin)
+    from app import app
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from services.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
@@ -1,6 +1,11 @@
 from app import db, app
 from models import *
+from services.search import ensure_search_index
+from services.task_counters import ensure_task_counters
 
 with app.app_context():
     db.create_all()
+    with db.engine.begin() as connection:
+        ensure_search_index(connection)
+    ensure_task_counters()
     print(">>> DATABASE CREATED SUCCESSFULLY <<<")
@@ -0,0 +1,66 @@
+"""hot path indexes
+
+Revision ID: 0001_hot_path_indexes
+Revises:
+Create Date: 2026-10-18 09:10:17.265421
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_hot_path_indexes'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (jadval, index nomi, ustunlar) - models.py dagi index=True / db.Index bilan bir xil
+INDEXES = [
+    ('task_assignments', 'ix_task_assignments_user_id', ['user_id']),
+    ('task_assignments', 'ix_task_assignments_task_id', ['task_id']),
+    ('tasks', 'ix_tasks_status', ['status']),
+    ('tasks', 'ix_tasks_due_date', ['due_date']),
+    ('tasks', 'ix_tasks_created_at', ['created_at']),
+    ('task_comments', 'ix_task_comments_task_id', ['task_id']),
+    ('task_attachments', 'ix_task_attachments_task_id', ['task_id']),
+    ('notifications', 'ix_notifications_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at']),
+    ('activity_logs', 'ix_activity_logs_created_at', ['created_at']),
+    ('users', 'ix_users_telegram_username', ['telegram_username']),
+    ('users', 'ix_users_role', ['role']),
+    ('user_modules', 'ix_user_modules_user_id_module_name', ['user_id', 'module_name']),
+    ('vehicle_documents', 'ix_vehicle_documents_vehicle_id', ['vehicle_id']),
+    ('building_documents', 'ix_building_documents_building_id', ['building_id']),
+    ('outsourcing_documents', 'ix_outsourcing_documents_service_id', ['service_id']),
+    ('contract_documents', 'ix_contract_documents_contract_id', ['contract_id']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # init_db.py (db.create_all) bilan yaratilgan bazada indekslar allaqachon bo'lishi mumkin
+    bind = op.get_bind()
+    concurrently = bind.dialect.name == 'postgresql'
+    pending = [(t, n, c) for t, n, c in INDEXES if n not in _existing_indexes(t)]
+    if not pending:
+        return
+
+    if concurrently:
+        # Katta jadvallarni yozishga bloklamaslik uchun CONCURRENTLY (tranzaksiyadan tashqarida)
+        with op.get_context().autocommit_block():
+            for table, name, columns in pending:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+    else:
+        for table, name, columns in pending:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
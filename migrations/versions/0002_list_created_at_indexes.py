@@ -0,0 +1,56 @@
+"""list view created_at indexes
+
+Revision ID: 0002_list_created_at_indexes
+Revises: 0001_hot_path_indexes
+Create Date: 2026-10-18 10:02:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_list_created_at_indexes'
+down_revision = '0001_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Keyset pagination (created_at, id) bo'yicha tartiblaydi
+INDEXES = [
+    ('users', 'ix_users_created_at', ['created_at']),
+    ('vehicles', 'ix_vehicles_created_at', ['created_at']),
+    ('buildings', 'ix_buildings_created_at', ['created_at']),
+    ('green_spaces', 'ix_green_spaces_created_at', ['created_at']),
+    ('solar_panels', 'ix_solar_panels_created_at', ['created_at']),
+    ('outsourcing_services', 'ix_outsourcing_services_created_at', ['created_at']),
+    ('organizations', 'ix_organizations_created_at', ['created_at']),
+    ('guests', 'ix_guests_created_at', ['created_at']),
+    ('contracts', 'ix_contracts_created_at', ['created_at']),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    pending = [(t, n, c) for t, n, c in INDEXES if n not in _existing_indexes(t)]
+    if not pending:
+        return
+
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table, name, columns in pending:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+    else:
+        for table, name, columns in pending:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
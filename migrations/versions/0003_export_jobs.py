@@ -0,0 +1,47 @@
+"""export jobs table
+
+Revision ID: 0003_export_jobs
+Revises: 0002_list_created_at_indexes
+Create Date: 2026-10-18 11:40:12.504817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_export_jobs'
+down_revision = '0002_list_created_at_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db.py (db.create_all) jadvalni allaqachon yaratgan bo'lishi mumkin
+    if sa.inspect(op.get_bind()).has_table('export_jobs'):
+        return
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('report', sa.String(length=50), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('filename', sa.String(length=300), nullable=True),
+        sa.Column('filepath', sa.String(length=500), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_export_jobs_user_id', 'export_jobs', ['user_id'], unique=False)
+    op.create_index('ix_export_jobs_created_at', 'export_jobs', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_export_jobs_created_at', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_user_id', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,32 @@
+"""data versions table
+
+Revision ID: 0004_data_versions
+Revises: 0003_export_jobs
+Create Date: 2026-10-18 12:25:40.318062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_data_versions'
+down_revision = '0003_export_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db.py (db.create_all) jadvalni allaqachon yaratgan bo'lishi mumkin
+    if sa.inspect(op.get_bind()).has_table('data_versions'):
+        return
+    op.create_table(
+        'data_versions',
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
@@ -0,0 +1,94 @@
+"""full-text search index
+
+Revision ID: 0005_search_index
+Revises: 0004_data_versions
+Create Date: 2026-10-18 15:10:12.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_search_index'
+down_revision = '0004_data_versions'
+branch_labels = None
+depends_on = None
+
+# Shu revizya vaqtidagi holat (services/search.py keyinchalik o'zgarsa ham migratsiya o'zgarmaydi).
+# (kod, jadval, sarlavha ustunlari, matn ustunlari); FTS rowid = id * 8 + kod
+SOURCES = [
+    (1, 'tasks', ('title',), ('description',)),
+    (2, 'task_comments', (), ('comment',)),
+    (3, 'contracts', ('contract_number', 'company_name'), ('description',)),
+    (4, 'guests', ('full_name', 'organization'), ()),
+    (5, 'organizations', ('name',), ()),
+    (6, 'buildings', ('name',), ('address',)),
+    (7, 'outsourcing_services', ('service_name', 'provider_name'), ()),
+]
+
+
+def _concat(columns, prefix):
+    if not columns:
+        return "''"
+    return " || ' - ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+
+
+def _sqlite_upgrade(bind):
+    # init-db (ensure_search_index) indeksni allaqachon yaratgan va to'ldirgan bo'lishi mumkin
+    created = not bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")).first()
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+               "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')")
+    for code, table, title_columns, body_columns in SOURCES:
+        insert = (f"INSERT INTO search_index(rowid, title, body) VALUES (new.id * 8 + {code}, "
+                  f"{_concat(title_columns, 'new.')}, {_concat(body_columns, 'new.')});")
+        delete = f"DELETE FROM search_index WHERE rowid = old.id * 8 + {code};"
+        columns = ', '.join(title_columns + body_columns)
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} "
+                   f"BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF id, {columns} ON {table} "
+                   f"BEGIN {delete} {insert} END")
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} "
+                   f"BEGIN {delete} END")
+        if created:
+            # Mavjud qatorlar
+            op.execute(f"INSERT INTO search_index(rowid, title, body) SELECT id * 8 + {code}, "
+                       f"{_concat(title_columns, '')}, {_concat(body_columns, '')} FROM {table}")
+    if created:
+        op.execute("INSERT INTO search_index(search_index) VALUES ('optimize')")
+
+
+def _postgres_upgrade():
+    for code, table, title_columns, body_columns in SOURCES:
+        parts = []
+        if title_columns:
+            parts.append(f"setweight(to_tsvector('simple', {_concat(title_columns, '')}), 'A')")
+        if body_columns:
+            parts.append(f"setweight(to_tsvector('simple', {_concat(body_columns, '')}), 'B')")
+        # Generated ustun qo'shilganda mavjud qatorlar ham hisoblanadi
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                   f"GENERATED ALWAYS AS ({' || '.join(parts)}) STORED")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def upgrade():
+    # SQLite: FTS5 jadvali + triggerlar (mavjud qatorlar bilan to'ldiriladi);
+    # Postgres: generated tsvector ustunlari + GIN indekslar. Ikkalasi ham idempotent.
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        _sqlite_upgrade(bind)
+    elif bind.dialect.name == 'postgresql':
+        _postgres_upgrade()
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for _, table, _, _ in SOURCES:
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_search_{suffix}')
+        elif dialect == 'postgresql':
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_search_vector')
+            op.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_index')
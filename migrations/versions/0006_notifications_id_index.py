@@ -0,0 +1,40 @@
+"""notifications (user_id, is_read, id) index
+
+Revision ID: 0006_notifications_id_index
+Revises: 0005_search_index
+Create Date: 2026-10-18 16:02:37.815204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_notifications_id_index'
+down_revision = '0005_search_index'
+branch_labels = None
+depends_on = None
+
+NAME = 'ix_notifications_user_id_is_read_id'
+
+
+def _exists():
+    inspector = sa.inspect(op.get_bind())
+    return NAME in {index['name'] for index in inspector.get_indexes('notifications')}
+
+
+def upgrade():
+    # init_db.py (db.create_all) indeksni allaqachon yaratgan bo'lishi mumkin
+    if _exists():
+        return
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(NAME, 'notifications', ['user_id', 'is_read', 'id'], unique=False,
+                            postgresql_concurrently=True)
+    else:
+        op.create_index(NAME, 'notifications', ['user_id', 'is_read', 'id'], unique=False)
+
+
+def downgrade():
+    if _exists():
+        op.drop_index(NAME, table_name='notifications')
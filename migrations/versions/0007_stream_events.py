@@ -0,0 +1,40 @@
+"""stream events table
+
+Revision ID: 0007_stream_events
+Revises: 0006_notifications_id_index
+Create Date: 2026-10-18 17:20:51.603318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_stream_events'
+down_revision = '0006_notifications_id_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db.py (db.create_all) jadvalni allaqachon yaratgan bo'lishi mumkin
+    if sa.inspect(op.get_bind()).has_table('stream_events'):
+        return
+    op.create_table(
+        'stream_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=50), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stream_events_created_at', 'stream_events', ['created_at'], unique=False)
+    op.create_index('ix_stream_events_user_id_id', 'stream_events', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stream_events_user_id_id', table_name='stream_events')
+    op.drop_index('ix_stream_events_created_at', table_name='stream_events')
+    op.drop_table('stream_events')
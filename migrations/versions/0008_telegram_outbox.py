@@ -0,0 +1,45 @@
+"""telegram outbox table
+
+Revision ID: 0008_telegram_outbox
+Revises: 0007_stream_events
+Create Date: 2026-10-18 18:05:12.281407
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_telegram_outbox'
+down_revision = '0007_stream_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # init_db.py (db.create_all) jadvalni allaqachon yaratgan bo'lishi mumkin
+    if sa.inspect(op.get_bind()).has_table('telegram_outbox'):
+        return
+    op.create_table(
+        'telegram_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('chat_id', sa.String(length=100), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_telegram_outbox_status_next_attempt', 'telegram_outbox',
+                    ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_telegram_outbox_status_next_attempt', table_name='telegram_outbox')
+    op.drop_table('telegram_outbox')
@@ -0,0 +1,51 @@
+"""task counters table
+
+Revision ID: 0009_task_counters
+Revises: 0008_telegram_outbox
+Create Date: 2026-10-18 18:20:44.107352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_task_counters'
+down_revision = '0008_telegram_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # init_db.py (db.create_all) jadvalni allaqachon (bo'sh holda) yaratgan bo'lishi mumkin
+    if not sa.inspect(bind).has_table('task_counters'):
+        op.create_table(
+            'task_counters',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('scope', sa.String(length=20), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=50), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('scope', 'user_id', 'status', name='uq_task_counters_scope_user_status'),
+        )
+    if bind.execute(sa.text('SELECT COUNT(*) FROM task_counters')).scalar():
+        return
+
+    # `flask task-counters` (rebuild_task_counters) bilan bir xil GROUP BY
+    op.execute(
+        "INSERT INTO task_counters (scope, user_id, status, count) "
+        "SELECT 'all', 0, COALESCE(status, ''), COUNT(id) FROM tasks "
+        "GROUP BY COALESCE(status, '')"
+    )
+    op.execute(
+        "INSERT INTO task_counters (scope, user_id, status, count) "
+        "SELECT 'user', task_assignments.user_id, COALESCE(tasks.status, ''), COUNT(task_assignments.id) "
+        "FROM task_assignments JOIN tasks ON tasks.id = task_assignments.task_id "
+        "GROUP BY task_assignments.user_id, COALESCE(tasks.status, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('task_counters')
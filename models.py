@@ -3,7 +3,9 @@ from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from services.replica import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # User Model
 class User(UserMixin, db.Model):
@@ -12,16 +14,16 @@ class User(UserMixin, db.Model):
     full_name = db.Column(db.String(200), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(200))
-    telegram_username = db.Column(db.String(100))
+    telegram_username = db.Column(db.String(100), index=True)
     telegram_chat_id = db.Column(db.String(100))
-    role = db.Column(db.String(50), default='user')  # admin, rahbar, xodim, user
+    role = db.Column(db.String(50), default='user', index=True)  # admin, rahbar, xodim, user
     department = db.Column(db.String(100))
     position = db.Column(db.String(100))
     phone = db.Column(db.String(50))
     bio = db.Column(db.Text)
     photo = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
     assigned_modules = db.relationship('UserModule', foreign_keys='UserModule.user_id', backref='user', lazy=True)
@@ -32,6 +34,9 @@ class User(UserMixin, db.Model):
         self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
+        # Import qilingan, hali parol berilmagan xodim
+        if not self.password_hash:
+            return False
         return check_password_hash(self.password_hash, password)
     
     def has_module_access(self, module_name):
@@ -50,6 +55,10 @@ class UserModule(db.Model):
     
     assigner = db.relationship('User', foreign_keys=[assigned_by], backref='modules_assigned')
 
+    __table_args__ = (
+        db.Index('ix_user_modules_user_id_module_name', 'user_id', 'module_name'),
+    )
+
 # 1. Topshriqlar Module
 class Task(db.Model):
     __tablename__ = 'tasks'
@@ -57,12 +66,13 @@ class Task(db.Model):
     title = db.Column(db.String(300), nullable=False)
     description = db.Column(db.Text)
     priority = db.Column(db.String(50), default='medium')  # low, medium, high, urgent
-    status = db.Column(db.String(50), default='pending')  # pending, in_progress, review, completed, overdue
+    # active_history: task_counters eski statusni bilishi uchun
+    status = db.column_property(db.Column(db.String(50), default='pending', index=True), active_history=True)  # pending, in_progress, review, completed, overdue
     start_date = db.Column(db.DateTime)
-    due_date = db.Column(db.DateTime)
+    due_date = db.Column(db.DateTime, index=True)
     completion_date = db.Column(db.DateTime)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -73,8 +83,8 @@ class Task(db.Model):
 class TaskAssignment(db.Model):
     __tablename__ = 'task_assignments'
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
     assigned_by = db.Column(db.Integer, db.ForeignKey('users.id'))
     approved_by_rahbar = db.Column(db.Boolean, default=False)
@@ -84,7 +94,7 @@ class TaskAssignment(db.Model):
 class TaskComment(db.Model):
     __tablename__ = 'task_comments'
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     comment = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -94,7 +104,7 @@ class TaskComment(db.Model):
 class TaskAttachment(db.Model):
     __tablename__ = 'task_attachments'
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, index=True)
     filename = db.Column(db.String(300), nullable=False)
     filepath = db.Column(db.String(500), nullable=False)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -117,7 +127,7 @@ class Vehicle(db.Model):
     defects = db.Column(db.Text)
     notes = db.Column(db.Text)
     photo = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     driver = db.relationship('User', backref='vehicles')
     documents = db.relationship('VehicleDocument', backref='vehicle', lazy=True, cascade='all, delete-orphan')
@@ -125,7 +135,7 @@ class Vehicle(db.Model):
 class VehicleDocument(db.Model):
     __tablename__ = 'vehicle_documents'
     id = db.Column(db.Integer, primary_key=True)
-    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), nullable=False)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicles.id'), nullable=False, index=True)
     document_type = db.Column(db.String(100))  # tech_passport, insurance, etc
     filename = db.Column(db.String(300))
     filepath = db.Column(db.String(500))
@@ -159,7 +169,7 @@ class Building(db.Model):
     description = db.Column(db.Text)
     photo = db.Column(db.String(200))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     category = db.relationship('BuildingCategory', backref='buildings')
     documents = db.relationship('BuildingDocument', backref='building', lazy=True, cascade='all, delete-orphan')
@@ -167,7 +177,7 @@ class Building(db.Model):
 class BuildingDocument(db.Model):
     __tablename__ = 'building_documents'
     id = db.Column(db.Integer, primary_key=True)
-    building_id = db.Column(db.Integer, db.ForeignKey('buildings.id'), nullable=False)
+    building_id = db.Column(db.Integer, db.ForeignKey('buildings.id'), nullable=False, index=True)
     filename = db.Column(db.String(300))
     filepath = db.Column(db.String(500))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -195,7 +205,7 @@ class GreenSpace(db.Model):
     description = db.Column(db.Text)
     photo = db.Column(db.String(200))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     category = db.relationship('GreenSpaceCategory', backref='green_spaces')
 
@@ -214,7 +224,7 @@ class SolarPanel(db.Model):
     monitoring_url = db.Column(db.String(500))
     notes = db.Column(db.Text)
     photo = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     building = db.relationship('Building', backref='solar_panels')
 
@@ -239,14 +249,14 @@ class OutsourcingService(db.Model):
     contact_phone = db.Column(db.String(50))
     notes = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     documents = db.relationship('OutsourcingDocument', backref='service', lazy=True, cascade='all, delete-orphan')
 
 class OutsourcingDocument(db.Model):
     __tablename__ = 'outsourcing_documents'
     id = db.Column(db.Integer, primary_key=True)
-    service_id = db.Column(db.Integer, db.ForeignKey('outsourcing_services.id'), nullable=False)
+    service_id = db.Column(db.Integer, db.ForeignKey('outsourcing_services.id'), nullable=False, index=True)
     filename = db.Column(db.String(300))
     filepath = db.Column(db.String(500))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -267,7 +277,7 @@ class Organization(db.Model):
     vehicles = db.Column(db.Text)
     established_date = db.Column(db.DateTime)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 # 11. Mehmonlar Module
 class Guest(db.Model):
@@ -288,7 +298,7 @@ class Guest(db.Model):
     notes = db.Column(db.Text)
     photo = db.Column(db.String(200))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 # 12. Tabriknomalar Module
 class Celebration(db.Model):
@@ -321,14 +331,14 @@ class Contract(db.Model):
     description = db.Column(db.Text)
     notes = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     documents = db.relationship('ContractDocument', backref='contract', lazy=True, cascade='all, delete-orphan')
 
 class ContractDocument(db.Model):
     __tablename__ = 'contract_documents'
     id = db.Column(db.Integer, primary_key=True)
-    contract_id = db.Column(db.Integer, db.ForeignKey('contracts.id'), nullable=False)
+    contract_id = db.Column(db.Integer, db.ForeignKey('contracts.id'), nullable=False, index=True)
     filename = db.Column(db.String(300))
     filepath = db.Column(db.String(500))
     document_type = db.Column(db.String(50))  # pdf, excel, word
@@ -348,6 +358,12 @@ class Notification(db.Model):
     
     user = db.relationship('User', backref='notifications')
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        # /api/notifications: o'qilmaganlar soni, max(id) va since_id bo'yicha sahifa
+        db.Index('ix_notifications_user_id_is_read_id', 'user_id', 'is_read', 'id'),
+    )
+
 # User Activity Log
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
@@ -357,6 +373,75 @@ class ActivityLog(db.Model):
     module = db.Column(db.String(100))
     details = db.Column(db.Text)
     ip_address = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     user = db.relationship('User', backref='activity_logs')
+
+# Telegram Outbox (push xabarlar navbati)
+class TelegramOutbox(db.Model):
+    __tablename__ = 'telegram_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    chat_id = db.Column(db.String(100))  # user_id bo'lmasa to'g'ridan-to'g'ri chat
+    text = db.Column(db.Text, nullable=False)
+    parse_mode = db.Column(db.String(20))
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed, skipped
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_telegram_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+# Topshiriqlar hisoblagichi: (scope, user_id, status) -> count
+# scope='all' (user_id=0) barcha topshiriqlar, scope='user' biriktirilganlar
+class TaskCounter(db.Model):
+    __tablename__ = 'task_counters'
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'user_id', 'status', name='uq_task_counters_scope_user_status'),
+    )
+
+# Fon rejimida tayyorlanadigan eksport (hisobot) vazifalari
+class ExportJob(db.Model):
+    __tablename__ = 'export_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    report = db.Column(db.String(50), nullable=False)
+    format = db.Column(db.String(10), nullable=False)  # xlsx, pdf
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), default='pending')  # pending, running, done, failed
+    filename = db.Column(db.String(300))
+    filepath = db.Column(db.String(500))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+# Jadval ma'lumotlari versiyasi: ORM orqali har o'zgarishda oshiriladi (eksport keshi uchun)
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# Brauzerga SSE orqali yuboriladigan hodisalar (/api/notifications/stream).
+# Har bir qabul qiluvchi uchun alohida qator; id Last-Event-ID sifatida ishlatiladi
+class StreamEvent(db.Model):
+    __tablename__ = 'stream_events'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    event = db.Column(db.String(50), nullable=False)  # notification, task_status, task_comment
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.Index('ix_stream_events_user_id_id', 'user_id', 'id'),
+    )
@@ -0,0 +1,158 @@
+"""
+Topshiriqlar analitikasi: vaqt bo'yicha guruhlash va kesimlar.
+
+Barcha agregatsiya SQL'da bajariladi. Vaqt oraliqlari (bucket) baza dialektiga
+mos ifoda bilan hisoblanadi: Postgres'da `date_trunc`, SQLite'da `strftime`/`date`.
+Haftalar dushanbadan boshlanadi (ISO), ikkala bazada ham bir xil.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, literal_column, select
+
+from models import db, Task, TaskAssignment, User
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# kesim nomi -> guruhlash ustuni (department/assignee uchun JOIN qo'shiladi)
+BREAKDOWNS = {
+    'status': Task.status,
+    'priority': Task.priority,
+    'department': User.department,
+    'assignee': User.id,
+}
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def time_bucket(column, granularity):
+    """Return a SQL expression that truncates `column` to the start of its bucket."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Unknown granularity: {granularity}')
+
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        # Bound parametr SELECT va GROUP BY'da turlicha bo'lib qoladi, shu sabab literal
+        return func.date_trunc(literal_column(f"'{granularity}'"), column)
+    if dialect == 'sqlite':
+        if granularity == 'day':
+            return func.strftime('%Y-%m-%d', column)
+        if granularity == 'week':
+            # Keyingi yakshanbaga o'tib, 6 kun orqaga = shu haftaning dushanbasi
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m-01', column)
+    raise ValueError(f'Unsupported database dialect: {dialect}')
+
+
+def _bucket_start(value, granularity):
+    """Python-side truncation, used for the window start and empty buckets."""
+    day = value.date() if isinstance(value, datetime) else value
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _step_back(start, granularity, periods):
+    if granularity == 'day':
+        return start - timedelta(days=periods)
+    if granularity == 'week':
+        return start - timedelta(weeks=periods)
+    month_index = start.year * 12 + start.month - 1 - periods
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _normalize(value):
+    """Bucket values come back as datetime (Postgres) or text (SQLite)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+def bucket_label(value, granularity):
+    return value.strftime('%Y-%m') if granularity == 'month' else value.isoformat()
+
+
+def _scoped(query, user_id):
+    if user_id is None:
+        return query
+    return query.filter(Task.id.in_(
+        select(TaskAssignment.task_id).where(TaskAssignment.user_id == user_id)
+    ))
+
+
+def _with_breakdown(query, breakdown):
+    if breakdown not in BREAKDOWNS:
+        raise ValueError(f'Unknown breakdown: {breakdown}')
+    if breakdown in ('department', 'assignee'):
+        query = query.select_from(Task) \
+                     .join(TaskAssignment, TaskAssignment.task_id == Task.id) \
+                     .join(User, User.id == TaskAssignment.user_id)
+    return query
+
+
+def series_start(granularity, periods, now=None):
+    """Start (as datetime) of the window covering the last `periods` buckets."""
+    current = _bucket_start(now or datetime.utcnow(), granularity)
+    return datetime.combine(_step_back(current, granularity, periods - 1), datetime.min.time())
+
+
+def task_timeseries(granularity='month', periods=6, breakdown=None, user_id=None, now=None):
+    """Count tasks created per bucket over the last `periods` buckets (oldest first).
+
+    Returns a list of {'bucket': label, 'count': n} or, with a breakdown,
+    {'bucket': label, 'key': value, 'count': n}. Empty buckets are filled with 0
+    when there is no breakdown.
+    """
+    current = _bucket_start(now or datetime.utcnow(), granularity)
+    bucket = time_bucket(Task.created_at, granularity).label('bucket')
+
+    columns = [bucket]
+    if breakdown:
+        key = BREAKDOWNS[breakdown]
+        columns.append(key.label('key'))
+    columns.append(func.count(func.distinct(Task.id)))
+
+    query = db.session.query(*columns)
+    if breakdown:
+        query = _with_breakdown(query, breakdown)
+    query = _scoped(query.filter(Task.created_at >= series_start(granularity, periods, now)), user_id)
+    group = [bucket] + ([columns[1]] if breakdown else [])
+    rows = query.group_by(*group).order_by(bucket).all()
+
+    if breakdown:
+        return [
+            {'bucket': bucket_label(_normalize(row[0]), granularity), 'key': row[1], 'count': row[2]}
+            for row in rows
+        ]
+
+    counts = {_normalize(value): count for value, count in rows}
+    series = []
+    for offset in range(periods - 1, -1, -1):
+        point = _step_back(current, granularity, offset)
+        series.append({'bucket': bucket_label(point, granularity), 'count': counts.get(point, 0)})
+    return series
+
+
+def task_breakdown(breakdown, user_id=None, since=None):
+    """Count tasks per status / priority / department / assignee."""
+    key = BREAKDOWNS.get(breakdown)
+    if key is None:
+        raise ValueError(f'Unknown breakdown: {breakdown}')
+
+    columns = [key]
+    if breakdown == 'assignee':
+        columns.append(User.full_name)
+    query = _with_breakdown(db.session.query(*columns, func.count(func.distinct(Task.id))), breakdown)
+    if since is not None:
+        query = query.filter(Task.created_at >= since)
+    query = _scoped(query, user_id)
+    rows = query.group_by(*columns).all()
+
+    if breakdown == 'assignee':
+        return [{'key': key, 'name': name, 'count': count} for key, name, count in rows]
+    return [{'key': value, 'count': count} for value, count in rows]
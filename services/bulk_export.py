@@ -0,0 +1,112 @@
+"""
+Xom ma'lumotlarni ommaviy eksport qilish (CSV / NDJSON), BI jobs uchun.
+
+Jadval Core `select` bilan server-side kursor (`stream_results`) orqali
+BULK_CHUNK_SIZE qatordan o'qiladi va generator javob sifatida darhol uzatiladi,
+shu sabab millionlab `activity_logs` qatorlari ham doimiy xotira bilan chiqadi.
+Ustunlarni tanlash (`columns=`) va vaqt oralig'i (`since=`, `until=`) qo'llab-quvvatlanadi.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from models import (Task, TaskAssignment, Guest, OutsourcingService, Building, GreenSpace,
+                    SolarPanel, Celebration, Notification, ActivityLog)
+
+BULK_CHUNK_SIZE = 5000
+
+# nomi -> (model, vaqt bo'yicha filtr ustuni)
+BULK_MODELS = {
+    'tasks': (Task, 'created_at'),
+    'task_assignments': (TaskAssignment, 'assigned_at'),
+    'guests': (Guest, 'created_at'),
+    'outsourcing_services': (OutsourcingService, 'created_at'),
+    'buildings': (Building, 'created_at'),
+    'green_spaces': (GreenSpace, 'created_at'),
+    'solar_panels': (SolarPanel, 'created_at'),
+    'celebrations': (Celebration, 'created_at'),
+    'notifications': (Notification, 'created_at'),
+    'activity_logs': (ActivityLog, 'created_at'),
+}
+
+BULK_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class BulkExportError(ValueError):
+    pass
+
+
+def _parse_time(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise BulkExportError(f'Invalid {name}: {value}')
+
+
+def build_statement(name, columns=None, since=None, until=None):
+    """Return (column names, select statement) for one bulk export."""
+    if name not in BULK_MODELS:
+        raise BulkExportError(f'Unknown table: {name}')
+    model, time_column = BULK_MODELS[name]
+    table = model.__table__
+
+    if columns:
+        unknown = [column for column in columns if column not in table.c]
+        if unknown:
+            raise BulkExportError(f'Unknown columns: {", ".join(unknown)}')
+        selected = [table.c[column] for column in columns]
+    else:
+        selected = list(table.c)
+
+    stmt = select(*selected).order_by(table.c.id)
+    since, until = _parse_time(since, 'since'), _parse_time(until, 'until')
+    if since is not None:
+        stmt = stmt.where(table.c[time_column] >= since)
+    if until is not None:
+        stmt = stmt.where(table.c[time_column] < until)
+    return [column.name for column in selected], stmt
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(names, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in partitions:
+        writer.writerows([['' if value is None else _plain(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Bo'sh natijada ham sarlavha qatori qaytadi
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(names, partitions):
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(names, map(_plain, row))), ensure_ascii=False, default=str) + '\n'
+            for row in rows
+        )
+
+
+def stream_rows(engine, names, stmt, fmt):
+    """Generate encoded chunks of `stmt` results from a server-side cursor."""
+    encode = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=BULK_CHUNK_SIZE).execute(stmt)
+        for chunk in encode(names, result.partitions()):
+            yield chunk.encode('utf-8')
@@ -0,0 +1,343 @@
+"""
+Excel/CSV fayldan ommaviy import (transport, shartnomalar, mehmonlar, xodimlar).
+
+Fayl oqim bilan o'qiladi (xlsx: openpyxl read-only, csv: csv.reader), qatorlar
+IMPORT_CHUNK_SIZE bo'laklarda tekshiriladi. Takrorlar noyob kalit bo'yicha
+(license_plate, email, contract_number) bitta `IN (...)` so'rovi bilan bazadan
+va fayl ichidan aniqlanadi. To'g'ri qatorlar bir tranzaksiyada executemany
+INSERT bilan yoziladi; xato qatorlar hisobotda qator raqami bilan qaytadi.
+
+Ustun sarlavhalari maydon nomi (`license_plate`) yoki eksportdagi o'zbekcha
+sarlavha (`Raqami`) bo'lishi mumkin, shu sabab eksport fayli qayta import qilinadi.
+"""
+import csv
+import io
+import os
+from datetime import date, datetime
+
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from models import db, Vehicle, Contract, Guest, User
+
+IMPORT_CHUNK_SIZE = 1000
+# Parol xeshi (scrypt) qator boshiga ~0.1s: bitta so'rovda shundan ko'p bo'lsa gunicorn timeout'iga yetadi
+IMPORT_MAX_PASSWORD_ROWS = int(os.getenv('IMPORT_MAX_PASSWORD_ROWS', '300'))
+
+ROLES = ('admin', 'rahbar', 'xodim', 'user')
+
+
+class BulkImportError(ValueError):
+    """Raised for problems with the file as a whole (format, headers)."""
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(value):
+    value = _text(value)
+    if value is None:
+        return None
+    return int(float(value))
+
+
+def _float(value):
+    value = _text(value)
+    if value is None:
+        return None
+    return float(value.replace(' ', '').replace(',', '.'))
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    value = _text(value)
+    if value is None:
+        return None
+    for fmt in ('%Y-%m-%d', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f'sana formati noto\'g\'ri: {value}')
+
+
+def _email(value):
+    value = _text(value)
+    if value is not None and '@' not in value:
+        raise ValueError(f'email noto\'g\'ri: {value}')
+    return value.lower() if value else None
+
+
+def _role(value):
+    value = _text(value) or 'user'
+    if value not in ROLES:
+        raise ValueError(f'rol noto\'g\'ri: {value}')
+    return value
+
+
+class Field:
+    def __init__(self, name, parse=_text, aliases=(), required=False, max_per_import=None):
+        self.name = name
+        self.parse = parse
+        self.aliases = aliases
+        self.required = required
+        # Bitta importda qiymati bo'lgan qatorlar chegarasi (qimmat ishlov beriladigan maydonlar)
+        self.max_per_import = max_per_import
+
+
+class ImportSpec:
+    """How rows of one model are parsed, de-duplicated and completed before insert."""
+
+    def __init__(self, name, model, module, fields, unique=None, complete=None, unique_ignore_case=False):
+        self.name = name
+        self.model = model
+        self.module = module
+        self.fields = fields
+        self.unique = unique
+        self.complete = complete
+        # Kalit kichik harfda keladi, bazadagi bilan ham shunday solishtiriladi
+        self.unique_ignore_case = unique_ignore_case
+
+    def header_map(self, headers):
+        """Map column index -> Field, accepting field names and export headers."""
+        lookup = {}
+        for field in self.fields:
+            for label in (field.name,) + tuple(field.aliases):
+                lookup[label.strip().lower()] = field
+        mapping = {}
+        for index, header in enumerate(headers):
+            field = lookup.get(str(header).strip().lower()) if header is not None else None
+            if field is not None:
+                mapping[index] = field
+        missing = [f.name for f in self.fields if f.required and f not in mapping.values()]
+        if missing:
+            raise BulkImportError(f'Majburiy ustunlar topilmadi: {", ".join(missing)}')
+        return mapping
+
+
+def _complete_guest(values, user_id):
+    for name in ('restaurant_expense', 'gift_expense', 'other_expenses'):
+        values[name] = values.get(name) or 0
+    values['total_expense'] = values['restaurant_expense'] + values['gift_expense'] + values['other_expenses']
+    values['created_by'] = user_id
+
+
+def _complete_user(values, user_id):
+    password = values.pop('password', None)
+    # Parolsiz import qilingan xodim kira olmaydi, admin keyin parol beradi
+    values['password_hash'] = generate_password_hash(password) if password else None
+    values['role'] = values.get('role') or 'user'
+    values['is_active'] = True
+
+
+def _set_created_by(values, user_id):
+    values['created_by'] = user_id
+
+
+def _set_vehicle_defaults(values, user_id):
+    values['status'] = values.get('status') or 'active'
+
+
+IMPORTS = {spec.name: spec for spec in [
+    ImportSpec('vehicles', Vehicle, 'vehicles', [
+        Field('brand', aliases=('Markasi',), required=True),
+        Field('model', aliases=('Modeli',), required=True),
+        Field('license_plate', aliases=('Raqami',), required=True),
+        Field('year', _int, aliases=('Yili',)),
+        Field('vin_number', aliases=('VIN',)),
+        Field('color', aliases=('Rangi',)),
+        Field('status', aliases=('Holati',)),
+        Field('last_maintenance', _date, aliases=('So\'nggi remont',)),
+        Field('next_maintenance', _date, aliases=('Keyingi remont',)),
+        Field('defects', aliases=('Defektlar',)),
+        Field('notes', aliases=('Izoh',)),
+    ], unique='license_plate', complete=_set_vehicle_defaults),
+    ImportSpec('contracts', Contract, 'contracts', [
+        Field('contract_number', aliases=('Shartnoma raqami',), required=True),
+        Field('contract_date', _date, aliases=('Sana',)),
+        Field('company_name', aliases=('Firma nomi',)),
+        Field('contract_amount', _float, aliases=('Summa',)),
+        Field('payment_date', _date, aliases=('To\'lov sanasi',)),
+        Field('status', aliases=('Holati',)),
+        Field('description', aliases=('Tavsif',)),
+        Field('notes', aliases=('Izoh',)),
+    ], unique='contract_number', complete=_set_created_by),
+    ImportSpec('guests', Guest, 'guests', [
+        Field('full_name', aliases=('F.I.O',), required=True),
+        Field('organization', aliases=('Tashkilot',)),
+        Field('position', aliases=('Lavozim',)),
+        Field('arrival_date', _date, aliases=('Kelgan sana',)),
+        Field('departure_date', _date, aliases=('Ketgan sana',)),
+        Field('visit_purpose', aliases=('Tashrif maqsadi',)),
+        Field('reference_number', aliases=('Asos raqami',)),
+        Field('services_provided', aliases=('Ko\'rsatilgan xizmatlar',)),
+        Field('restaurant_expense', _float, aliases=('Restoran',)),
+        Field('gift_expense', _float, aliases=('Sovg\'a',)),
+        Field('other_expenses', _float, aliases=('Boshqa xarajatlar',)),
+        Field('notes', aliases=('Izoh',)),
+    ], complete=_complete_guest),
+    ImportSpec('users', User, None, [
+        Field('full_name', aliases=('F.I.O', 'Ism'), required=True),
+        Field('email', _email, aliases=('Email',), required=True),
+        Field('password', aliases=('Parol',), max_per_import=IMPORT_MAX_PASSWORD_ROWS),
+        Field('role', _role, aliases=('Rol',)),
+        Field('telegram_username', aliases=('Telegram',)),
+        Field('department', aliases=('Bo\'lim',)),
+        Field('position', aliases=('Lavozim',)),
+        Field('phone', aliases=('Telefon',)),
+    ], unique='email', complete=_complete_user, unique_ignore_case=True),
+]}
+
+
+class ImportResult:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.errors = []  # [{'row': n, 'errors': [...]}, ...]
+
+    @property
+    def skipped(self):
+        return self.total - self.inserted
+
+    def add_error(self, row_number, message):
+        if self.errors and self.errors[-1]['row'] == row_number:
+            self.errors[-1]['errors'].append(message)
+        else:
+            self.errors.append({'row': row_number, 'errors': [message]})
+
+    def to_dict(self):
+        return {'total': self.total, 'inserted': self.inserted, 'skipped': self.skipped,
+                'errors': self.errors}
+
+
+def read_rows(fileobj, filename):
+    """Yield rows (lists of cell values) from an xlsx or csv upload, header first."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'xlsx':
+        from openpyxl import load_workbook
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            for row in wb.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            wb.close()
+    elif extension == 'csv':
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()
+    else:
+        raise BulkImportError('Faqat .xlsx yoki .csv fayl qabul qilinadi')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parse_row(spec, mapping, row, row_number, result):
+    values = {}
+    ok = True
+    for index, field in mapping.items():
+        raw = row[index] if index < len(row) else None
+        try:
+            values[field.name] = field.parse(raw)
+        except (TypeError, ValueError) as e:
+            result.add_error(row_number, f'{field.name}: {e}')
+            ok = False
+            continue
+        if field.required and values[field.name] is None:
+            result.add_error(row_number, f'{field.name}: majburiy')
+            ok = False
+    return values if ok else None
+
+
+def run_import(spec, rows, user_id, dry_run=False, all_or_nothing=False):
+    """Validate and insert `rows` (header first) for `spec`. Returns an ImportResult.
+
+    Valid rows are inserted in one transaction; invalid rows are reported and
+    skipped. With `all_or_nothing` any error rolls the whole import back.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise BulkImportError('Fayl bo\'sh')
+    mapping = spec.header_map(header)
+
+    unique_column = getattr(spec.model, spec.unique) if spec.unique else None
+    if unique_column is not None and spec.unique_ignore_case:
+        unique_column = func.lower(unique_column)
+    seen = set()
+    limited = [field for field in mapping.values() if field.max_per_import is not None]
+    used = dict.fromkeys((field.name for field in limited), 0)
+
+    numbered = ((number, row) for number, row in enumerate(rows, 2)
+                if any(value not in (None, '') for value in row))
+    try:
+        for chunk in _chunks(numbered, IMPORT_CHUNK_SIZE):
+            parsed = []
+            for row_number, row in chunk:
+                result.total += 1
+                values = _parse_row(spec, mapping, row, row_number, result)
+                if values is not None:
+                    parsed.append((row_number, values))
+
+            if unique_column is not None:
+                keys = {values[spec.unique] for _, values in parsed}
+                existing = set(db.session.scalars(select(unique_column).where(unique_column.in_(keys)))) if keys else set()
+                unique_rows = []
+                for row_number, values in parsed:
+                    key = values[spec.unique]
+                    if key in existing:
+                        result.add_error(row_number, f'{spec.unique}: bazada mavjud ({key})')
+                    elif key in seen:
+                        result.add_error(row_number, f'{spec.unique}: faylda takrorlangan ({key})')
+                    else:
+                        seen.add(key)
+                        unique_rows.append((row_number, values))
+                parsed = unique_rows
+
+            batch = []
+            for row_number, values in parsed:
+                over = [field for field in limited
+                        if values.get(field.name) is not None and used[field.name] >= field.max_per_import]
+                if over:
+                    for field in over:
+                        result.add_error(row_number, f'{field.name}: bitta importda ko\'pi bilan '
+                                                     f'{field.max_per_import} ta qatorda bo\'lishi mumkin')
+                    continue
+                for field in limited:
+                    if values.get(field.name) is not None:
+                        used[field.name] += 1
+                if spec.complete:
+                    spec.complete(values, user_id)
+                batch.append(values)
+            if batch:
+                db.session.execute(insert(spec.model), batch)
+                result.inserted += len(batch)
+
+        if dry_run or (all_or_nothing and result.errors):
+            db.session.rollback()
+            if not dry_run:
+                result.inserted = 0
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
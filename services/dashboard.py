@@ -0,0 +1,101 @@
+"""
+Dashboard statistikasi: bir necha agregat so'rov + qisqa muddatli kesh.
+
+Topshiriq statistikasi rol bo'yicha (admin/rahbar) yoki foydalanuvchi bo'yicha
+(xodim va boshqalar) keshlanadi; umumiy modul sonlari bitta kalitda saqlanadi.
+Hisoblangan modellardan biri commit qilinganda kesh shu worker'da tozalanadi,
+boshqa worker'larda esa TTL tugashi bilan yangilanadi. Kesh barcha so'rovlarga
+umumiy, shuning uchun u replikadan emas, asosiy bazadan to'ldiriladi: aks holda
+commit'dan keyin tozalangan kesh orqada qolgan replikadagi eski sonlar bilan qayta yozilardi.
+"""
+import os
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from models import (db, Task, TaskAssignment, Vehicle, Building, User, Contract,
+                    Guest, Organization)
+from services.cache import TTLCache
+from services.replica import primary_reads
+from services.task_counters import get_task_status_counts, count_overdue_tasks
+
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=2048)
+
+# Shu modellar o'zgarsa dashboard kesh eskiradi
+WATCHED_MODELS = (Task, TaskAssignment, Vehicle, Building, User, Contract, Guest, Organization)
+
+
+def task_scope_key(user):
+    """Admin va rahbar bitta umumiy snapshot'ni ko'radi, qolganlar o'zinikini."""
+    if user.role in ['admin', 'rahbar']:
+        return ('tasks', 'all')
+    return ('tasks', 'user', user.id)
+
+
+def _compute_task_stats(user):
+    user_id = None if user.role in ['admin', 'rahbar'] else user.id
+    counts = get_task_status_counts(user_id)
+    return {
+        'total_tasks': sum(counts.values()),
+        'pending_tasks': counts.get('pending', 0),
+        'in_progress_tasks': counts.get('in_progress', 0),
+        'completed_tasks': counts.get('completed', 0),
+        'overdue_tasks': count_overdue_tasks(user_id),
+    }
+
+
+def _count(model, *criteria):
+    stmt = select(func.count()).select_from(model)
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt.scalar_subquery()
+
+
+def _compute_module_stats():
+    # Barcha sonlar bitta round-trip'da (skalyar subquery'lar)
+    row = db.session.query(
+        _count(Vehicle),
+        _count(Vehicle, Vehicle.status == 'active'),
+        _count(Building),
+        _count(User, User.role == 'xodim'),
+        _count(Contract),
+        _count(Contract, Contract.status == 'active'),
+        _count(Guest),
+        _count(Organization),
+    ).one()
+    keys = ['total_vehicles', 'active_vehicles', 'total_buildings', 'total_employees',
+            'total_contracts', 'active_contracts', 'total_guests', 'total_organizations']
+    return dict(zip(keys, row))
+
+
+def get_dashboard_stats(user):
+    """Return the dashboard stats dict for `user`, served from cache when fresh."""
+    with primary_reads():
+        stats = dict(_cache.get_or_set(task_scope_key(user), lambda: _compute_task_stats(user)))
+        stats.update(_cache.get_or_set(('modules',), _compute_module_stats))
+    return stats
+
+
+def invalidate_dashboard_cache():
+    _cache.clear()
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_dashboard_dirty(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, WATCHED_MODELS):
+            session.info['dashboard_dirty'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('dashboard_dirty', False):
+        invalidate_dashboard_cache()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_on_rollback(session):
+    session.info.pop('dashboard_dirty', None)
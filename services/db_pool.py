@@ -0,0 +1,127 @@
+"""
+Ulanishlar pooli statistikasi va tayyorlik (readiness) tekshiruvi.
+
+Postgres engine'lari `TimedQueuePool` bilan yaratiladi: u oddiy QueuePool,
+faqat ulanish olish uchun kutilgan vaqtni (soni, jami, eng uzun) va
+pool_timeout xatolarini hisoblaydi. `/ready` endpointi har bir bind uchun band ulanishlar,
+overflow va kutish vaqtini qaytaradi: pool hajmini worker soniga qarab
+tanlash va ulanishlar tugab qolishini ko'rish uchun.
+
+SQLite engine'lari Flask-SQLAlchemy/SQLAlchemy tanlagan standart pool bilan
+qoladi (config.py `_engine_options` ularga pool sozlamalarini bermaydi).
+
+Statistika har bir worker jarayoniga tegishli (fork'dan keyin dispose
+qilinganda yangi pool bilan noldan boshlanadi). Bitta worker poolining to'lishi
+butun instance tayyor emas degani emas, shuning uchun `/ready` uni faqat
+hisobotda ko'rsatadi; `saturated_for` esa to'lish qancha davom etayotganini
+(ketma-ket tekshiruvlar bo'yicha) o'lchaydi.
+"""
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._waits += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+    def wait_stats(self):
+        with self._stats_lock:
+            return {
+                'checkouts': self._waits,
+                'wait_avg_ms': round(self._wait_total / self._waits * 1000, 3) if self._waits else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+                'timeouts': self._timeouts,
+            }
+
+
+def _is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def init_pool_stats(app):
+    """Make every non-SQLite engine (default and binds) use TimedQueuePool. Call before `db.init_app(app)`."""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    if not _is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        options.setdefault('poolclass', TimedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = {}
+    for key, bind in app.config.get('SQLALCHEMY_BINDS', {}).items():
+        bind = {'url': bind} if isinstance(bind, str) else dict(bind)
+        if not _is_sqlite(bind['url']):
+            bind.setdefault('poolclass', TimedQueuePool)
+        binds[key] = bind
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def pool_stats(engine):
+    """Return live counters of `engine`'s pool as a JSON-able dict."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'pool': type(pool).__name__}
+    size = pool.size()
+    limit = size + max(pool._max_overflow, 0)
+    stats = {
+        'pool': type(pool).__name__,
+        'size': size,
+        'max_overflow': pool._max_overflow,
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        # QueuePool hali `size` ta ulanish ochmagan bo'lsa overflow manfiy bo'ladi
+        'overflow': max(pool.overflow(), 0),
+        'timeout_s': pool.timeout(),
+        'saturated': pool._max_overflow >= 0 and pool.checkedout() >= limit,
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
+
+
+_saturated_since = {}
+
+
+def saturated_for(name, saturated):
+    """Return how many seconds pool `name` has been saturated across consecutive probes (0 if not now)."""
+    now = time.monotonic()
+    if not saturated:
+        _saturated_since.pop(name, None)
+        return 0.0
+    return round(now - _saturated_since.setdefault(name, now), 3)
+
+
+def check_database(engine):
+    """Run `SELECT 1` on `engine`; return (ok, latency in ms, error)."""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except Exception as exc:
+        return False, None, str(exc)
+    return True, round((time.perf_counter() - started) * 1000, 3), None
@@ -0,0 +1,300 @@
+"""
+Real vaqtdagi hodisalar: Server-Sent Events (/api/notifications/stream).
+
+Hodisalar `stream_events` jadvaliga o'zgarish bilan bir tranzaksiyada yoziladi
+(har bir qabul qiluvchiga bitta qator):
+
+* notification: har qanday yangi `Notification` (after_flush hook'i);
+* task_status / task_comment: `publish()` orqali (topshiriq sahifasi).
+
+Har bir worker jarayonida bitta fon oqimi (`EventHub`) faqat ulangan
+foydalanuvchilar bo'lganda har SSE_POLL_INTERVAL soniyada yangi qatorlarni
+bitta so'rov bilan o'qiydi va ularni shu jarayondagi ulanishlarga tarqatadi.
+Shu jarayonda commit bo'lsa hub darhol uyg'otiladi. Ulanish bazadan ulanish
+ushlab turmaydi. Hub oqimi birinchi hodisa yoki ulanishda ishga tushadi va
+ulanishlar bo'lmasa ham soatiga bir marta SSE_RETENTION_HOURS dan eski
+qatorlarni o'chiradi (`flask stream-events` xuddi shuni qo'lda qiladi).
+
+Uzilgan brauzer Last-Event-ID bilan qayta ulanadi va o'tkazib yuborilgan
+hodisalar jadvaldan beriladi. Har SSE_HEARTBEAT soniyada izoh (ping) yuboriladi:
+proksi ulanishni yopmaydi, yopilgan ulanish esa aniqlanadi.
+
+Ochiq ulanish bitta oqim/greenlet'ni band qiladi: gevent profilida bu arzon,
+gthread'da esa SSE_MAX_CONNECTIONS (gunicorn.conf.py) cheklaydi. Limitdan
+oshganda 204 qaytadi va sahifa /api/notifications ni ETag bilan so'rashga o'tadi.
+SSE_MAX_CONNECTIONS=0 (o'chiq) bo'lsa hodisalar umuman yozilmaydi.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from models import db, Notification, StreamEvent
+from services.notifications import notification_to_dict
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'poll_interval': 1.0,
+    'heartbeat': 15.0,
+    'max_duration': 600.0,
+    'max_connections': 0,
+    'backlog': 100,
+    'retention_hours': 24.0,
+}
+_app = None
+
+# Postgres'da id'lar commit tartibida emas: kechikib commit bo'lgan qatorlar
+# uchun oxirgi shuncha id qayta ko'riladi (yuborilganlari takrorlanmaydi)
+REORDER_WINDOW = 100
+PURGE_INTERVAL = 3600
+
+
+def _row(user_id, event_name, data):
+    return {'user_id': user_id, 'event': event_name,
+            'data': json.dumps(data, ensure_ascii=False, default=str), 'created_at': datetime.utcnow()}
+
+
+def enabled():
+    return _settings['max_connections'] > 0
+
+
+def publish(user_ids, event_name, data):
+    """Add `event_name` for each user to the current transaction; delivered after commit."""
+    if not enabled():
+        return
+    rows = [_row(user_id, event_name, data) for user_id in sorted(set(user_ids)) if user_id]
+    if rows:
+        db.session.execute(insert(StreamEvent), rows)
+        db.session.info['_stream_published'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _publish_notifications(session, flush_context):
+    if not enabled():
+        return
+    rows = [_row(obj.user_id, 'notification', notification_to_dict(obj))
+            for obj in session.new if isinstance(obj, Notification)]
+    if rows:
+        session.connection().execute(insert(StreamEvent.__table__), rows)
+        session.info['_stream_published'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_hub(session):
+    if session.info.pop('_stream_published', False):
+        hub.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_published(session):
+    session.info.pop('_stream_published', None)
+
+
+class Subscriber:
+    """One open stream: events for `user_id` queued by the hub."""
+
+    __slots__ = ('user_id', 'events', 'ready')
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.events = deque()
+        self.ready = threading.Event()
+
+    def wait(self, timeout):
+        """Return queued (id, event, data) tuples, waiting up to `timeout` seconds."""
+        self.ready.wait(timeout)
+        self.ready.clear()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+
+class EventHub:
+    """Per-process fan-out: one poller reads new stream_events and hands them to subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._count = 0
+        self._last_id = None
+        # Oxirgi yuborilgan id'lar (REORDER_WINDOW ichida takrorlamaslik uchun)
+        self._delivered = deque()
+        self._delivered_ids = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._last_purge = 0.0
+
+    @property
+    def connections(self):
+        return self._count
+
+    def subscribe(self, user_id):
+        """Register a stream or return None when the per-process limit is reached.
+
+        Must run inside an app context: the first subscriber fixes the starting id.
+        """
+        with self._lock:
+            if self._count >= _settings['max_connections']:
+                return None
+            if self._last_id is None or self._pid != os.getpid():
+                # Shu id dan keyingilari hub orqali, oldingilari Last-Event-ID backlog'idan
+                self._last_id = db.session.scalar(select(func.max(StreamEvent.id))) or 0
+                self._delivered.clear()
+                self._delivered_ids.clear()
+            subscriber = Subscriber(user_id)
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+            self._count += 1
+            self._ensure_thread()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers and subscriber in subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+                self._count -= 1
+            if not self._count:
+                # Hech kim ulanmagan: so'rov yo'q, keyingi ulanish boshlang'ich id ni qayta oladi
+                self._last_id = None
+
+    def wake(self):
+        with self._lock:
+            self._ensure_thread()
+        self._wake.set()
+
+    def _ensure_thread(self):
+        # fork'dan keyin ota jarayondagi oqim bolada yo'q
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='event-stream-hub')
+            self._thread.start()
+
+    def _run(self):
+        with _app.app_context():
+            while True:
+                self._wake.wait(_settings['poll_interval'])
+                self._wake.clear()
+                try:
+                    # Ulanishlar bo'lmasa ham eski hodisalar o'chiriladi
+                    self._purge()
+                    if self._count:
+                        self._poll()
+                except Exception:
+                    logger.exception('Event stream poll failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def _poll(self):
+        with self._lock:
+            last_id = self._last_id
+        if last_id is None:
+            return
+        # SQLite yozuvchilarni ketma-ket bajaradi, id'lar commit tartibida
+        window = REORDER_WINDOW if db.engine.dialect.name == 'postgresql' else 0
+        rows = db.session.execute(
+            select(StreamEvent.id, StreamEvent.user_id, StreamEvent.event, StreamEvent.data)
+            .where(StreamEvent.id > max(last_id - window, 0))
+            .order_by(StreamEvent.id).limit(1000)
+        ).all()
+        with self._lock:
+            for row in rows:
+                if row.id in self._delivered_ids:
+                    continue
+                self._delivered.append(row.id)
+                self._delivered_ids.add(row.id)
+                if len(self._delivered) > 10 * REORDER_WINDOW:
+                    self._delivered_ids.discard(self._delivered.popleft())
+                for subscriber in self._subscribers.get(row.user_id, ()):
+                    subscriber.events.append((row.id, row.event, row.data))
+                    subscriber.ready.set()
+            if rows and self._last_id is not None:
+                self._last_id = max(self._last_id, rows[-1].id)
+
+    def _purge(self):
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = time.monotonic()
+        purge_stream_events(_settings['retention_hours'])
+
+
+hub = EventHub()
+
+
+def purge_stream_events(older_than_hours=24):
+    """Delete events older than `older_than_hours`. Returns the count."""
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    count = db.session.execute(delete(StreamEvent).where(StreamEvent.created_at < cutoff)).rowcount
+    db.session.commit()
+    return count
+
+
+def _format(event_id, event_name, data):
+    return f'id: {event_id}\nevent: {event_name}\ndata: {data}\n\n'
+
+
+def open_stream(user_id, last_event_id=None):
+    """Return an SSE generator for `user_id`, or None when no stream slot is free.
+
+    Call inside the request; the generator itself does not touch the database
+    or the request context.
+    """
+    if _settings['max_connections'] <= 0:
+        return None
+    subscriber = hub.subscribe(user_id)
+    if subscriber is None:
+        return None
+
+    backlog = []
+    if last_event_id:
+        try:
+            backlog = db.session.execute(
+                select(StreamEvent.id, StreamEvent.event, StreamEvent.data)
+                .where(StreamEvent.user_id == user_id, StreamEvent.id > last_event_id)
+                .order_by(StreamEvent.id).limit(_settings['backlog'])
+            ).all()
+        except Exception:
+            hub.unsubscribe(subscriber)
+            raise
+    heartbeat, max_duration = _settings['heartbeat'], _settings['max_duration']
+    retry_ms = int(_settings['poll_interval'] * 1000) + 2000
+
+    def generate():
+        sent = set()
+        deadline = time.monotonic() + max_duration
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            for row in backlog:
+                sent.add(row.id)
+                yield _format(row.id, row.event, row.data)
+            # Ulanish vaqti cheklangan: brauzer Last-Event-ID bilan qayta ulanadi
+            while time.monotonic() < deadline:
+                events = subscriber.wait(heartbeat)
+                chunks = [_format(*item) for item in events if item[0] not in sent]
+                yield ''.join(chunks) if chunks else ': ping\n\n'
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return generate()
+
+
+def init_event_stream(app):
+    global _app
+    _app = app
+    _settings['poll_interval'] = float(app.config.get('SSE_POLL_INTERVAL', 1.0))
+    _settings['heartbeat'] = float(app.config.get('SSE_HEARTBEAT', 15))
+    _settings['max_duration'] = float(app.config.get('SSE_MAX_DURATION', 600))
+    _settings['max_connections'] = int(app.config.get('SSE_MAX_CONNECTIONS', 0))
+    _settings['backlog'] = int(app.config.get('SSE_BACKLOG', 100))
+    _settings['retention_hours'] = float(app.config.get('SSE_RETENTION_HOURS', 24))
@@ -0,0 +1,83 @@
+"""
+Issiq (eng ko'p bajariladigan) so'rovlar uchun EXPLAIN harness.
+
+`flask explain-hot-queries` har bir so'rovning reja (plan) natijasini chiqaradi:
+SQLite'da `EXPLAIN QUERY PLAN`, Postgres'da `EXPLAIN` (ixtiyoriy `ANALYZE`).
+Katta ma'lumot bilan to'ldirilgandan keyin indekslar ishlatilayotganini ko'rsatadi.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+
+from models import (db, Task, TaskAssignment, TaskComment, Notification, ActivityLog,
+                    User, UserModule, TaskCounter, VehicleDocument, Guest)
+
+
+def hot_queries(user_id, task_id):
+    """Return (name, statement) pairs mirroring the queries the routes run most."""
+    now = datetime.utcnow()
+    user_task_ids = select(TaskAssignment.task_id).where(TaskAssignment.user_id == user_id)
+    return [
+        ('tasks: latest (admin)',
+         select(Task).order_by(Task.created_at.desc()).limit(50)),
+        ('tasks: keyset page (created_at, id)',
+         select(Task).where(tuple_(Task.created_at, Task.id) < tuple_(now, task_id))
+         .order_by(Task.created_at.desc(), Task.id.desc()).limit(26)),
+        ('guests: keyset page (created_at, id)',
+         select(Guest).where(tuple_(Guest.created_at, Guest.id) < tuple_(now, 1))
+         .order_by(Guest.created_at.desc(), Guest.id.desc()).limit(26)),
+        ('tasks: assigned to user',
+         select(Task).where(Task.id.in_(user_task_ids)).order_by(Task.created_at.desc()).limit(50)),
+        ('tasks: overdue count',
+         select(func.count(Task.id)).where(Task.due_date < now, Task.status != 'completed')),
+        ('tasks: by status',
+         select(Task.status, func.count(Task.id)).group_by(Task.status)),
+        ('task_counters: user',
+         select(TaskCounter.status, TaskCounter.count)
+         .where(TaskCounter.scope == 'user', TaskCounter.user_id == user_id)),
+        ('task_comments: by task',
+         select(TaskComment).where(TaskComment.task_id == task_id).order_by(TaskComment.created_at.desc())),
+        ('notifications: unread',
+         select(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+         .order_by(Notification.created_at.desc()).limit(10)),
+        ('notifications: unread count + max id',
+         select(func.count(Notification.id), func.max(Notification.id))
+         .where(Notification.user_id == user_id, Notification.is_read == False)),
+        ('activity_logs: recent',
+         select(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(20)),
+        ('users: by telegram_username',
+         select(User).where(User.telegram_username == 'username')),
+        ('users: employees',
+         select(User).where(User.role == 'xodim')),
+        ('user_modules: access check',
+         select(UserModule).where(UserModule.user_id == user_id, UserModule.module_name == 'tasks')),
+        ('vehicle_documents: by vehicle',
+         select(VehicleDocument).where(VehicleDocument.vehicle_id == 1)),
+    ]
+
+
+def explain(statement, analyze=False):
+    """Return the plan lines for `statement` on the current database."""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect)
+
+    if dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    else:
+        prefix = 'EXPLAIN '
+
+    params = compiled.params
+    if dialect.name == 'sqlite':
+        # exec_driver_sql bind processor'larni chetlab o'tadi; SQLite sanani matn sifatida saqlaydi
+        params = {k: (str(v) if isinstance(v, datetime) else v) for k, v in params.items()}
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    rows = connection.exec_driver_sql(prefix + str(compiled), params).all()
+    if dialect.name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
@@ -0,0 +1,198 @@
+"""
+Versiyalangan eksport natijalari keshi (diskda).
+
+Tayyor hisobot fayli (modul, format, filtrlar, ma'lumot versiyasi) kaliti bilan
+EXPORT_CACHE_DIR da saqlanadi. Versiya (fingerprint) hisobot bog'liq har bir
+jadval uchun qatorlar soni, max(id), max(created_at)/max(updated_at) va
+`data_versions` hisoblagichidan iborat:
+
+* qo'shish (shu jumladan bulk) soni va max(id) ni o'zgartiradi;
+* avtomatik updated_at ustuni bor jadvalda tahrirlash max(updated_at) ni o'zgartiradi;
+* qolgani (boshqa jadvallarda ORM orqali tahrirlash va o'chirish, SQLite o'chirilgan
+  id ni qayta ishlatishi mumkin) `data_versions` ni oshiradi. Qo'shishda hisoblagich
+  yozilmaydi, shuning uchun u har bir yozuvda yangilanadigan "issiq" qator emas.
+
+Ma'lumot o'zgarmaguncha takroriy so'rov tayyor fayldan beriladi. Kesh hajmi
+EXPORT_CACHE_MAX_MB dan oshsa eng uzoq ishlatilmagan fayllar o'chiriladi (LRU).
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from models import db, DataVersion
+from services.reports import REPORTS
+from services.xlsx_export import XLSX_MIMETYPE
+
+EXPORT_CACHE_DIR = os.path.abspath(os.getenv('EXPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'af-imperiya-exports')))
+EXPORT_CACHE_MAX_BYTES = int(float(os.getenv('EXPORT_CACHE_MAX_MB', '500')) * 1024 * 1024)
+
+PDF_MIMETYPE = 'application/pdf'
+
+# format -> mimetype
+FORMATS = {
+    'xlsx': XLSX_MIMETYPE,
+    'pdf': PDF_MIMETYPE,
+}
+
+# Hisobotlar bog'liq jadvallar: faqat shularning o'zgarishi versiyani oshiradi
+WATCHED_TABLES = {model.__tablename__ for report in REPORTS.values() for model in report.depends}
+
+
+def _tracks_updates(model):
+    column = model.__table__.c.get('updated_at')
+    return column is not None and column.onupdate is not None
+
+
+# Tahrirlash fingerprint'da max(updated_at) orqali ko'rinadigan jadvallar
+SELF_VERSIONED_TABLES = {model.__tablename__ for report in REPORTS.values() for model in report.depends
+                         if _tracks_updates(model)}
+
+
+def _bump_versions(connection, tables):
+    table = DataVersion.__table__
+    rows = [{'table_name': name, 'version': 1} for name in sorted(tables)]
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['table_name'],
+            set_={'version': table.c.version + 1}
+        )
+        connection.execute(stmt)
+        return
+
+    # Boshqa bazalar uchun: UPDATE, qator bo'lmasa INSERT
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.table_name == row['table_name'])
+            .values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_data_versions(session, flush_context):
+    # Yangi qatorlar soni va max(id) da ko'rinadi, ular uchun hisoblagich kerak emas
+    tables = {getattr(obj, '__tablename__', None) for obj in session.deleted}
+    for obj in session.dirty:
+        table = getattr(obj, '__tablename__', None)
+        if table in WATCHED_TABLES and table not in SELF_VERSIONED_TABLES and session.is_modified(obj):
+            tables.add(table)
+    tables &= WATCHED_TABLES
+    if tables:
+        _bump_versions(session.connection(), tables)
+
+
+def data_fingerprint(models):
+    """Return a JSON-able snapshot that changes whenever rows of `models` change."""
+    fingerprint = []
+    for model in sorted(models, key=lambda m: m.__tablename__):
+        columns = [func.count(), func.max(model.id)]
+        for name in ('created_at', 'updated_at'):
+            if hasattr(model, name):
+                columns.append(func.max(getattr(model, name)))
+        row = db.session.execute(select(*columns).select_from(model)).one()
+        fingerprint.append([model.__tablename__] + [str(value) if value is not None else None for value in row])
+
+    names = [model.__tablename__ for model in models]
+    versions = dict(db.session.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(names))
+    ).all())
+    for entry in fingerprint:
+        entry.append(versions.get(entry[0], 0))
+    return fingerprint
+
+
+def cache_key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def report_cache_key(report, fmt, user, params=None):
+    return cache_key(report.name, fmt, report.scope(user), params or {}, data_fingerprint(report.depends))
+
+
+def _path(key, fmt):
+    return os.path.join(EXPORT_CACHE_DIR, f'{key}.{fmt}')
+
+
+def lookup(key, fmt):
+    """Return the cached file path for `key`, marking it recently used, or None."""
+    path = _path(key, fmt)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store(key, fmt, write):
+    """Write a new cache entry with `write(fileobj)` and return its path."""
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    # Yarim yozilgan fayl hech qachon kesh sifatida ko'rinmasin
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as fileobj:
+            write(fileobj)
+        path = _path(key, fmt)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    evict()
+    return path
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in `max_bytes`."""
+    max_bytes = EXPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    with os.scandir(EXPORT_CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.endswith('.part'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def get_or_build(key, fmt, write):
+    """Return the cached path for `key`, building it with `write(fileobj)` on a miss."""
+    return lookup(key, fmt) or store(key, fmt, write)
+
+
+def cached_report_file(report, fmt, user, params=None):
+    """Return the cached path for this report/format/scope if the data has not changed."""
+    return lookup(report_cache_key(report, fmt, user, params), fmt)
+
+
+def _writer(fmt):
+    # reportlab/openpyxl faqat fayl haqiqatan yaratilganda yuklanadi
+    if fmt == 'pdf':
+        from services.pdf_export import write_table_pdf
+        return write_table_pdf
+    from services.xlsx_export import write_xlsx
+    return write_xlsx
+
+
+def report_file(report, fmt, user, params=None):
+    """Return a path to the rendered report, building it only on a cache miss."""
+    writer = _writer(fmt)
+    return get_or_build(report_cache_key(report, fmt, user, params), fmt,
+                        lambda fileobj: writer(fileobj, report.title, report.headers, report.rows(user)))
@@ -0,0 +1,210 @@
+"""
+Fon rejimidagi eksport vazifalari.
+
+So'rov faqat ExportJob yozuvini yaratadi va uni ProcessPoolExecutor'ga beradi;
+hisobot (xlsx/pdf) alohida jarayonda tayyorlanib diskka yoziladi. Mijoz
+holatni so'rab turadi (status endpoint) va tayyor faylni yuklab oladi. Holat
+bazada saqlanadi, shuning uchun istalgan gunicorn worker javob bera oladi.
+
+Fayllar eksport keshiga (services/export_cache.py) yoziladi: ma'lumot
+o'zgarmagan bo'lsa vazifa darhol tayyor holatda yaratiladi.
+
+Pool jarayonlari fork emas, spawn bilan yaratiladi: gthread/gevent worker'larda
+fork boshqa oqim ushlab turgan qulflarni (SQLAlchemy pool, logging, prometheus)
+bolaga qulflangan holda ko'chiradi. Worker qayta ishga tushsa (crash,
+max_requests) yo'qolgan vazifalar EXPORT_JOB_TIMEOUT dan keyin failed bo'ladi.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from models import db, ExportJob, User
+from services.export_cache import FORMATS, cached_report_file, report_file
+from services.reports import REPORTS
+
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))
+# Shundan uzoq pending/running qolgan vazifa yo'qolgan hisoblanadi (soniya)
+EXPORT_JOB_TIMEOUT = int(os.getenv('EXPORT_JOB_TIMEOUT', '1800'))
+
+_app = None
+_executor = None
+_executor_pid = None
+
+
+def init_export_jobs(app):
+    global _app
+    _app = app
+
+
+def _init_child(import_name):
+    # spawn: bola jarayon toza interpretator, ilova modulini import qilib init_export_jobs chaqiriladi
+    importlib.import_module('app' if import_name == '__main__' else import_name)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # Har bir (fork qilingan) worker o'z pool'ini yaratadi
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(
+            max_workers=EXPORT_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_child,
+            initargs=(_app.import_name,),
+        )
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _dispatch(job_id):
+    global _executor
+    try:
+        _get_executor().submit(run_export_job, job_id)
+    except BrokenProcessPool:
+        # Bola jarayon halok bo'lsa pool qayta yaratiladi
+        _executor = None
+        _get_executor().submit(run_export_job, job_id)
+
+
+def submit_export(user_id, report_name, fmt, params=None):
+    """Create an ExportJob, commit it and hand it to the process pool."""
+    if report_name not in REPORTS:
+        raise ValueError(f'Unknown report: {report_name}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format: {fmt}')
+
+    job = ExportJob(user_id=user_id, report=report_name, format=fmt, status='pending',
+                    params=json.dumps(params) if params else None)
+
+    # Ma'lumot o'zgarmagan: tayyor fayl keshdan, pool'ga yubormaymiz
+    cached = cached_report_file(REPORTS[report_name], fmt, db.session.get(User, user_id), params)
+    if cached:
+        now = datetime.utcnow()
+        job.status = 'done'
+        job.filename = REPORTS[report_name].download_name(fmt)
+        job.filepath = cached
+        job.started_at = job.finished_at = now
+
+    db.session.add(job)
+    db.session.commit()
+    if job.status == 'pending':
+        _dispatch(job.id)
+    return job
+
+
+def run_export_job(job_id):
+    """Render one job into the export cache. Runs in a pool process (or the CLI)."""
+    with _app.app_context():
+        try:
+            _render(job_id)
+        finally:
+            db.session.remove()
+
+
+def _render(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if job is None or job.status != 'pending':
+        return
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        report = REPORTS[job.report]
+        user = db.session.get(User, job.user_id)
+        params = json.loads(job.params) if job.params else None
+
+        job.filepath = report_file(report, job.format, user, params)
+        job.filename = report.download_name(job.format)
+        job.status = 'done'
+    except Exception as exc:
+        db.session.rollback()
+        _app.logger.exception('Export job %s failed', job_id)
+        job = db.session.get(ExportJob, job_id)
+        job.status = 'failed'
+        job.error = str(exc)[:1000]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _is_stale(job, now=None):
+    since = job.started_at or job.created_at
+    return since is not None and (now or datetime.utcnow()) - since > timedelta(seconds=EXPORT_JOB_TIMEOUT)
+
+
+def refresh_job(job):
+    """Fix up a job before reporting its status; commits when something changed.
+
+    * pending/running for longer than EXPORT_JOB_TIMEOUT: the process running it
+      is gone (crash, max_requests restart), so the job becomes failed;
+    * done but the cached file was evicted: the job is queued again.
+    """
+    if job.status in ('pending', 'running') and _is_stale(job):
+        job.status = 'failed'
+        job.error = 'Vaqt tugadi: vazifani bajarayotgan jarayon to\'xtagan'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    elif job.status == 'done' and not (job.filepath and os.path.exists(job.filepath)):
+        job.status = 'pending'
+        job.filepath = None
+        job.created_at = datetime.utcnow()
+        job.started_at = job.finished_at = None
+        db.session.commit()
+        _dispatch(job.id)
+    return job
+
+
+def expire_stale_jobs():
+    """Mark every job stuck in pending/running past EXPORT_JOB_TIMEOUT as failed. Returns the count."""
+    cutoff = datetime.utcnow() - timedelta(seconds=EXPORT_JOB_TIMEOUT)
+    count = ExportJob.query.filter(
+        ExportJob.status.in_(['pending', 'running']),
+        db.func.coalesce(ExportJob.started_at, ExportJob.created_at) < cutoff,
+    ).update({
+        ExportJob.status: 'failed',
+        ExportJob.error: 'Vaqt tugadi: vazifani bajarayotgan jarayon to\'xtagan',
+        ExportJob.finished_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'report': job.report,
+        'format': job.format,
+        'status': job.status,
+        'filename': job.filename,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def job_mimetype(job):
+    return FORMATS[job.format]
+
+
+def run_pending_jobs():
+    """Render jobs still pending, e.g. after the web process restarted. Returns the count."""
+    job_ids = db.session.scalars(
+        db.select(ExportJob.id).where(ExportJob.status == 'pending').order_by(ExportJob.id)
+    ).all()
+    for job_id in job_ids:
+        _render(job_id)
+    return len(job_ids)
+
+
+def purge_export_jobs(older_than_hours=24):
+    """Delete jobs older than `older_than_hours`. Returns the count.
+
+    Files belong to the export cache, which evicts them by size.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    count = ExportJob.query.filter(ExportJob.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return count
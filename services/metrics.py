@@ -0,0 +1,101 @@
+"""
+Prometheus metrikalari: so'rovlar kechikishi, status kodlari va bajarilayotgan so'rovlar.
+
+Har bir Flask endpoint uchun `http_request_duration_seconds` histogrammasi,
+`http_requests_total` hisoblagichi va `http_requests_in_progress` o'lchagichi
+yuritiladi va `/metrics` da Prometheus matn formatida beriladi.
+
+Gunicorn bir nechta worker bilan ishlaganda PROMETHEUS_MULTIPROC_DIR (har
+ishga tushishda bo'shatiladigan katalog) o'rnatilishi kerak: har bir worker o'z
+qiymatlarini shu yerga yozadi va `/metrics` barchasini jamlab qaytaradi.
+Worker to'xtaganda gunicorn `child_exit` hook'idan `mark_worker_dead(pid)` chaqiriladi.
+"""
+import hmac
+import os
+import time
+
+from flask import Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                               Gauge, Histogram, generate_latest, multiprocess)
+
+# Eksport marshrutlari bir necha soniya davom etishi mumkin, shu sabab yuqori bucket'lar bor
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bu endpointlar o'lchanmaydi
+SKIP_ENDPOINTS = {'static', 'metrics', 'ready'}
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency in seconds',
+    ['method', 'endpoint'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    'http_requests_total', 'HTTP requests by status code',
+    ['method', 'endpoint', 'status'],
+)
+IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'HTTP requests currently being served',
+    ['method', 'endpoint'], multiprocess_mode='livesum',
+)
+
+
+def _endpoint_label():
+    # 404 va boshqa mos kelmagan yo'llar bitta label ostida (label soni cheklangan bo'lsin)
+    return request.endpoint or 'unmatched'
+
+
+def _before_request():
+    endpoint = _endpoint_label()
+    if endpoint in SKIP_ENDPOINTS:
+        return
+    g._metrics = (endpoint, time.perf_counter())
+    IN_PROGRESS.labels(request.method, endpoint).inc()
+
+
+def _after_request(response):
+    if g.get('_metrics') is not None:
+        g._metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    started = g.pop('_metrics', None)
+    if started is None:
+        return
+    endpoint, start = started
+    # Qayta ishlanmagan xatoda after_request chaqirilmaydi - bu 500
+    status = g.pop('_metrics_status', 500)
+    method = request.method
+    REQUEST_LATENCY.labels(method, endpoint).observe(time.perf_counter() - start)
+    REQUEST_COUNT.labels(method, endpoint, str(status)).inc()
+    IN_PROGRESS.labels(method, endpoint).dec()
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view():
+    token = os.environ.get('METRICS_TOKEN')
+    # Doimiy vaqtli taqqoslash: token belgilab-belgilab topilmasin
+    if token and not hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                         f'Bearer {token}'.encode()):
+        abort(401)
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Register the request hooks and the /metrics endpoint."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+
+def mark_worker_dead(pid):
+    """Drop a dead worker's live gauges (call from gunicorn's child_exit hook)."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
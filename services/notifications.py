@@ -0,0 +1,86 @@
+"""
+Foydalanuvchi bildirishnomalari (o'qilmaganlar ro'yxati, hisoblagich, o'qildi belgisi).
+
+Brauzer `/api/notifications` ni tez-tez so'raydi, shuning uchun har bir so'rov
+avval bitta yig'ma so'rov (o'qilmaganlar soni va eng katta id) bajaradi; u
+(user_id, is_read, id) indeksining o'zidan o'qiladi. ETag shu ikki qiymatdan
+tuziladi: o'qilmaganlar to'plami faqat yangi qator qo'shilganda (id o'sadi)
+yoki o'qilganda (soni kamayadi) o'zgaradi. Mos kelsa ro'yxat so'rovi
+bajarilmaydi va 304 qaytadi.
+"""
+from sqlalchemy import func, select
+
+from models import db, Notification
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Bitta so'rovda o'qildi deb belgilanadigan id'lar chegarasi
+MAX_MARK_IDS = 1000
+
+
+def _unread(user_id):
+    return (Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
+
+
+def unread_state(user_id):
+    """Return (unread count, largest unread id or 0) in one index-only query."""
+    count, last_id = db.session.execute(
+        select(func.count(Notification.id), func.max(Notification.id)).where(*_unread(user_id))
+    ).one()
+    return count, last_id or 0
+
+
+def page_limit(value):
+    """Clamp the requested page size to 1..MAX_LIMIT (DEFAULT_LIMIT when missing)."""
+    return min(max(value or DEFAULT_LIMIT, 1), MAX_LIMIT)
+
+
+def unread_etag(user_id, count, last_id, since_id, limit):
+    return f'n{user_id}-{last_id}-{count}-{since_id or 0}-{limit}'
+
+
+def unread_notifications(user_id, since_id=None, limit=DEFAULT_LIMIT):
+    """Unread notifications, at most `limit` + 1 rows (the extra row signals has_more).
+
+    Without `since_id`: the newest first (id DESC). With `since_id`: rows with
+    id > since_id, oldest first (id ASC), so the last returned id is the cursor
+    for the next page and no row between since_id and the newest is skipped.
+    """
+    query = select(Notification).where(*_unread(user_id))
+    if since_id:
+        order = Notification.id.asc()
+        query = query.where(Notification.id > since_id)
+    else:
+        order = Notification.id.desc()
+    # id created_at bilan bir xil tartibda o'sadi
+    return db.session.scalars(query.order_by(order).limit(limit + 1)).all()
+
+
+def notification_to_dict(n):
+    return {
+        'id': n.id,
+        'title': n.title,
+        'message': n.message,
+        'type': n.type,
+        'link': n.link,
+        'created_at': n.created_at.strftime('%d.%m.%Y %H:%M') if n.created_at else None,
+    }
+
+
+def mark_read(user_id, ids=None, up_to_id=None):
+    """Mark the user's unread notifications read in a single UPDATE. Returns the row count.
+
+    Either `ids` (explicit list) or `up_to_id` (everything with id <= up_to_id).
+    """
+    query = Notification.query.filter(*_unread(user_id))
+    if ids is not None:
+        if len(ids) > MAX_MARK_IDS:
+            raise ValueError(f'ids: at most {MAX_MARK_IDS} per request')
+        query = query.filter(Notification.id.in_(ids))
+    elif up_to_id is not None:
+        query = query.filter(Notification.id <= up_to_id)
+    else:
+        raise ValueError('ids or up_to_id is required')
+    updated = query.update({Notification.is_read: True}, synchronize_session=False)
+    db.session.commit()
+    return updated
@@ -0,0 +1,49 @@
+"""
+N+1 so'rov detektori (debug rejimi uchun).
+
+Har bir so'rov (request) davomida bir xil matnli SELECT'lar sanaladi. Bitta
+statement chegaradan (NPLUSONE_THRESHOLD) ko'p bajarilsa, bu odatda shablonda
+lazy relationship'ni har bir qator uchun yuklash belgisi: log yoziladi yoki
+NPLUSONE_RAISE=true bo'lsa xato ko'tariladi.
+"""
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+def init_nplusone(app):
+    """Install the detector when NPLUSONE_DETECT is set or the app runs in debug mode."""
+    if not (app.config.get('NPLUSONE_DETECT') or app.debug):
+        return
+
+    threshold = app.config.get('NPLUSONE_THRESHOLD', 5)
+    should_raise = app.config.get('NPLUSONE_RAISE', False)
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _count_selects(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or not statement.lstrip()[:6].upper() == 'SELECT':
+            return
+        counts = g.get('_nplusone_counts')
+        if counts is None:
+            counts = g._nplusone_counts = Counter()
+        counts[statement] += 1
+
+    @app.after_request
+    def _check_nplusone(response):
+        counts = g.pop('_nplusone_counts', None)
+        if not counts:
+            return response
+        statement, repeats = counts.most_common(1)[0]
+        if repeats >= threshold:
+            message = (f'N+1 query in {request.endpoint}: statement executed {repeats} times\n'
+                       f'{statement}')
+            if should_raise:
+                raise NPlusOneError(message)
+            app.logger.warning(message)
+        return response
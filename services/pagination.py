@@ -0,0 +1,97 @@
+"""
+Keyset (cursor) pagination for list views.
+
+OFFSET o'rniga oxirgi ko'rsatilgan qatorning (created_at, id) qiymatidan keyingi
+qatorlar olinadi, shuning uchun chuqur sahifalar ham birinchi sahifa kabi arzon.
+Kursor URL uchun xavfsiz base64 (JSON) ko'rinishida uzatiladi.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPage:
+    """One page of results plus the cursor for the next page (None on the last page)."""
+
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    @property
+    def next_url(self):
+        """URL of the next page; keeps the current query args (search, filters)."""
+        args = request.args.to_dict(flat=False)
+        args.update(cursor=self.next_cursor, limit=self.limit)
+        return url_for(request.endpoint, **{**(request.view_args or {}), **args})
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([_encode_value(sort_value), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (sort_value, id) or None if the cursor is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return _decode_value(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def page_size_arg(default=DEFAULT_PAGE_SIZE):
+    limit = request.args.get('limit', default, type=int)
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=None, sort_value=None):
+    """Paginate `query` newest-first on (sort_column, id_column).
+
+    `cursor` and `limit` default to the `cursor` / `limit` request args.
+    `sort_value(row)` is needed when `sort_column` is an expression, not a column.
+    """
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    if limit is None:
+        limit = page_size_arg()
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(*position))
+
+    # Bitta ortiqcha qator keyingi sahifa bor-yo'qligini bildiradi
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        last_sort = sort_value(last) if sort_value else getattr(last, sort_column.key)
+        next_cursor = encode_cursor(last_sort, getattr(last, id_column.key))
+    return KeysetPage(items, next_cursor, limit)
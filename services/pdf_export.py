@@ -0,0 +1,225 @@
+"""
+PDF hisobotlar (reportlab).
+
+Shrift, uslublar va jadval shablonlari jarayon davomida bir marta tayyorlanadi
+va barcha hisobotlarda qayta ishlatiladi. Shrift sifatida TrueType (DejaVuSans,
+topilmasa reportlab bilan keladigan Vera) ro'yxatdan o'tkaziladi, shu sabab
+o'zbekcha (lotin va kirill) matn to'g'ri chiqadi; yo'lni PDF_FONT_PATH /
+PDF_FONT_BOLD_PATH bilan berish mumkin.
+
+Ikki turdagi hisobot bor:
+
+* jadval (`write_table_pdf`): qatorlar sahifa sig'imi bo'yicha bo'laklarga
+  bo'linadi, har bir sahifa alohida Table bo'ladi;
+* yozuvlar (`write_records_pdf`): har bir yozuv (masalan mehmon) sarlavha va
+  "nomi: qiymati" jadvali sifatida, bir hujjatda ketma-ket.
+
+Ikkala holatda ham flowable'lar generatordan hujjat ularni joylashtirgan sari
+olinadi, shuning uchun katta hisobot butunligicha xotirada turmaydi.
+"""
+import os
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+FONT_NAME = 'AppSans'
+FONT_BOLD_NAME = 'AppSans-Bold'
+
+_FONT_DIRS = [
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/dejavu',
+    '/usr/local/share/fonts',
+    '/Library/Fonts',
+    'C:\\Windows\\Fonts',
+]
+
+TABLE_FONT_SIZE = 8
+TABLE_ROW_HEIGHT = 14
+TABLE_HEADER_HEIGHT = 18
+
+
+def _find_font(env_name, filename, fallback):
+    path = os.getenv(env_name)
+    if path:
+        return path
+    for directory in _FONT_DIRS:
+        candidate = os.path.join(directory, filename)
+        if os.path.exists(candidate):
+            return candidate
+    import reportlab
+    return os.path.join(os.path.dirname(reportlab.__file__), 'fonts', fallback)
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """Register the report fonts once per process. Returns (regular, bold) font names."""
+    pdfmetrics.registerFont(TTFont(FONT_NAME, _find_font('PDF_FONT_PATH', 'DejaVuSans.ttf', 'Vera.ttf')))
+    pdfmetrics.registerFont(TTFont(FONT_BOLD_NAME, _find_font('PDF_FONT_BOLD_PATH', 'DejaVuSans-Bold.ttf', 'VeraBd.ttf')))
+    pdfmetrics.registerFontFamily(FONT_NAME, normal=FONT_NAME, bold=FONT_BOLD_NAME,
+                                  italic=FONT_NAME, boldItalic=FONT_BOLD_NAME)
+    return FONT_NAME, FONT_BOLD_NAME
+
+
+@lru_cache(maxsize=None)
+def styles():
+    """Paragraph styles shared by all reports."""
+    regular, bold = register_fonts()
+    base = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('ReportTitle', parent=base['Heading1'], fontName=bold, fontSize=20,
+                                textColor=colors.HexColor('#1a1a1a'), spaceAfter=20, alignment=1),
+        'subtitle': ParagraphStyle('ReportSubtitle', parent=base['Normal'], fontName=regular, fontSize=10,
+                                   textColor=colors.HexColor('#555555'), spaceAfter=10, alignment=1),
+        'heading': ParagraphStyle('RecordHeading', parent=base['Heading2'], fontName=bold, fontSize=14,
+                                  textColor=colors.HexColor('#2c3e50'), spaceBefore=12, spaceAfter=6),
+        'cell': ParagraphStyle('RecordCell', parent=base['Normal'], fontName=regular, fontSize=10, leading=13),
+    }
+
+
+@lru_cache(maxsize=None)
+def table_style():
+    """Grid table with a dark header row and striped body."""
+    regular, bold = register_fonts()
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, -1), regular),
+        ('FONTNAME', (0, 0), (-1, 0), bold),
+        ('FONTSIZE', (0, 0), (-1, -1), TABLE_FONT_SIZE),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+    ])
+
+
+@lru_cache(maxsize=None)
+def record_style():
+    """Two-column "label: value" table used for one record."""
+    regular, bold = register_fonts()
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e8e8e8')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTNAME', (0, 0), (-1, -1), regular),
+        ('FONTNAME', (0, 0), (0, -1), bold),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ])
+
+
+class _FlowableStream(list):
+    """A story list that pulls flowables from an iterator as the document consumes them.
+
+    The doc template only looks at the front of the story (and deletes from
+    it), so keeping a few items buffered is enough.
+    """
+
+    def __init__(self, flowables, lookahead=4):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and len(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._fill()
+
+
+def _cell(value):
+    return '-' if value is None else str(value)
+
+
+def _title_flowables(title, subtitle=None):
+    flowables = [Paragraph(escape(title), styles()['title'])]
+    if subtitle:
+        flowables.append(Paragraph(escape(subtitle), styles()['subtitle']))
+    flowables.append(Spacer(1, 0.2 * inch))
+    return flowables
+
+
+def _height(flowables, width, height):
+    total = 0
+    for flowable in flowables:
+        total += flowable.wrap(width, height)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    return total
+
+
+def _page_tables(doc, header_flowables, headers, rows, col_widths):
+    yield from header_flowables
+    # Qator balandligi qat'iy: sahifaga nechta qator sig'ishi oldindan ma'lum
+    first_page = doc.height - _height(header_flowables, doc.width, doc.height)
+    capacity = max(1, int((first_page - TABLE_HEADER_HEIGHT) // TABLE_ROW_HEIGHT) - 1)
+    per_page = max(1, int((doc.height - TABLE_HEADER_HEIGHT) // TABLE_ROW_HEIGHT) - 1)
+
+    page = []
+    emitted = False
+    for row in rows:
+        page.append([_cell(value) for value in row])
+        if len(page) >= capacity:
+            yield _grid(headers, page, col_widths)
+            page = []
+            capacity = per_page
+            emitted = True
+    # Bo'sh hisobotda ham sarlavha qatori chiqadi
+    if page or not emitted:
+        yield _grid(headers, page, col_widths)
+
+
+def _grid(headers, rows, col_widths):
+    table = Table([list(headers)] + rows, colWidths=col_widths, repeatRows=1,
+                  rowHeights=[TABLE_HEADER_HEIGHT] + [TABLE_ROW_HEIGHT] * len(rows))
+    table.setStyle(table_style())
+    return table
+
+
+def write_table_pdf(fileobj, title, headers, rows, col_widths=None, subtitle=None):
+    """Render a titled table of `headers` and `rows` (any iterable) into `fileobj`."""
+    register_fonts()
+    pagesize = landscape(A4) if len(headers) > 7 else A4
+    doc = SimpleDocTemplate(fileobj, pagesize=pagesize,
+                            leftMargin=0.5 * inch, rightMargin=0.5 * inch)
+    if col_widths is None:
+        col_widths = [doc.width / len(headers)] * len(headers)
+    doc.build(_FlowableStream(_page_tables(doc, _title_flowables(title, subtitle), headers, rows, col_widths)))
+
+
+def _record_flowables(doc, title, subtitle, records):
+    yield from _title_flowables(title, subtitle)
+    cell = styles()['cell']
+    label_width = 2 * inch
+    for heading, fields in records:
+        data = [[label, Paragraph(escape(_cell(value)), cell)] for label, value in fields]
+        table = Table(data, colWidths=[label_width, doc.width - label_width])
+        table.setStyle(record_style())
+        block = [table, Spacer(1, 0.2 * inch)]
+        if heading:
+            block.insert(0, Paragraph(escape(heading), styles()['heading']))
+        yield KeepTogether(block)
+
+
+def write_records_pdf(fileobj, title, records, subtitle=None):
+    """Render `records` as consecutive label/value tables into `fileobj`.
+
+    `records` is an iterable of (heading, [(label, value), ...]) pairs.
+    """
+    register_fonts()
+    doc = SimpleDocTemplate(fileobj, pagesize=A4)
+    doc.build(_FlowableStream(_record_flowables(doc, title, subtitle, records)))
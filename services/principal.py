@@ -0,0 +1,81 @@
+"""
+Keshlangan so'rov egasi (principal): `current_user` uchun yengil obyekt.
+
+`login_manager.user_loader` har so'rovda User'ni va uning modullarini bazadan
+o'qimasligi uchun id, rol, faollik, ism va modullar to'plami (frozenset) jarayon
+ichidagi TTL keshda saqlanadi. Ruxsat tekshiruvi kesh mavjud bo'lsa bitta ham
+so'rov yubormaydi.
+
+Rol, faollik yoki modullar o'zgarganda `invalidate_principal(user_id)` chaqiriladi.
+Boshqa worker'lar eski qiymatni ko'pi bilan PRINCIPAL_CACHE_TTL soniya ko'radi.
+Kesh asosiy bazadan to'ldiriladi (replikadagi eski rol keshga tushmasin).
+"""
+import os
+
+from flask_login import UserMixin
+from sqlalchemy import select
+
+from models import db, User, UserModule
+from services.cache import TTLCache
+from services.replica import primary_reads
+
+PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '60'))
+
+_cache = TTLCache(ttl=PRINCIPAL_CACHE_TTL, maxsize=4096)
+
+
+class Principal(UserMixin):
+    """Cached view of a user for permission checks.
+
+    Attributes that are not cached (photo, department, relationships, ...) are
+    read from the User row, loaded on first access.
+    """
+
+    def __init__(self, id, role, active, full_name, modules):
+        self.id = id
+        self.role = role
+        self._active = active
+        self.full_name = full_name
+        self.modules = modules
+
+    @property
+    def is_active(self):
+        return self._active
+
+    def has_module_access(self, module_name):
+        if self.role in ['admin', 'rahbar']:
+            return True
+        return module_name in self.modules
+
+    @property
+    def user(self):
+        return db.session.get(User, self.id)
+
+    def __getattr__(self, name):
+        # Faqat keshda yo'q atributlar uchun chaqiriladi
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+
+def _load(user_id):
+    rows = db.session.execute(
+        select(User.id, User.role, User.is_active, User.full_name, UserModule.module_name)
+        .outerjoin(UserModule, UserModule.user_id == User.id)
+        .where(User.id == user_id)
+    ).all()
+    if not rows:
+        return None
+    _, role, active, full_name, _ = rows[0]
+    modules = frozenset(row.module_name for row in rows if row.module_name is not None)
+    return Principal(user_id, role, bool(active), full_name, modules)
+
+
+def load_principal(user_id):
+    """Return the cached Principal for `user_id`, or None if the user does not exist."""
+    with primary_reads():
+        return _cache.get_or_set(user_id, lambda: _load(user_id))
+
+
+def invalidate_principal(user_id):
+    _cache.delete(user_id)
@@ -0,0 +1,164 @@
+"""
+O'qish so'rovlarini replika bazaga yo'naltirish (ixtiyoriy).
+
+DATABASE_REPLICA_URL berilsa u `replica` bind sifatida ulanadi. `@replica_reads`
+bilan belgilangan endpointlarda sessiyaning SELECT so'rovlari replikaga
+ketadi; qolgan hamma narsa (yozish, flush, FOR UPDATE, CLI, fon vazifalari)
+asosiy bazada qoladi.
+
+Asosiy bazaga qaytish holatlari:
+
+* replika sozlanmagan yoki ulanib bo'lmaydi;
+* replika REPLICA_MAX_LAG_SECONDS dan ko'proq orqada (holat har
+  REPLICA_CHECK_INTERVAL soniyada bir marta, har bir jarayonda tekshiriladi);
+* shu so'rovda yozish bo'lgan (o'z yozganini o'qish);
+* foydalanuvchi oxirgi REPLICA_STICKY_SECONDS ichida yozgan (masalan
+  POST -> redirect -> ro'yxat sahifasi), belgi Flask sessiyasida saqlanadi;
+* `primary_reads()` bloki ichida: worker'dagi umumiy keshlar (dashboard,
+  principal) replikadan eskirgan qiymat bilan to'ldirilmasligi uchun.
+
+Lokal sinov: ikki SQLite fayl (DATABASE_URL va DATABASE_REPLICA_URL), replika
+fayli asosiydan nusxa ko'chirib yangilanadi; `flask replica-status` holatni ko'rsatadi.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = 'replica'
+
+logger = logging.getLogger(__name__)
+
+_settings = {'max_lag': 5.0, 'check_interval': 5.0, 'sticky': 10.0}
+
+_health_lock = threading.Lock()
+_health = {'checked': 0.0, 'healthy': False, 'lag': None, 'error': None}
+
+_LAG_QUERIES = {
+    # Yozuvlar bo'lmaganda replay_timestamp eskiradi, shuning uchun LSN teng bo'lsa lag 0
+    'postgresql': """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """,
+}
+
+
+def _measure_lag(engine):
+    query = _LAG_QUERIES.get(engine.dialect.name, 'SELECT 0')
+    with engine.connect() as connection:
+        return float(connection.execute(text(query)).scalar() or 0)
+
+
+def check_replica(engine, force=False):
+    """Return the cached health dict of the replica, refreshing it when stale."""
+    now = time.monotonic()
+    if not force and now - _health['checked'] < _settings['check_interval']:
+        return _health
+    with _health_lock:
+        if not force and now - _health['checked'] < _settings['check_interval']:
+            return _health
+        try:
+            lag = _measure_lag(engine)
+            healthy = lag <= _settings['max_lag']
+            error = None if healthy else f'lag {lag:.1f}s'
+        except Exception as exc:
+            lag, healthy, error = None, False, str(exc)
+        if healthy != _health['healthy'] and _health['checked']:
+            logger.warning('Replica %s%s', 'healthy' if healthy else 'unavailable, reading from primary: ',
+                           '' if healthy else error)
+        _health.update(checked=time.monotonic(), healthy=healthy, lag=lag, error=error)
+    return _health
+
+
+def _replica_engine(engines):
+    engine = engines.get(REPLICA_BIND)
+    if engine is None or not check_replica(engine)['healthy']:
+        return None
+    return engine
+
+
+def _routing_to_replica():
+    return has_request_context() and g.get('_replica_reads') and not g.get('_replica_wrote')
+
+
+def _mark_written():
+    if has_request_context():
+        g._replica_wrote = True
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs of `@replica_reads` requests to the replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if getattr(clause, 'is_dml', False):
+                # Core INSERT/UPDATE (masalan bulk import) flush'siz ham yozish hisoblanadi
+                _mark_written()
+            elif (_routing_to_replica() and not self._flushing and getattr(clause, 'is_select', False)
+                    and getattr(clause, '_for_update_arg', None) is None):
+                engine = _replica_engine(self._db.engines)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_writes(session, flush_context):
+    _mark_written()
+
+
+def replica_reads(f):
+    """Route this view's read queries to the replica (when configured and fresh)."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+            # Yaqinda yozgan foydalanuvchi o'z o'zgarishini ko'rishi uchun asosiy bazadan o'qiydi
+            g._replica_reads = session.get('_read_primary_until', 0) < time.time()
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block (e.g. while filling a cache shared by all requests)."""
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('_replica_reads')
+    g._replica_reads = False
+    try:
+        yield
+    finally:
+        g._replica_reads = previous
+
+
+def read_engine(db):
+    """Engine for Core reads (e.g. streamed exports): the replica when routing allows it."""
+    if _routing_to_replica():
+        engine = _replica_engine(db.engines)
+        if engine is not None:
+            return engine
+    return db.engine
+
+
+def init_replica(app):
+    """Read the replica settings and remember writers when a replica bind is configured."""
+    _settings['max_lag'] = float(app.config.get('REPLICA_MAX_LAG_SECONDS', 5))
+    _settings['check_interval'] = float(app.config.get('REPLICA_CHECK_INTERVAL', 5))
+    _settings['sticky'] = float(app.config.get('REPLICA_STICKY_SECONDS', 10))
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    @app.after_request
+    def _remember_write(response):
+        if g.get('_replica_wrote'):
+            session['_read_primary_until'] = time.time() + _settings['sticky']
+        return response
@@ -0,0 +1,199 @@
+"""
+Modullar bo'yicha jadval hisobotlari (eksport ta'riflari).
+
+Har bir hisobot: modul (ruxsat tekshiruvi uchun), varaq sarlavhasi, fayl nomi,
+so'rov va ustunlar ro'yxati. Qatorlar `yield_per` bilan bo'laklab o'qiladi,
+shu sabab hisobot hajmi xotiraga ta'sir qilmaydi.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from models import (User, Task, TaskAssignment, Vehicle, Building, BuildingCategory, GreenSpace,
+                    GreenSpaceCategory, SolarPanel, OutsourcingService, Organization, Guest,
+                    Celebration, Contract)
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _text(attr):
+    return lambda obj: getattr(obj, attr) or '-'
+
+
+def _number(attr):
+    return lambda obj: getattr(obj, attr) or 0
+
+
+def _date(attr, fmt='%d.%m.%Y'):
+    def getter(obj):
+        value = getattr(obj, attr)
+        return value.strftime(fmt) if value else '-'
+    return getter
+
+
+def _user_name(relationship):
+    def getter(obj):
+        user = getattr(obj, relationship)
+        return user.full_name if user else '-'
+    return getter
+
+
+class Report:
+    """A tabular export of one module.
+
+    `depends` lists the models whose rows appear in the report (for the export
+    cache); `scope(user)` returns what makes the rows differ between users.
+    """
+
+    def __init__(self, name, module, title, filename, query, columns, depends, scope=None):
+        self.name = name
+        self.module = module
+        self.title = title
+        self.filename = filename
+        self.query = query
+        self.columns = columns
+        self.depends = depends
+        self.scope = scope or (lambda user: None)
+
+    @property
+    def headers(self):
+        return ['№'] + [header for header, _ in self.columns]
+
+    def rows(self, user):
+        """Yield one list per row for `user`, fetching in EXPORT_CHUNK_SIZE chunks."""
+        getters = [getter for _, getter in self.columns]
+        query = self.query(user).yield_per(EXPORT_CHUNK_SIZE)
+        for index, obj in enumerate(query, 1):
+            yield [index] + [getter(obj) for getter in getters]
+
+    def download_name(self, extension):
+        return f'{self.filename}_{datetime.now().strftime("%Y%m%d")}.{extension}'
+
+
+def _tasks_scope(user):
+    return None if user.role in ['admin', 'rahbar'] else user.id
+
+
+def _tasks_query(user):
+    query = Task.query.options(joinedload(Task.creator)).order_by(Task.id)
+    if user.role not in ['admin', 'rahbar']:
+        user_task_ids = select(TaskAssignment.task_id).where(TaskAssignment.user_id == user.id)
+        query = query.filter(Task.id.in_(user_task_ids))
+    return query
+
+
+REPORTS = {report.name: report for report in [
+    Report('tasks', 'tasks', 'Topshiriqlar', 'topshiriqlar', _tasks_query, [
+        ('Nomi', _text('title')),
+        ('Ustuvorlik', _text('priority')),
+        ('Holati', _text('status')),
+        ('Boshlanish', _date('start_date')),
+        ('Muddat', _date('due_date')),
+        ('Yakunlangan', _date('completion_date')),
+        ('Yaratuvchi', _user_name('creator')),
+        ('Yaratilgan', _date('created_at', '%d.%m.%Y %H:%M')),
+    ], (Task, TaskAssignment, User), scope=_tasks_scope),
+    Report('vehicles', 'vehicles', 'Transport Vositalari', 'transport_hisoboti',
+           lambda user: Vehicle.query.options(joinedload(Vehicle.driver)).order_by(Vehicle.id), [
+        ('Markasi', _text('brand')),
+        ('Modeli', _text('model')),
+        ('Raqami', _text('license_plate')),
+        ('Yili', _text('year')),
+        ('Rangi', _text('color')),
+        ('Holati', _text('status')),
+        ('Haydovchi', _user_name('driver')),
+        ('So\'nggi remont', _date('last_maintenance')),
+        ('Keyingi remont', _date('next_maintenance')),
+        ('Defektlar', _text('defects')),
+    ], (Vehicle, User)),
+    Report('buildings', 'buildings', 'Binolar', 'binolar',
+           lambda user: Building.query.options(joinedload(Building.category)).order_by(Building.id), [
+        ('Nomi', _text('name')),
+        ('Kategoriya', lambda obj: obj.category.name if obj.category else '-'),
+        ('Manzil', _text('address')),
+        ('Maydon', _number('area')),
+        ('Qavatlar', _text('floors')),
+        ('Xonalar', _text('rooms')),
+        ('Qurilgan yili', _text('construction_year')),
+        ('Holati', _text('status')),
+    ], (Building, BuildingCategory)),
+    Report('greenspaces', 'greenspaces', 'Yashil hududlar', 'yashil_hududlar',
+           lambda user: GreenSpace.query.options(joinedload(GreenSpace.category)).order_by(GreenSpace.id), [
+        ('Nomi', _text('name')),
+        ('Kategoriya', lambda obj: obj.category.name if obj.category else '-'),
+        ('Joylashuv', _text('location')),
+        ('Maydon', _number('area')),
+        ('O\'simliklar', _text('plant_types')),
+        ('Parvarish jadvali', _text('maintenance_schedule')),
+        ('Holati', _text('status')),
+    ], (GreenSpace, GreenSpaceCategory)),
+    Report('solarpanels', 'solarpanels', 'Quyosh panellari', 'quyosh_panellari',
+           lambda user: SolarPanel.query.options(joinedload(SolarPanel.building)).order_by(SolarPanel.id), [
+        ('Bino', lambda obj: obj.building.name if obj.building else '-'),
+        ('Turi', _text('panel_type')),
+        ('Quvvati (kW)', _number('capacity')),
+        ('Ishlab chiqaruvchi', _text('manufacturer')),
+        ('Modeli', _text('model')),
+        ('Samaradorlik', _number('efficiency')),
+        ('O\'rnatilgan', _date('installation_date')),
+        ('Holati', _text('status')),
+    ], (SolarPanel, Building)),
+    Report('outsourcing', 'outsourcing', 'Outsorsing', 'outsorsing',
+           lambda user: OutsourcingService.query.order_by(OutsourcingService.id), [
+        ('Xizmat', _text('service_name')),
+        ('Ijrochi', _text('provider_name')),
+        ('Shartnoma raqami', _text('contract_number')),
+        ('Shartnoma sanasi', _date('contract_date')),
+        ('Boshlanish', _date('start_date')),
+        ('Tugash', _date('end_date')),
+        ('Narxi', _number('cost')),
+        ('Holati', _text('status')),
+        ('Mas\'ul shaxs', _text('contact_person')),
+        ('Telefon', _text('contact_phone')),
+    ], (OutsourcingService,)),
+    Report('organizations', 'organizations', 'Tashkilotlar', 'tashkilotlar',
+           lambda user: Organization.query.order_by(Organization.id), [
+        ('Nomi', _text('name')),
+        ('Xodimlar soni', _number('employee_count')),
+        ('Bino maydoni', _number('building_area')),
+        ('Manzil', _text('address')),
+        ('Telefon', _text('phone')),
+        ('Email', _text('email')),
+        ('Veb-sayt', _text('website')),
+        ('Tashkil etilgan', _date('established_date')),
+    ], (Organization,)),
+    Report('guests', 'guests', 'Mehmonlar', 'mehmonlar',
+           lambda user: Guest.query.order_by(Guest.id), [
+        ('F.I.O', _text('full_name')),
+        ('Tashkilot', _text('organization')),
+        ('Lavozim', _text('position')),
+        ('Kelgan sana', _date('arrival_date')),
+        ('Ketgan sana', _date('departure_date')),
+        ('Tashrif maqsadi', _text('visit_purpose')),
+        ('Restoran', _number('restaurant_expense')),
+        ('Sovg\'a', _number('gift_expense')),
+        ('Boshqa xarajatlar', _number('other_expenses')),
+        ('Jami xarajat', _number('total_expense')),
+    ], (Guest,)),
+    Report('celebrations', 'celebrations', 'Tabriknomalar', 'tabriknomalar',
+           lambda user: Celebration.query.options(joinedload(Celebration.recipient)).order_by(Celebration.id), [
+        ('Sarlavha', _text('title')),
+        ('Turi', _text('type')),
+        ('Kimga', _user_name('recipient')),
+        ('Sana', _date('date')),
+        ('Sovg\'a', _text('gift_description')),
+        ('Sovg\'a qiymati', _number('gift_value')),
+        ('Holati', _text('status')),
+    ], (Celebration, User)),
+    Report('contracts', 'contracts', 'Shartnomalar', 'shartnomalar',
+           lambda user: Contract.query.order_by(Contract.id), [
+        ('Shartnoma raqami', _text('contract_number')),
+        ('Sana', _date('contract_date')),
+        ('Firma nomi', _text('company_name')),
+        ('Summa', _number('contract_amount')),
+        ('To\'lov sanasi', _date('payment_date')),
+        ('Holati', _text('status')),
+        ('Izoh', _text('notes')),
+    ], (Contract,)),
+]}
@@ -0,0 +1,261 @@
+"""
+Global qidiruv (topshiriqlar, izohlar, shartnomalar, mehmonlar, tashkilotlar,
+binolar, outsorsing).
+
+Indeks bazaning o'zida saqlanadi va trigger/generated column orqali har bir
+INSERT/UPDATE/DELETE da yangilanadi (ORM, bulk import yoki qo'lda SQL farqi yo'q):
+
+* SQLite: bitta FTS5 `search_index` jadvali. rowid = id * 8 + manba kodi,
+  shuning uchun yangilash/o'chirish rowid bo'yicha (butun indeksni ko'rmasdan).
+  Tartib bm25 bo'yicha, sarlavha ustunlari tavsifdan og'irroq.
+* Postgres: har bir jadvalda `search_vector` tsvector generated ustuni va GIN
+  indeks; natijalar ts_rank bo'yicha UNION ALL qilib birlashtiriladi.
+
+Ikkalasida ham 'simple' tokenizatsiya (o'zbek tili uchun stemmer yo'q) va har
+bir so'z prefiks sifatida qidiriladi ("shart" -> "shartnoma").
+
+Indeks `flask db upgrade` (0005) yoki `flask init-db` da yaratiladi;
+`flask search-index --rebuild` SQLite indeksini noldan quradi.
+"""
+import re
+from collections import namedtuple
+
+from sqlalchemy import bindparam, text
+
+INDEX_TABLE = 'search_index'
+VECTOR_COLUMN = 'search_vector'
+# rowid = id * KIND_SLOTS + code
+KIND_SLOTS = 8
+MAX_TERMS = 8
+
+SearchSource = namedtuple('SearchSource', 'code kind table module title_columns body_columns label')
+
+SOURCES = [
+    SearchSource(1, 'task', 'tasks', 'tasks', ('title',), ('description',), 'Topshiriq'),
+    SearchSource(2, 'task_comment', 'task_comments', 'tasks', (), ('comment',), 'Izoh'),
+    SearchSource(3, 'contract', 'contracts', 'contracts', ('contract_number', 'company_name'), ('description',), 'Shartnoma'),
+    SearchSource(4, 'guest', 'guests', 'guests', ('full_name', 'organization'), (), 'Mehmon'),
+    SearchSource(5, 'organization', 'organizations', 'organizations', ('name',), (), 'Tashkilot'),
+    SearchSource(6, 'building', 'buildings', 'buildings', ('name',), ('address',), 'Bino'),
+    SearchSource(7, 'outsourcing', 'outsourcing_services', 'outsourcing', ('service_name', 'provider_name'), (), 'Outsorsing'),
+]
+SOURCES_BY_CODE = {source.code: source for source in SOURCES}
+
+# Izohlar uchun `task_id` (havola topshiriqqa), boshqalar uchun id ning o'zi
+SearchResult = namedtuple('SearchResult', 'kind label id task_id title snippet rank')
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Split user input into at most MAX_TERMS lowercase word tokens (no query syntax)."""
+    return [term.lower() for term in _TERM_RE.findall(query or '')][:MAX_TERMS]
+
+
+def _concat(columns, prefix):
+    if not columns:
+        return "''"
+    # Ajratgich tokenizatsiyaga ta'sir qilmaydi, natijada ustunlarni ajratib ko'rsatadi
+    return " || ' - ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+
+
+# ---------- DDL ----------
+
+def is_search_index_object(name, type_):
+    """True for schema objects created here rather than by the models (for Alembic autogenerate)."""
+    if type_ == 'table':
+        return name == INDEX_TABLE or name.startswith(INDEX_TABLE + '_')
+    if type_ == 'column':
+        return name == VECTOR_COLUMN
+    if type_ == 'index':
+        return (name or '').endswith('_' + VECTOR_COLUMN)
+    return False
+
+
+def _sqlite_ddl():
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    ]
+    for source in SOURCES:
+        rowid = f'{{row}}.id * {KIND_SLOTS} + {source.code}'
+        insert = (f"INSERT INTO {INDEX_TABLE}(rowid, title, body) VALUES ({rowid.format(row='new')}, "
+                  f"{_concat(source.title_columns, 'new.')}, {_concat(source.body_columns, 'new.')});")
+        delete = f"DELETE FROM {INDEX_TABLE} WHERE rowid = {rowid.format(row='old')};"
+        columns = ', '.join(source.title_columns + source.body_columns)
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_ai AFTER INSERT ON {source.table} "
+            f"BEGIN {insert} END",
+            # Faqat matn ustunlari o'zgarganda (masalan status yangilanishi indeksga tegmaydi)
+            f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_au AFTER UPDATE OF id, {columns} ON {source.table} "
+            f"BEGIN {delete} {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_ad AFTER DELETE ON {source.table} "
+            f"BEGIN {delete} END",
+        ]
+    return statements
+
+
+def _postgres_vector(source):
+    parts = [f"setweight(to_tsvector('simple', {_concat(source.title_columns, '')}), 'A')"
+             if source.title_columns else None,
+             f"setweight(to_tsvector('simple', {_concat(source.body_columns, '')}), 'B')"
+             if source.body_columns else None]
+    return ' || '.join(part for part in parts if part)
+
+
+def _postgres_ddl():
+    statements = []
+    for source in SOURCES:
+        statements += [
+            f"ALTER TABLE {source.table} ADD COLUMN IF NOT EXISTS {VECTOR_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS ({_postgres_vector(source)}) STORED",
+            f"CREATE INDEX IF NOT EXISTS ix_{source.table}_{VECTOR_COLUMN} "
+            f"ON {source.table} USING gin ({VECTOR_COLUMN})",
+        ]
+    return statements
+
+
+def ensure_search_index(connection):
+    """Create the index objects for the connection's dialect (idempotent).
+
+    Returns True when the SQLite index was just created and needs a backfill.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        created = not connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': INDEX_TABLE}
+        ).first()
+        for statement in _sqlite_ddl():
+            connection.execute(text(statement))
+        if created:
+            rebuild_search_index(connection)
+        return created
+    if dialect == 'postgresql':
+        # Generated ustun qo'shilganda mavjud qatorlar ham hisoblanadi
+        for statement in _postgres_ddl():
+            connection.execute(text(statement))
+    return False
+
+
+def drop_search_index(connection):
+    dialect = connection.dialect.name
+    for source in SOURCES:
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'au', 'ad'):
+                connection.execute(text(f'DROP TRIGGER IF EXISTS {source.table}_search_{suffix}'))
+        elif dialect == 'postgresql':
+            connection.execute(text(f'DROP INDEX IF EXISTS ix_{source.table}_{VECTOR_COLUMN}'))
+            connection.execute(text(f'ALTER TABLE {source.table} DROP COLUMN IF EXISTS {VECTOR_COLUMN}'))
+    if dialect == 'sqlite':
+        connection.execute(text(f'DROP TABLE IF EXISTS {INDEX_TABLE}'))
+
+
+def rebuild_search_index(connection):
+    """Refill the SQLite FTS index from the source tables. Returns the row count."""
+    if connection.dialect.name != 'sqlite':
+        return 0
+    connection.execute(text(f'DELETE FROM {INDEX_TABLE}'))
+    for source in SOURCES:
+        connection.execute(text(
+            f"INSERT INTO {INDEX_TABLE}(rowid, title, body) "
+            f"SELECT id * {KIND_SLOTS} + {source.code}, {_concat(source.title_columns, '')}, "
+            f"{_concat(source.body_columns, '')} FROM {source.table}"
+        ))
+    # Segmentlarni birlashtirish: keyingi qidiruvlar tezroq
+    connection.execute(text(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"))
+    return connection.execute(text(f'SELECT count(*) FROM {INDEX_TABLE}')).scalar()
+
+
+# ---------- Qidiruv ----------
+
+_ASSIGNED_TASKS = 'SELECT task_id FROM task_assignments WHERE user_id = :user_id'
+
+
+def _sqlite_task_filter(code_sql, id_sql):
+    # Topshiriq (1) va izoh (2) natijalari faqat biriktirilgan topshiriqlardan
+    return (f" AND ({code_sql} NOT IN (1, 2)"
+            f" OR ({code_sql} = 1 AND {id_sql} IN ({_ASSIGNED_TASKS}))"
+            f" OR ({code_sql} = 2 AND {id_sql} IN (SELECT id FROM task_comments WHERE task_id IN ({_ASSIGNED_TASKS}))))")
+
+
+def _search_sqlite(connection, terms, sources, restrict_user, limit):
+    # Har bir so'z qo'shtirnoqda (FTS5 sintaksisi sifatida talqin qilinmaydi) va prefiks
+    match = ' '.join(f'"{term}"*' for term in terms)
+    codes = ', '.join(str(source.code) for source in sources)
+    code_sql, id_sql = f'(rowid % {KIND_SLOTS})', f'(rowid / {KIND_SLOTS})'
+    rows = connection.execute(text(
+        f"SELECT rowid, title, body, bm25({INDEX_TABLE}, 10.0, 1.0) AS rank FROM {INDEX_TABLE} "
+        f"WHERE {INDEX_TABLE} MATCH :match AND {code_sql} IN ({codes})"
+        f"{_sqlite_task_filter(code_sql, id_sql) if restrict_user is not None else ''} "
+        f"ORDER BY rank LIMIT :limit"
+    ), {'match': match, 'limit': limit, 'user_id': restrict_user})
+    # bm25 manfiy: kichigi yaxshiroq
+    return [(row.rowid % KIND_SLOTS, row.rowid // KIND_SLOTS, row.title, row.body, -row.rank) for row in rows]
+
+
+def _search_postgres(connection, terms, sources, restrict_user, limit):
+    parts = []
+    for source in sources:
+        condition = f'{VECTOR_COLUMN} @@ q'
+        if restrict_user is not None and source.code in (1, 2):
+            condition += f" AND {'id' if source.code == 1 else 'task_id'} IN ({_ASSIGNED_TASKS})"
+        # Har bir manbadan eng yaxshi `limit` tasi (GIN indeks bilan), so'ng umumiy tartib
+        parts.append(
+            f"(SELECT {source.code} AS code, id, {_concat(source.title_columns, '')} AS title, "
+            f"{_concat(source.body_columns, '')} AS body, ts_rank({VECTOR_COLUMN}, q) AS rank "
+            f"FROM {source.table}, to_tsquery('simple', :tsquery) q WHERE {condition} "
+            f"ORDER BY rank DESC LIMIT :limit)"
+        )
+    rows = connection.execute(text(
+        ' UNION ALL '.join(parts) + ' ORDER BY rank DESC LIMIT :limit'
+    ), {'tsquery': ' & '.join(f'{term}:*' for term in terms), 'limit': limit, 'user_id': restrict_user})
+    return [(row.code, row.id, row.title, row.body, row.rank) for row in rows]
+
+
+def _snippet(body, terms, width=160):
+    body = ' '.join((body or '').split())
+    if len(body) <= width:
+        return body
+    lowered = body.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = body[start:start + width]
+    return ('...' if start else '') + snippet + ('...' if start + width < len(body) else '')
+
+
+def search(connection, query, principal, limit=20, kinds=None):
+    """Ranked matches of `query` visible to `principal`, as SearchResult tuples.
+
+    `kinds` optionally limits the sources (e.g. {'task', 'contract'}).
+    """
+    terms = search_terms(query)
+    sources = [source for source in SOURCES
+               if principal.has_module_access(source.module) and (not kinds or source.kind in kinds)]
+    if not terms or not sources:
+        return []
+    # Xodim faqat o'ziga biriktirilgan topshiriqlar va ularning izohlarini ko'radi
+    restrict_user = None if principal.role in ('admin', 'rahbar') else principal.id
+
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = _search_sqlite(connection, terms, sources, restrict_user, limit)
+    elif dialect == 'postgresql':
+        rows = _search_postgres(connection, terms, sources, restrict_user, limit)
+    else:
+        raise NotImplementedError(f'Full-text search is not supported on {dialect}')
+
+    comment_ids = [ref_id for code, ref_id, *_ in rows if code == 2]
+    comment_tasks = dict(connection.execute(
+        text('SELECT id, task_id FROM task_comments WHERE id IN :ids').bindparams(bindparam('ids', expanding=True)),
+        {'ids': comment_ids},
+    ).all()) if comment_ids else {}
+
+    results = []
+    for code, ref_id, title, body, rank in rows:
+        source = SOURCES_BY_CODE[code]
+        title = (title or '').strip(' -')
+        task_id = ref_id if code == 1 else comment_tasks.get(ref_id)
+        results.append(SearchResult(source.kind, source.label, ref_id, task_id,
+                                    title or _snippet(body, terms, 80), _snippet(body, terms) if title else '',
+                                    round(rank, 4)))
+    return results
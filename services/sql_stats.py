@@ -0,0 +1,159 @@
+"""
+Har bir so'rov (request) uchun SQL statistikasi va sekin so'rovlar logi.
+
+Engine darajasidagi before/after_cursor_execute hook'lari har bir statement
+vaqtini o'lchaydi. Request davomida so'rovlar soni, umumiy DB vaqti va eng sekin
+statement'lar yig'iladi, so'ng Flask endpoint nomi bo'yicha jamlanadi.
+SLOW_QUERY_MS dan uzoq davom etgan statement'lar `slow_query` loggeriga yoziladi.
+
+Jamlanma har bir worker jarayonining xotirasida saqlanadi (gunicorn'da har bir
+worker o'z ko'rsatkichlarini ko'rsatadi).
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_log = logging.getLogger('slow_query')
+
+_lock = threading.Lock()
+_endpoints = {}
+_recent_slow = deque(maxlen=50)
+_settings = {'slow_ms': 200.0, 'top': 5}
+
+
+class EndpointStats:
+    """Running totals for one endpoint."""
+
+    __slots__ = ('requests', 'queries', 'db_time', 'max_db_time', 'max_queries', 'slowest')
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.max_db_time = 0.0
+        self.max_queries = 0
+        # statement -> eng uzoq davomiylik, faqat eng sekin `top` tasi saqlanadi
+        self.slowest = {}
+
+    @property
+    def avg_queries(self):
+        return self.queries / self.requests if self.requests else 0
+
+    @property
+    def avg_db_ms(self):
+        return self.db_time * 1000 / self.requests if self.requests else 0
+
+    def slowest_sorted(self):
+        return sorted(((duration, statement) for statement, duration in self.slowest.items()),
+                      reverse=True)
+
+
+def _request_stats():
+    stats = g.get('_sql_stats')
+    if stats is None:
+        # [so'rovlar soni, umumiy vaqt, [(vaqt, statement), ...]]
+        stats = g._sql_stats = [0, 0.0, []]
+    return stats
+
+
+def _push_slowest(heap, duration, statement, top):
+    if len(heap) < top:
+        heapq.heappush(heap, (duration, statement))
+    elif duration > heap[0][0]:
+        heapq.heapreplace(heap, (duration, statement))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_sql_stats_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_sql_stats_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    in_request = has_request_context()
+    if in_request:
+        stats = _request_stats()
+        stats[0] += 1
+        stats[1] += duration
+        _push_slowest(stats[2], duration, statement, _settings['top'])
+
+    if duration * 1000 >= _settings['slow_ms']:
+        endpoint = request.endpoint if in_request else None
+        _recent_slow.append({
+            'at': time.time(),
+            'endpoint': endpoint,
+            'duration_ms': duration * 1000,
+            'statement': statement,
+        })
+        slow_log.warning('%.1f ms [%s] %s', duration * 1000, endpoint or '-', statement)
+
+
+def _record_request(endpoint, stats):
+    count, db_time, slowest = stats
+    top = _settings['top']
+    with _lock:
+        entry = _endpoints.get(endpoint)
+        if entry is None:
+            entry = _endpoints[endpoint] = EndpointStats()
+        entry.requests += 1
+        entry.queries += count
+        entry.db_time += db_time
+        entry.max_db_time = max(entry.max_db_time, db_time)
+        entry.max_queries = max(entry.max_queries, count)
+        for duration, statement in slowest:
+            if duration > entry.slowest.get(statement, 0.0):
+                entry.slowest[statement] = duration
+        if len(entry.slowest) > top:
+            keep = heapq.nlargest(top, entry.slowest.items(), key=lambda item: item[1])
+            entry.slowest = dict(keep)
+
+
+def init_sql_stats(app):
+    """Install the timing hooks when SQL_STATS_ENABLED is set (on by default)."""
+    if not app.config.get('SQL_STATS_ENABLED', True):
+        return
+
+    _settings['slow_ms'] = float(app.config.get('SLOW_QUERY_MS', 200))
+    _settings['top'] = int(app.config.get('SQL_STATS_TOP', 5))
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.after_request
+    def _record_sql_stats(response):
+        stats = g.pop('_sql_stats', None)
+        if stats is None:
+            return response
+        _record_request(request.endpoint or request.path, stats)
+        response.headers.add('Server-Timing', f'db;dur={stats[1] * 1000:.1f};desc="{stats[0]} queries"')
+        return response
+
+
+def get_endpoint_stats(order_by='db_time'):
+    """Return (endpoint, EndpointStats) pairs, most expensive first."""
+    with _lock:
+        items = list(_endpoints.items())
+    return sorted(items, key=lambda item: getattr(item[1], order_by), reverse=True)
+
+
+def get_recent_slow_queries():
+    return list(reversed(_recent_slow))
+
+
+def reset_sql_stats():
+    with _lock:
+        _endpoints.clear()
+        _recent_slow.clear()
+
+
+def slow_query_threshold_ms():
+    return _settings['slow_ms']
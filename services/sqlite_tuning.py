@@ -0,0 +1,123 @@
+"""
+SQLite rejimi (DATABASE_URL berilmaganda ishlatiladigan lokal baza) uchun sozlamalar.
+
+Har bir yangi ulanishda PRAGMA'lar o'rnatiladi:
+
+* journal_mode=WAL: o'quvchilar yozuvchini kutmaydi (va aksincha), bir
+  nechta gunicorn worker bitta fayl bilan ishlay oladi;
+* synchronous=NORMAL: WAL'da xavfsiz, har bir commit'da fsync yo'q;
+* busy_timeout: qulf band bo'lsa darhol "database is locked" emas, kutish;
+* cache_size / mmap_size: sahifa keshi va xotiraga akslantirilgan o'qish;
+* foreign_keys=ON: Postgres'dagi kabi tashqi kalitlar tekshiriladi.
+
+Har SQLITE_OPTIMIZE_INTERVAL soniyada (har bir worker'da) fon oqimida
+`PRAGMA optimize` va WAL checkpoint bajariladi, WAL fayli cheksiz o'smaydi.
+`flask sqlite-maintenance` xuddi shuni qo'lda (TRUNCATE checkpoint bilan) qiladi.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_settings = {
+    'busy_timeout_ms': 5000,
+    'cache_size_kib': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'foreign_keys': True,
+    'optimize_interval': 3600.0,
+}
+
+_maintenance_lock = threading.Lock()
+_last_maintenance = [time.monotonic()]
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        # :memory: bazada journal_mode 'memory' bo'lib qoladi, bu xato emas
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f"PRAGMA busy_timeout={_settings['busy_timeout_ms']}")
+        # Manfiy qiymat: sahifalar soni emas, KiB
+        cursor.execute(f"PRAGMA cache_size=-{_settings['cache_size_kib']}")
+        cursor.execute(f"PRAGMA mmap_size={_settings['mmap_size']}")
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if _settings['foreign_keys'] else 'OFF'}")
+    finally:
+        cursor.close()
+
+
+def sqlite_pragmas(engine):
+    """Return the current values of the tuned pragmas on `engine` (for diagnostics)."""
+    names = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'foreign_keys')
+    with engine.connect() as connection:
+        return {name: connection.execute(text(f'PRAGMA {name}')).scalar() for name in names}
+
+
+def run_maintenance(engine, checkpoint='PASSIVE'):
+    """Run `PRAGMA optimize` and a WAL checkpoint on `engine`.
+
+    Returns (busy, wal_pages, checkpointed_pages) from `wal_checkpoint`.
+    PASSIVE never blocks writers; TRUNCATE waits for them and empties the WAL file.
+    """
+    with engine.connect() as connection:
+        connection.execute(text('PRAGMA optimize'))
+        row = connection.execute(text(f'PRAGMA wal_checkpoint({checkpoint})')).fetchone()
+        connection.commit()
+    return tuple(row)
+
+
+def _maintenance_due():
+    if time.monotonic() - _last_maintenance[0] < _settings['optimize_interval']:
+        return False
+    # Boshqa oqim allaqachon bajarayotgan bo'lsa kutmaymiz
+    if not _maintenance_lock.acquire(blocking=False):
+        return False
+    _last_maintenance[0] = time.monotonic()
+    return True
+
+
+def _maintenance_thread(engines):
+    try:
+        for engine in engines:
+            result = run_maintenance(engine)
+            logger.info('SQLite maintenance %s: %s', engine.url.database, result)
+    except Exception:
+        logger.exception('SQLite maintenance failed')
+    finally:
+        _maintenance_lock.release()
+
+
+def init_sqlite(app):
+    """Install the pragma hook and periodic maintenance for SQLite databases."""
+    _settings['busy_timeout_ms'] = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    _settings['cache_size_kib'] = int(app.config.get('SQLITE_CACHE_SIZE_KIB', 20000))
+    _settings['mmap_size'] = int(app.config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    _settings['foreign_keys'] = bool(app.config.get('SQLITE_FOREIGN_KEYS', True))
+    _settings['optimize_interval'] = float(app.config.get('SQLITE_OPTIMIZE_INTERVAL', 3600))
+
+    # Engine'lar hali yaratilmagan bo'lishi mumkin: hook barcha engine'larga, faqat sqlite3 ulanishlariga
+    event.listen(Engine, 'connect', _set_sqlite_pragmas)
+
+    if _settings['optimize_interval'] <= 0:
+        return
+
+    @app.before_request
+    def _sqlite_maintenance():
+        if not _maintenance_due():
+            return
+        from models import db
+        engines = [engine for engine in db.engines.values()
+                   if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')]
+        if not engines:
+            _maintenance_lock.release()
+            return
+        threading.Thread(target=_maintenance_thread, args=(engines,), daemon=True,
+                         name='sqlite-maintenance').start()
@@ -0,0 +1,71 @@
+"""
+Ilova ishga tushish vaqtini o'lchash (import va birinchi so'rovgacha).
+
+Har bir o'lchov yangi Python jarayonida bajariladi, shuning uchun gunicorn
+worker yoki `flask` CLI ishga tushganda to'lanadigan xarajat aynan ko'rinadi:
+
+* import_ms: `import app` (modullar, kengaytmalar, konfiguratsiya);
+* boot_ms: import + birinchi so'rovga javob (shablonlar, birinchi ulanishlar).
+
+Qo'shimcha bitta jarayon `-X importtime` bilan ishga tushiriladi va ilova
+bevosita import qiladigan eng og'ir modullar ro'yxati qaytariladi.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import json, time
+started = time.perf_counter()
+import {module} as target
+imported = time.perf_counter()
+target.app.test_client().get({path!r})
+booted = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - started) * 1000, 'boot_ms': (booted - started) * 1000}}))
+"""
+
+
+def _run(code, cwd, extra_args=()):
+    # Worker kabi: `flask` CLI belgisi bolaga o'tmasin (aks holda CLI-only kengaytmalar yuklanadi)
+    env = {key: value for key, value in os.environ.items() if key != 'FLASK_RUN_FROM_CLI'}
+    return subprocess.run([sys.executable, *extra_args, '-c', code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def _summary(values):
+    return {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+
+
+def parse_importtime(stderr, module):
+    """Return [(name, cumulative_ms)] for modules imported directly by `module`."""
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 1:
+            children.append((name, int(cumulative) / 1000))
+        elif depth == 0:
+            if name == module:
+                return sorted(children, key=lambda item: item[1], reverse=True)
+            children = []
+    return []
+
+
+def measure_startup(runs=5, top=10, module='app', path='/login', cwd=None):
+    """Import `module` and serve `path` in `runs` fresh interpreters; return timings in ms."""
+    cwd = cwd or os.getcwd()
+    code = _PROBE.format(module=module, path=path)
+
+    samples = [json.loads(_run(code, cwd).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    profile = _run(code, cwd, ('-X', 'importtime'))
+    return {
+        'runs': runs,
+        'import_ms': _summary([sample['import_ms'] for sample in samples]),
+        'boot_ms': _summary([sample['boot_ms'] for sample in samples]),
+        'heaviest_imports': parse_importtime(profile.stderr, module)[:top],
+    }
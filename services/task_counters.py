@@ -0,0 +1,211 @@
+"""
+Topshiriqlar soni uchun hisoblagich jadvali (`task_counters`).
+
+Har bir flush'da `Task` va `TaskAssignment` o'zgarishlaridan delta hisoblanadi
+va shu tranzaksiya ichida upsert qilinadi. Statistika endpoint'lari butun
+`tasks` jadvalini emas, faqat statuslar soniga teng qatorlarni o'qiydi.
+"""
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, Task, TaskAssignment, TaskCounter
+
+SCOPE_ALL = 'all'
+SCOPE_USER = 'user'
+
+
+def _key(status):
+    return status or ''
+
+
+def _history(obj, attr):
+    """Return (value before flush, value after flush) for a loaded attribute."""
+    hist = inspect(obj).attrs[attr].history
+    unchanged = hist.unchanged[0] if hist.unchanged else None
+    before = hist.deleted[0] if hist.deleted else unchanged
+    after = hist.added[0] if hist.added else unchanged
+    return before, after
+
+
+def _upsert(connection, deltas):
+    rows = [
+        {'scope': scope, 'user_id': user_id, 'status': status, 'count': delta}
+        for (scope, user_id, status), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+
+    table = TaskCounter.__table__
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['scope', 'user_id', 'status'],
+            set_={'count': table.c.count + stmt.excluded['count']}
+        )
+        connection.execute(stmt)
+        return
+
+    # Boshqa bazalar uchun: UPDATE, qator bo'lmasa INSERT
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.scope == row['scope'],
+                   table.c.user_id == row['user_id'],
+                   table.c.status == row['status'])
+            .values(count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_task_counters(session, flush_context):
+    new, deleted = session.new, session.deleted
+    objects = list(chain(new, session.dirty, deleted))
+    tasks = [obj for obj in objects if isinstance(obj, Task)]
+    assignments = [obj for obj in objects if isinstance(obj, TaskAssignment)]
+    if not tasks and not assignments:
+        return
+
+    connection = session.connection()
+    deltas = Counter()
+    task_by_id = {task.id: task for task in tasks}
+    status_changes = {}
+
+    for task in tasks:
+        before, after = _history(task, 'status')
+        if task in new:
+            deltas[SCOPE_ALL, 0, _key(after)] += 1
+        elif task in deleted:
+            deltas[SCOPE_ALL, 0, _key(before)] -= 1
+        elif before != after:
+            deltas[SCOPE_ALL, 0, _key(before)] -= 1
+            deltas[SCOPE_ALL, 0, _key(after)] += 1
+            status_changes[task.id] = (before, after)
+
+    # Sessiyada bo'lmagan topshiriqlar statusi o'zgarmagan, bazadan olamiz
+    task_ids = set()
+    for assignment in assignments:
+        task_ids.update(value for value in _history(assignment, 'task_id') if value)
+    missing = task_ids - set(task_by_id)
+    db_status = {}
+    if missing:
+        db_status = dict(connection.execute(
+            select(Task.id, Task.status).where(Task.id.in_(missing))
+        ).all())
+
+    def status_of(task_id, when):
+        task = task_by_id.get(task_id)
+        if task is None:
+            return db_status.get(task_id)
+        before, after = _history(task, 'status')
+        return before if when == 'before' else after
+
+    handled = set()
+    for assignment in assignments:
+        user_before, user_after = _history(assignment, 'user_id')
+        task_before, task_after = _history(assignment, 'task_id')
+        if assignment in new:
+            deltas[SCOPE_USER, user_after, _key(status_of(task_after, 'after'))] += 1
+            handled.add(assignment.id)
+        elif assignment in deleted:
+            deltas[SCOPE_USER, user_before, _key(status_of(task_before, 'before'))] -= 1
+        elif (user_before, task_before) != (user_after, task_after):
+            deltas[SCOPE_USER, user_before, _key(status_of(task_before, 'before'))] -= 1
+            deltas[SCOPE_USER, user_after, _key(status_of(task_after, 'after'))] += 1
+            handled.add(assignment.id)
+
+    # Status o'zgargan topshiriqning qolgan biriktirmalari
+    for task_id, (before, after) in status_changes.items():
+        rows = connection.execute(
+            select(TaskAssignment.id, TaskAssignment.user_id).where(TaskAssignment.task_id == task_id)
+        )
+        for assignment_id, user_id in rows:
+            if assignment_id in handled:
+                continue
+            deltas[SCOPE_USER, user_id, _key(before)] -= 1
+            deltas[SCOPE_USER, user_id, _key(after)] += 1
+
+    _upsert(connection, deltas)
+
+
+def get_task_status_counts(user_id=None):
+    """Return {status: count} for all tasks, or for tasks assigned to `user_id`."""
+    query = db.session.query(TaskCounter.status, TaskCounter.count)
+    if user_id is None:
+        query = query.filter(TaskCounter.scope == SCOPE_ALL, TaskCounter.user_id == 0)
+    else:
+        query = query.filter(TaskCounter.scope == SCOPE_USER, TaskCounter.user_id == user_id)
+    # Manfiy qiymat faqat hisoblagich buzilganda bo'ladi (`flask task-counters --verify`)
+    return {status: count for status, count in query.all() if count > 0}
+
+
+def count_overdue_tasks(user_id=None):
+    """Overdue is time-dependent, so it is counted from `tasks` directly."""
+    query = db.session.query(func.count(Task.id)).filter(
+        Task.due_date < datetime.utcnow(),
+        Task.status != 'completed'
+    )
+    if user_id is not None:
+        query = query.filter(Task.id.in_(
+            select(TaskAssignment.task_id).where(TaskAssignment.user_id == user_id)
+        ))
+    return query.scalar() or 0
+
+
+def _expected_counts():
+    expected = Counter()
+    for status, count in db.session.query(Task.status, func.count(Task.id)).group_by(Task.status):
+        expected[SCOPE_ALL, 0, _key(status)] += count
+    user_rows = db.session.query(
+        TaskAssignment.user_id, Task.status, func.count(TaskAssignment.id)
+    ).join(Task, Task.id == TaskAssignment.task_id).group_by(TaskAssignment.user_id, Task.status)
+    for user_id, status, count in user_rows:
+        expected[SCOPE_USER, user_id, _key(status)] += count
+    return expected
+
+
+def verify_task_counters():
+    """Return a list of (key, stored, expected) rows that disagree."""
+    expected = _expected_counts()
+    stored = Counter({
+        (row.scope, row.user_id, row.status): row.count for row in TaskCounter.query.all()
+    })
+    return [
+        (key, stored.get(key, 0), expected.get(key, 0))
+        for key in sorted(set(expected) | set(stored))
+        if stored.get(key, 0) != expected.get(key, 0)
+    ]
+
+
+def ensure_task_counters():
+    """Fill an empty counter table (e.g. just created by create_all) from existing tasks.
+
+    Returns the number of rows written, 0 when the table was already populated.
+    """
+    if db.session.query(TaskCounter.id).first() is not None:
+        return 0
+    if db.session.query(Task.id).first() is None:
+        return 0
+    return rebuild_task_counters()
+
+
+def rebuild_task_counters():
+    """Recompute the whole counter table from tasks and assignments."""
+    expected = _expected_counts()
+    TaskCounter.query.delete()
+    db.session.bulk_insert_mappings(TaskCounter, [
+        {'scope': scope, 'user_id': user_id, 'status': status, 'count': count}
+        for (scope, user_id, status), count in expected.items()
+    ])
+    db.session.commit()
+    return len(expected)
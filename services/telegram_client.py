@@ -0,0 +1,164 @@
+"""
+Umumiy Telegram Bot API klienti.
+
+Bitta keep-alive `requests.Session` (ulanishlar pooli), global va har bir chat uchun
+token-bucket limitlari hamda 429 javobidagi `retry_after` ni hurmat qilish.
+Telegram'ga barcha chaqiruvlar shu modul orqali o'tadi.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = "https://api.telegram.org"
+
+# Telegram limitlari: ~30 xabar/soniya umumiy, 1 xabar/soniya bitta chatga
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+# retry_after bundan uzun bo'lsa kutmaymiz, xabar keyinroq qayta yuboriladi (outbox)
+MAX_RETRY_AFTER = float(os.getenv("TELEGRAM_MAX_RETRY_AFTER", "30"))
+REQUEST_TIMEOUT = 10
+MAX_CHAT_BUCKETS = 10000
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available; return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def is_idle(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens >= self.capacity
+
+
+class TelegramClient:
+    """Pooled, rate-limited Bot API client shared by the whole process."""
+
+    def __init__(self, token, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE):
+        self.token = token
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+        self.session.mount("https://", adapter)
+
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.chat_lock = threading.Lock()
+
+        self.counters = {"sent": 0, "throttled": 0, "failed": 0}
+        self.counters_lock = threading.Lock()
+
+    def _count(self, name):
+        with self.counters_lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.counters_lock:
+            return dict(self.counters)
+
+    def _chat_bucket(self, chat_id):
+        key = str(chat_id)
+        with self.chat_lock:
+            bucket = self.chat_buckets.get(key)
+            if bucket is None:
+                if len(self.chat_buckets) >= MAX_CHAT_BUCKETS:
+                    # To'la bo'lgan (bo'sh turgan) bucketlarni tashlab yuboramiz
+                    self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_idle()}
+                bucket = self.chat_buckets[key] = TokenBucket(self.chat_rate, capacity=1)
+            return bucket
+
+    def call(self, method, payload=None, chat_id=None, retries=3):
+        """Call a Bot API method; return the decoded JSON body or None on failure."""
+        if not self.token:
+            return None
+
+        url = f"{API_BASE}/bot{self.token}/{method}"
+        for _ in range(retries):
+            if chat_id is not None:
+                self._chat_bucket(chat_id).acquire()
+            self.global_bucket.acquire()
+
+            try:
+                resp = self.session.post(url, json=payload or {}, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                print("Telegram API error:", e)
+                self._count("failed")
+                return None
+
+            if resp.status_code == 429:
+                self._count("throttled")
+                try:
+                    retry_after = float(resp.json().get("parameters", {}).get("retry_after", 1))
+                except ValueError:
+                    retry_after = 1
+                if retry_after > MAX_RETRY_AFTER:
+                    break
+                time.sleep(retry_after)
+                continue
+
+            try:
+                data = resp.json()
+            except ValueError:
+                data = {"ok": False, "description": resp.text}
+            if not data.get("ok"):
+                print("Telegram API error:", data.get("description"))
+                self._count("failed")
+                return None
+            return data
+
+        self._count("failed")
+        return None
+
+    def send_message(self, chat_id, text, parse_mode=None, **extra):
+        if not chat_id:
+            return False
+        payload = {"chat_id": chat_id, "text": text, **extra}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if self.call("sendMessage", payload, chat_id=chat_id) is None:
+            return False
+        self._count("sent")
+        return True
+
+    def set_webhook(self, url):
+        return self.call("setWebhook", {"url": url})
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the per-process client (created lazily, after fork)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TelegramClient(os.getenv("TELEGRAM_BOT_TOKEN", ""))
+    return _client
@@ -0,0 +1,127 @@
+"""
+Telegram push xabarlari uchun outbox.
+
+Route'lar xabarni to'g'ridan-to'g'ri api.telegram.org ga yubormaydi: `enqueue_push`
+`Notification` qatorlari bilan bir xil tranzaksiyada `telegram_outbox` ga yozadi,
+alohida worker jarayoni (`flask telegram-worker`) esa navbatni partiyalab yuboradi.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, TelegramOutbox, User
+from services.telegram_service import send_push
+
+# Qayta urinishlar orasidagi kutish: 30s, 60s, 120s ... 1 soatgacha
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# Olingan (`sending`) qator shu vaqt ichida natija yozilmasa boshqa worker qayta oladi.
+# Bitta chatga 1 xabar/s: 100 talik partiya ~100s, zaxira bilan
+CLAIM_LEASE_SECONDS = 600
+
+
+def enqueue_push(text, user_id=None, chat_id=None, parse_mode=None):
+    """Add a push message to the outbox without committing.
+
+    Either `user_id` (chat_id is resolved by the worker) or `chat_id` must be given.
+    The row is committed together with the caller's transaction. Nothing is
+    queued when TELEGRAM_BOT_TOKEN is not set (the worker would never send it).
+    """
+    if not user_id and not chat_id:
+        return None
+    if not current_app.config.get('TELEGRAM_BOT_TOKEN'):
+        return None
+    item = TelegramOutbox(
+        user_id=user_id,
+        chat_id=str(chat_id) if chat_id else None,
+        text=text,
+        parse_mode=parse_mode,
+    )
+    db.session.add(item)
+    return item
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def drain_outbox(batch_size=100, max_attempts=5):
+    """Send one batch of due outbox messages and return per-status counts.
+
+    Rows are claimed first (status `sending`, committed), then each message is
+    sent and its result committed on its own: no transaction or row lock is
+    held across Telegram calls or rate-limit waits, and a worker killed
+    mid-batch loses at most the message it was sending.
+    """
+    now = datetime.utcnow()
+    # Muddati o'tgan `sending`: uni olgan worker to'xtagan, qayta yuboriladi
+    query = TelegramOutbox.query.filter(
+        TelegramOutbox.status.in_(['pending', 'sending']),
+        TelegramOutbox.next_attempt_at <= now
+    ).order_by(TelegramOutbox.id).limit(batch_size)
+
+    # Bir nechta worker bo'lsa, Postgres'da bir xil qatorni ikki marta olmaslik uchun
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+
+    items = query.all()
+    result = {'sent': 0, 'retry': 0, 'failed': 0, 'skipped': 0}
+    if not items:
+        db.session.commit()
+        return result
+
+    # chat_id'larni bitta so'rovda olamiz
+    user_ids = {item.user_id for item in items if not item.chat_id and item.user_id}
+    chat_ids = {}
+    if user_ids:
+        chat_ids = dict(
+            db.session.query(User.id, User.telegram_chat_id).filter(User.id.in_(user_ids)).all()
+        )
+
+    claimed = []
+    lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    for item in items:
+        chat_id = item.chat_id or chat_ids.get(item.user_id)
+        if not chat_id:
+            item.status = 'skipped'
+            result['skipped'] += 1
+            continue
+        item.status = 'sending'
+        item.next_attempt_at = lease_until
+        item.attempts = (item.attempts or 0) + 1
+        claimed.append((item.id, chat_id, item.text, item.parse_mode, item.attempts))
+    # Qulf faqat shu yergacha: tranzaksiya HTTP so'rovlaridan oldin yopiladi
+    db.session.commit()
+
+    for item_id, chat_id, text, parse_mode, attempts in claimed:
+        if send_push(chat_id, text, parse_mode=parse_mode):
+            values = {'status': 'sent', 'sent_at': datetime.utcnow(), 'last_error': None}
+            result['sent'] += 1
+        elif attempts >= max_attempts:
+            values = {'status': 'failed', 'last_error': 'Telegram API xatosi'}
+            result['failed'] += 1
+        else:
+            values = {'status': 'pending', 'last_error': 'Telegram API xatosi',
+                      'next_attempt_at': datetime.utcnow() + _retry_delay(attempts)}
+            result['retry'] += 1
+        TelegramOutbox.query.filter_by(id=item_id, status='sending').update(values, synchronize_session=False)
+        db.session.commit()
+
+    return result
+
+
+def purge_outbox(older_than_days=7, failed_older_than_days=30):
+    """Delete delivered/skipped rows older than `older_than_days` and rows that
+    exhausted their retries (`failed`) older than `failed_older_than_days`."""
+    now = datetime.utcnow()
+    deleted = TelegramOutbox.query.filter(
+        TelegramOutbox.status.in_(['sent', 'skipped']),
+        TelegramOutbox.created_at < now - timedelta(days=older_than_days)
+    ).delete(synchronize_session=False)
+    # Xato bilan tugaganlar tahlil uchun uzoqroq saqlanadi
+    deleted += TelegramOutbox.query.filter(
+        TelegramOutbox.status == 'failed',
+        TelegramOutbox.created_at < now - timedelta(days=failed_older_than_days)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
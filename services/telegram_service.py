@@ -1,18 +1,12 @@
-import os
-import requests
+from services.telegram_client import get_client
 
-BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-
-def send_push(chat_id, text):
+def send_push(chat_id, text, parse_mode=None):
     """
     Global push sender.
     Xodim → Rahbar → Xodim reaksiyalarini yuboradi.
+    Yuborilgan bo'lsa True qaytaradi (outbox worker qayta urinish uchun ishlatadi).
     """
     if not chat_id:
-        return
+        return False
 
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    try:
-        requests.post(url, json={"chat_id": chat_id, "text": text})
-    except Exception as e:
-        print("Telegram push error:", e)
+    return get_client().send_message(chat_id, text, parse_mode=parse_mode)
@@ -0,0 +1,80 @@
+"""
+Oqimli (write-only) Excel eksport.
+
+openpyxl write-only rejimida qatorlar diskdagi vaqtinchalik faylga yoziladi,
+xotirada butun Workbook saqlanmaydi. Write-only varaqda ustun kengliklari birinchi
+qatordan oldin berilishi kerak, shu sabab kengliklar header va dastlabki
+WIDTH_SAMPLE qatordan (bitta o'tishda, buferlab) hisoblanadi.
+
+openpyxl faqat eksport paytida yuklanadi (worker ishga tushishini sekinlashtirmaydi).
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+WIDTH_SAMPLE = 200
+MAX_WIDTH = 50
+
+
+@lru_cache(maxsize=None)
+def _header_style():
+    from openpyxl.styles import Alignment, Font, PatternFill
+    return (Font(bold=True, color='FFFFFF'),
+            PatternFill(start_color='2c3e50', end_color='2c3e50', fill_type='solid'),
+            Alignment(horizontal='center', vertical='center'))
+
+
+def _display_length(value):
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        return 16
+    if isinstance(value, date):
+        return 10
+    # Ko'p qatorli matnda eng uzun qator hisobga olinadi
+    return max(len(line) for line in str(value).split('\n'))
+
+
+def column_widths(headers, rows):
+    widths = [_display_length(header) for header in headers]
+    for row in rows:
+        for index, value in enumerate(row):
+            length = _display_length(value)
+            if length > widths[index]:
+                widths[index] = length
+    return [min(width + 2, MAX_WIDTH) for width in widths]
+
+
+def write_xlsx(fileobj, title, headers, rows):
+    """Write `headers` and the `rows` iterable as a single-sheet workbook into `fileobj`."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])
+
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE))
+    for index, width in enumerate(column_widths(headers, sample), 1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    header_font, header_fill, header_alignment = _header_style()
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in sample:
+        ws.append(row)
+    for row in rows:
+        ws.append(row)
+
+    wb.save(fileobj)
+
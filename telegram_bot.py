@@ -2,6 +2,8 @@ import os
 import telebot
 import requests
 
+from services.telegram_client import get_client
+
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 SERVER_URL = os.getenv("SERVER_URL")  # Render domening
 
@@ -12,14 +14,19 @@ def start(message):
     chat_id = message.chat.id
     username = message.from_user.username
 
-    bot.reply_to(message, "AF Imperiya tizimiga muvaffaqiyatli bog'landingiz!")
+    # Javob umumiy (pool + rate limit) klient orqali yuboriladi
+    get_client().send_message(
+        chat_id,
+        "AF Imperiya tizimiga muvaffaqiyatli bog'landingiz!",
+        reply_to_message_id=message.message_id
+    )
 
     # serverga chat_id yuborish
     try:
         requests.post(f"{SERVER_URL}/api/save_chat_id", json={
             "username": username,
             "chat_id": chat_id
-        })
+        }, timeout=10)
     except:
         pass
 